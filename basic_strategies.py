@@ -4,19 +4,31 @@ import math
 import random
 from typing import Optional
 
-from cards import Suit, Card
+from bitboard import CardIndex
+from cards import Suit, Card, Trick
 from constants import LONE_HAND_POINTS, FULL_DECK
 from card_predictor import CardPredictor
 
 
 Bid = tuple[int, Suit]
+# GoodBidder.evaluate_hand result: per suit trump score, per suit bauer score,
+# offsuit fixed tricks per trump suit, and the no trump fixed tricks.
+HandEvaluation = tuple[dict[Suit, float], dict[Suit, int], dict[Suit, int], int]
 
 class BiddingStrategy:
+  __slots__ = ()
+
+  # Bump when a change alters how the strategy plays, so cached tournament
+  # results for it are played again.
+  version = 1
+
   def bid(self, hand: list[Card], prev_bids: list[Bid], curr_max: int) -> Bid:
     return None
 
 
 class RandomBidder(BiddingStrategy):
+  __slots__ = ()
+
   def bid(self, hand: list[Card], prev_bids: list[Bid], curr_max: int, score_delta: int, hands_left: int) -> Bid:
     s = random.choice(hand).suit
     num = random.randrange(len(hand))
@@ -27,6 +39,8 @@ class RandomBidder(BiddingStrategy):
 
 # Does not bid NT nor consider partners.
 class BasicBidder(BiddingStrategy):
+  __slots__ = ()
+
   def bid(self, hand: list[Card], prev_bids: list[Bid], curr_max: int, score_delta: int, hands_left: int) -> Bid:
     suit_trick_map = collections.defaultdict(int)
     for c in hand:
@@ -51,8 +65,64 @@ class BasicBidder(BiddingStrategy):
       
 
 class GoodBidder(BiddingStrategy):
+  __slots__ = ('params', 'trump_weights')
+
+  # The constants the bidding rules are built from. Override any of them by
+  # passing params, which is how tuner.py searches them.
+  DEFAULT_PARAMS = {
+    # Trump score of a left bauer, a right bauer, an A or K, and anything lower.
+    'left_weight': 1.25,
+    'right_weight': 1.6,
+    'high_weight': 0.9,
+    'low_weight': 0.7,
+    # Cards in a suit after which the rest of it are fixed tricks too, and the
+    # same once an opponent has bid 4+ in the suit.
+    'fixed_threshold': 3,
+    'contested_fixed_threshold': 4,
+    # Trump score past which all, or half, the offsuit fixed tricks count.
+    'full_offsuit_score': 6.5,
+    'half_offsuit_score': 4.0,
+    # Lone score to go alone on at even scores, and to go alone on rather than
+    # indicate when forced.
+    'lone_score': 9.0,
+    'forced_lone_score': 5.5,
+    # Desperation is divided by these to lower the lone score and raise bids.
+    'lone_desperation_divisor': 5.0,
+    'bid_desperation_divisor': 8.0,
+    # Share of the hands left that would need to be lone hands to catch up,
+    # past which a lone hand is forced, and the points each other hand is
+    # assumed to bring in.
+    'forced_lone_pct': 0.8,
+    'assumed_bid_points': 5,
+    # Bids worth less than this, after desperation, indicate instead.
+    'indicate_below': 6.0,
+    # Trump score under which a suit's lone score drops by one, and over which
+    # it gains the whole points it has over the first.
+    'weak_lone_trump_score': 5.0,
+    'strong_lone_trump_score': 6.0,
+    # Lone score past which all, or half, the offsuit fixed tricks count.
+    'lone_full_offsuit_score': 8.0,
+    'lone_half_offsuit_score': 6.5,
+  }
+
+  def __init__(self, params: Optional[dict[str, float]] = None):
+    params = params or {}
+    unknown = set(params) - set(GoodBidder.DEFAULT_PARAMS)
+    if unknown:
+      raise ValueError(f'Unknown GoodBidder params: {", ".join(sorted(unknown))}')
+    self.params = {**GoodBidder.DEFAULT_PARAMS, **params}
+    p = self.params
+    self.trump_weights = (p['left_weight'], p['right_weight'], p['high_weight'], p['low_weight'])
+
   # Lone hands are > 11, but to choose which one, we can be 12-17
   def bid(self, hand: list[Card], prev_bids: list[Bid], curr_max: int, score_delta: int, hands_left: int) -> Bid:
+    partner_bid, opp_bids, trust_indication = self.read_prev_bids(prev_bids)
+    evaluation = self.evaluate_hand(hand, self.get_fixed_thresholds(opp_bids))
+    return self.bid_from_evaluation(evaluation, prev_bids, curr_max, score_delta, hands_left,
+                                    partner_bid, opp_bids, trust_indication)
+
+  @staticmethod
+  def read_prev_bids(prev_bids: list[Bid]) -> tuple[Bid, list[Bid], bool]:
     assert len(prev_bids) <= 3 # This is a 4-hand only strat
     partner_bid = None
     opp_bids = []
@@ -65,7 +135,19 @@ class GoodBidder(BiddingStrategy):
       else:
         opp_bids.append(b)
     trust_indication = len(prev_bids) == 2 or (len(prev_bids) == 3 and not opp_bids[0])
+    return partner_bid, opp_bids, trust_indication
+
+  # AAK is safe unless someone else bid 4+ in this suit.
+  def get_fixed_thresholds(self, opp_bids: list[Bid]) -> dict[Suit, int]:
+    fixed_thresholds = {s: self.params['fixed_threshold'] for s in Suit.just_suits()}
+    for b in opp_bids:
+      if b and b[1] != Suit.TRUMP and b[0] >= 4:
+        fixed_thresholds[b[1]] = self.params['contested_fixed_threshold']
+    return fixed_thresholds
 
+  def evaluate_hand(self, hand: list[Card], fixed_thresholds: dict[Suit, int]) -> HandEvaluation:
+    # The left, right, A/K and lower card weights.
+    left_weight, right_weight, high_weight, low_weight = self.trump_weights
     # Approx how many tricks worth we expect with this suits trump.
     per_suit_trump_score = {}
 
@@ -76,23 +158,20 @@ class GoodBidder(BiddingStrategy):
     for s in Suit.just_suits():
       cards = sorted([c for c in hand if s == c.suit], reverse=True)
 
-      left_bauers = [c for c in hand if Suit.left(s) == c.suit and c.number == 11]
-      per_suit_trump_score[s] = len(left_bauers) * 1.25
+      left = Suit.left(s)
+      left_bauers = [c for c in hand if left == c.suit and c.number == 11]
+      per_suit_trump_score[s] = len(left_bauers) * left_weight
       per_suit_bauer_score[s] = len(left_bauers)
       for c in cards:
         if c.number == 11:
           per_suit_bauer_score[s] += 3
-          per_suit_trump_score[s] += 1.6
+          per_suit_trump_score[s] += right_weight
         elif c.number >= 13:
-          per_suit_trump_score[s] += 0.9
+          per_suit_trump_score[s] += high_weight
         else:
-          per_suit_trump_score[s] += 0.7
+          per_suit_trump_score[s] += low_weight
 
-      # AAK is safe unless someone else bid 4+ in this suit.
-      fixed_threshold = 3
-      for b in opp_bids:
-        if b and b[1] == s and b[0] >= 4:
-          fixed_threshold = 4
+      fixed_threshold = fixed_thresholds[s]
       num_nt = 0
       boss_card = 14
       for c in cards:
@@ -108,18 +187,33 @@ class GoodBidder(BiddingStrategy):
           offsuit_fixed_tricks[z] += num_nt
       no_trump_bid += num_nt
 
+    return per_suit_trump_score, per_suit_bauer_score, offsuit_fixed_tricks, no_trump_bid
+
+  def bid_from_evaluation(self,
+                          evaluation: HandEvaluation,
+                          prev_bids: list[Bid],
+                          curr_max: int,
+                          score_delta: int,
+                          hands_left: int,
+                          partner_bid: Bid,
+                          opp_bids: list[Bid],
+                          trust_indication: bool) -> Bid:
+    per_suit_trump_score, per_suit_bauer_score, offsuit_fixed_tricks, no_trump_bid = evaluation
     best_lone, lone_score = self.get_best_lone(per_suit_bauer_score,
         per_suit_trump_score, offsuit_fixed_tricks, no_trump_bid, partner_bid, trust_indication)
     # As a 0-1.0, how many lone hands are needed to catch up, assuming 8 bids otherwise.
-    lones_needed_pct = math.ceil((-score_delta) - (hands_left * 5)/(LONE_HAND_POINTS-5))/hands_left
-    if lones_needed_pct > 0.8:
+    p = self.params
+    assumed_points = p['assumed_bid_points']
+    other_hands = (hands_left * assumed_points)/(LONE_HAND_POINTS-assumed_points)
+    lones_needed_pct = math.ceil((-score_delta) - other_hands)/hands_left
+    if lones_needed_pct > p['forced_lone_pct']:
       if len(prev_bids) >= 2:
         # Gotta go alone.
         logging.debug('Forced lone hand')
         return 12, best_lone
       else:
         # Have the option to indicate.
-        if lone_score > 5.5:
+        if lone_score > self.params['forced_lone_score']:
           logging.debug('Decided I am better than partner likely will be')
           return 12, best_lone
         best_indication = self.indicate(per_suit_bauer_score, no_trump_bid)
@@ -135,10 +229,10 @@ class GoodBidder(BiddingStrategy):
     logging.debug(f'Best lone: {lone_score} {best_lone}')
     # See how desperate/safe we should be - positive is more desperate
     desperation = (-score_delta)/hands_left
-    if lone_score > 9 - desperation/5:
+    if lone_score > self.params['lone_score'] - desperation/self.params['lone_desperation_divisor']:
       return 12, best_lone
-    adjusted_bid_val = best_bid[0] + desperation/8
-    if adjusted_bid_val < 6:
+    adjusted_bid_val = best_bid[0] + desperation/self.params['bid_desperation_divisor']
+    if adjusted_bid_val < p['indicate_below']:
       indication = self.indicate(per_suit_bauer_score, no_trump_bid)
       if indication[0] > curr_max:
         return indication
@@ -181,16 +275,16 @@ class GoodBidder(BiddingStrategy):
       if b:
         net_scores[b[1]] -= b[0] / 2
         left = Suit.left(b[1])
-        if left != b[1]:
+        if left is not None:
           net_scores[left] -= 1
 
     net_scores[Suit.TRUMP] += no_trump_bid
     for s in Suit.just_suits():
       net_scores[s] += per_suit_trump_score[s]
       # Only count all offsuit if we have a good enough hand to get to offsuit.
-      if net_scores[s] > 6.5:
+      if net_scores[s] > self.params['full_offsuit_score']:
         net_scores[s] += offsuit_fixed_tricks[s]
-      elif net_scores[s] > 4:
+      elif net_scores[s] > self.params['half_offsuit_score']:
         net_scores[s] += offsuit_fixed_tricks[s]/2
 
     suit = max(net_scores, key=net_scores.get)
@@ -237,21 +331,30 @@ class GoodBidder(BiddingStrategy):
         lone_scores[partner_suit] += adjusted_partner_amount
         lone_scores[Suit.left(partner_suit)] += left_amount
 
+    p = self.params
     for s in Suit.just_suits():
-      if per_suit_trump_score[s] < 5:
+      if per_suit_trump_score[s] < p['weak_lone_trump_score']:
         lone_scores[s] -= 1
-      elif per_suit_trump_score[s] > 6:
-        lone_scores[s] += math.floor(per_suit_trump_score[s]) - 5
+      elif per_suit_trump_score[s] > p['strong_lone_trump_score']:
+        lone_scores[s] += math.floor(per_suit_trump_score[s] - p['weak_lone_trump_score'])
       offsuit = offsuit_fixed_tricks[s]
-      if lone_scores[s] >= 8:
+      if lone_scores[s] >= p['lone_full_offsuit_score']:
         lone_scores[s] += offsuit
-      elif lone_scores[s] >= 6.5:
+      elif lone_scores[s] >= p['lone_half_offsuit_score']:
         lone_scores[s] += offsuit/2
 
     best_lone = max(lone_scores, key=lone_scores.get)
     return best_lone, lone_scores[best_lone]
 
 class PlayingStrategy:
+  __slots__ = ('card_predictor',)
+
+  # See BiddingStrategy.version.
+  version = 1
+  # Strategies that set this are played through lead_mask/follow_mask, getting
+  # their hand and the remaining cards as CardIndex bitmasks instead of lists.
+  uses_bitboard = False
+
   def start_hand(self,
                  hand: list[Card],
                  bids: list[Bid],
@@ -259,17 +362,27 @@ class PlayingStrategy:
                  known_missing_cards: Optional[list[Card]] = None):
     self.card_predictor = CardPredictor(bids, my_index, known_missing_cards)
 
+  # Called with each trick once it's complete, in play order. my_index is how
+  # many seats after the leader this player sits.
+  def update(self, cards_laid: Trick, cards_remaining: list[Card], my_index: int):
+    pass
+
   @staticmethod
-  def get_legal_plays(hand: list[Card], cards_laid: list[Card]) -> set[Card]:
-    if cards_laid[0]:
-      suit = cards_laid[0].suit
-    else:
-      suit = cards_laid[1].suit
+  def get_legal_plays(hand: list[Card], cards_laid: Trick) -> set[Card]:
+    suit = cards_laid[0].suit
     follow_suit = {c for c in hand if c.suit == suit}
     if follow_suit:
       return follow_suit
     return set(hand)
 
+  @staticmethod
+  def get_led_suit(cards_laid: Trick) -> Suit:
+    return cards_laid[0].suit
+
+  @staticmethod
+  def get_legal_plays_mask(index: CardIndex, hand_mask: int, cards_laid: Trick) -> int:
+    return index.legal_plays(hand_mask, PlayingStrategy.get_led_suit(cards_laid))
+
   def give_two_to_partner(self, hand: list[Card], trump: Suit) -> list[Card]:
     def _eval(card):
       if not card:
@@ -303,8 +416,14 @@ class PlayingStrategy:
   def lead(self, hand: list[Card], cards_remaining: list[Card]) -> Card:
     raise Exception()
   # TODO - rework this, just add currently winning team, the winning card, and who is left to play
-  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: list[Card]) -> Card:
+  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: Trick) -> Card:
     raise Exception()
+  # Bitmask versions of lead/follow, used when uses_bitboard is set. By default they
+  # fall back to the list versions.
+  def lead_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int) -> Card:
+    return self.lead(index.to_cards(hand_mask), index.to_cards(remaining_mask))
+  def follow_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int, cards_laid: Trick) -> Card:
+    return self.follow(index.to_cards(hand_mask), index.to_cards(remaining_mask), cards_laid)
   # Returns discarded cards.
   def take_kitty(self, hand: list[Card], kitty_size: int) -> list[Card]:
     raise Exception()
@@ -312,23 +431,59 @@ class PlayingStrategy:
 
 
 class RandomPlayer(PlayingStrategy):
+  __slots__ = ()
+
+  uses_bitboard = True
+
   def lead(self, hand: list[Card], cards_remaining: list[Card]) -> Card:
     return random.choice(hand)
 
-  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: list[Card]) -> Card:
+  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: Trick) -> Card:
     return random.choice(list(PlayingStrategy.get_legal_plays(hand, cards_laid)))
 
+  # Same draw as random.choice over the cards high to low.
+  def lead_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int) -> Card:
+    return index.nth(hand_mask, random.randrange(hand_mask.bit_count()))
+
+  def follow_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int, cards_laid: Trick) -> Card:
+    legal = PlayingStrategy.get_legal_plays_mask(index, hand_mask, cards_laid)
+    return index.nth(legal, random.randrange(legal.bit_count()))
+
   # Returns discarded cards.
   def take_kitty(self, hand: list[Card], kitty_size: int) -> list[Card]:
     return random.sample(hand, kitty_size)
 
 
 class BasicPlayer(PlayingStrategy):
+  __slots__ = ()
+
+  uses_bitboard = True
+
   # Basic player always leads boss cards if they have one, random else.
   def lead(self, hand: list[Card], cards_remaining: list[Card]) -> Card:
+    return self._lead(hand, lambda c: c.is_boss(cards_remaining))
+
+  # Only the top card of a suit can be boss, as the rest are beaten by it, so
+  # _lead's pick is found looking at one card a suit.
+  def lead_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int) -> Card:
+    selection = None
+    m = hand_mask
+    while m:
+      top = index.highest(m)
+      boss_value = index.is_boss(top, remaining_mask)
+      if boss_value == 10:
+        return top
+      if boss_value == 1:
+        selection = top
+      m &= ~index.suit_masks[top.suit]
+    if selection:
+      return selection
+    return index.nth(hand_mask, random.randrange(hand_mask.bit_count()))
+
+  def _lead(self, hand: list[Card], is_boss) -> Card:
     selection = None
     for c in hand:
-      boss_value = c.is_boss(cards_remaining)
+      boss_value = is_boss(c)
       if boss_value == 10:
         return c
       if boss_value == 1:
@@ -337,6 +492,7 @@ class BasicPlayer(PlayingStrategy):
       return selection
     return random.choice(hand)
 
+  @staticmethod
   def basic_throwaway(legal_plays: list[Card]):
     min_card = Card(Suit.TRUMP, 1000)
     for c in legal_plays:
@@ -349,11 +505,35 @@ class BasicPlayer(PlayingStrategy):
 
 
   # Basic player wins with boss card if they have one, lowest else.
-  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: list[Card]) -> Card:
+  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: Trick) -> Card:
     legal_plays = list(PlayingStrategy.get_legal_plays(hand, cards_laid))
-    played_cards = [c for c in cards_remaining.values() if c is not None]
+    return self._follow(legal_plays, cards_laid, lambda c: c.is_boss(cards_remaining))
+
+  # _follow and basic_throwaway on the legal plays' mask, a suit at a time.
+  def follow_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int, cards_laid: Trick) -> Card:
+    legal = PlayingStrategy.get_legal_plays_mask(index, hand_mask, cards_laid)
+    m = legal
+    while m:
+      top = index.highest(m)
+      if index.is_boss(top, remaining_mask) and cards_laid.would_win(top):
+        return top
+      m &= ~index.suit_masks[top.suit]
+    # The lowest offsuit card, the first of equal ones, else the lowest trump.
+    throwaway = None
+    m = legal & ~index.suit_masks[Suit.TRUMP]
+    while m:
+      suit_mask = index.suit_masks[index.highest(m).suit]
+      low = index.lowest(m & suit_mask)
+      if throwaway is None or low.number < throwaway.number:
+        throwaway = low
+      m &= ~suit_mask
+    if throwaway is None:
+      throwaway = index.lowest(legal)
+    return throwaway
+
+  def _follow(self, legal_plays: list[Card], cards_laid: Trick, is_boss) -> Card:
     for c in legal_plays:
-      if c.is_boss(cards_remaining) and Card.max(played_cards + [c]) == len(played_cards):
+      if is_boss(c) and cards_laid.would_win(c):
         return c
 
     return BasicPlayer.basic_throwaway(legal_plays)
@@ -371,44 +551,46 @@ class BasicPlayer(PlayingStrategy):
 
 
 class GoodPlayer(PlayingStrategy):
+  __slots__ = ()
+
   #def lead(self, hand: list[Card], cards_remaining: list[Card]) -> Card:
-  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: dict[int, Card]) -> Card:
-    legal_plays = list(PlayingStrategy.get_legal_plays(hand, cards_laid))
-    curr_slot = min([c for c in cards_laid if cards_laid[c] is None])
-    # TODO FILL THIS IN
-    partner_played = curr_slot % 2
-    lead_suit = cards_laid[0].suit
-    curr_winner = Card.max(cards_laid)
+  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: Trick) -> Card:
+    lead_suit = cards_laid.led_suit()
+    curr_winner = cards_laid.winner
     # TODO make this work for lone hands
     partner_leading = len(cards_laid) - 2 == curr_winner
     winning_card = cards_laid[curr_winner]
     suited_cards = [c for c in hand if c.suit == lead_suit]
 
     if suited_cards:
-      higher_cards = [c for c in suited_cards if c.number > winning_card.number]
+      higher_cards = [c for c in suited_cards if Card.beats(c, winning_card, lead_suit)]
 
       # If you can't beat the leading card, fluff
       if not higher_cards:
-        return self.optimal_throwaway(suited_cards)
-      
+        return self.optimal_throwaway(suited_cards, cards_remaining)
+
       if partner_leading:
         # You only don't fluff if you're not last, and there is a remaining card higher than your
         # partners, and you tie or beat that higher card.
         # TODO
-        
-        return self.optimal_throwaway(suited_cards)
+
+        return self.optimal_throwaway(suited_cards, cards_remaining)
+      return min(higher_cards, key=lambda x: x.number)
     else:
       # Playing offsuit
       trump_options = [c for c in hand if c.suit == Suit.TRUMP]
       if not trump_options:
-        return self.optimal_throwaway(hand)
+        return self.optimal_throwaway(hand, cards_remaining)
       if partner_leading:
-        return self.optimal_throwaway(hand)
+        return self.optimal_throwaway(hand, cards_remaining)
       if winning_card.suit != Suit.TRUMP:
         return min(trump_options, key=lambda x: x.number)
 
       # Always trump in above
-      return min([c for c in trump_options if c.number > winning_card.number], key=lambda x: x.number)
+      higher_trump = [c for c in trump_options if c.number > winning_card.number]
+      if not higher_trump:
+        return self.optimal_throwaway(hand, cards_remaining)
+      return min(higher_trump, key=lambda x: x.number)
 
 
   def take_kitty(self, hand: list[Card], kitty_size: int) -> list[Card]:
@@ -416,71 +598,76 @@ class GoodPlayer(PlayingStrategy):
     throwaways = []
 
     # Ignore trump since we will never throw it away.
-    suit_counts_with_boss_ct = {s: [0, 0] for s in Suit.JUST_SUITS}
+    suit_counts_with_boss_ct = {s: [0, 0] for s in Suit.just_suits()}
     for c in hand:
-      suit_count = suit_counts_with_bare_ace[c.suit]
+      if c.suit == Suit.TRUMP:
+        continue
+      suit_count = suit_counts_with_boss_ct[c.suit]
       suit_count[0] += 1
       if c.number == 14:
         suit_count[1] += 1
     # Priority 1 - Shortsuit any non-Ace suits
-    no_ace_suits = {k, v for k, v in suit_counts_with_boss_ct.items() if v[1] == 0 and v[0] >= 1}
-    while True:
+    no_ace_suits = {k: v for k, v in suit_counts_with_boss_ct.items() if v[1] == 0 and v[0] >= 1}
+    while no_ace_suits:
       min_suit = min(no_ace_suits,
                      key=lambda x: no_ace_suits[x][0])
       if no_ace_suits[min_suit][0] <= kitty_size - len(throwaways):
-        for c in hand:
-          if c.suit == min_suit:
-            hand.remove(c)
-            throwaways.append(c)
+        for c in [c for c in hand if c.suit == min_suit]:
+          hand.remove(c)
+          throwaways.append(c)
         del(no_ace_suits[min_suit])
       else:
         break
 
     # Priority 2 - Make 1 ace bare
-    one_ace_suits = {k, v for k, v in suit_counts_with_boss_ct.items() if v[1] == 1 and v[0] >= 1}
-    min_suit = min(one_ace_suits,
-                   key=lambda x: one_ace_suits[x][0])
-    if one_ace_suits[min_suit][0] - 1 <= kitty_size - len(throwaways):
-      for c in hand:
-        if c.suit == min_suit and c.number != 14:
+    one_ace_suits = {k: v for k, v in suit_counts_with_boss_ct.items() if v[1] == 1 and v[0] >= 1}
+    if one_ace_suits:
+      min_suit = min(one_ace_suits,
+                     key=lambda x: one_ace_suits[x][0])
+      if one_ace_suits[min_suit][0] - 1 <= kitty_size - len(throwaways):
+        for c in [c for c in hand if c.suit == min_suit and c.number != 14]:
           hand.remove(c)
           throwaways.append(c)
-    
+
     # Priority 3 - throwaway logic
-    outstanding_cards = FULL_DECK
+    # The hand is trump converted and the deck isn't, but only offsuit bosses
+    # are looked at, and offsuit cards other than the left bauer don't change.
+    outstanding_cards = FULL_DECK.copy()
     for c in hand:
-      outstanding_cards.remove(c)
+      if c.suit != Suit.TRUMP:
+        outstanding_cards.remove(c)
     for i in range(kitty_size - len(throwaways)):
-      c = self.optimal_throwaway(hand, hand, outstanding_cards)
+      c = self.optimal_throwaway(hand, outstanding_cards)
       hand.remove(c)
       throwaways.append(c)
 
     assert len(throwaways) == kitty_size
-    return 
+    return throwaways
 
   def optimal_throwaway(self, legal_plays: list[Card], remaining_cards: list[Card]):
     # TODO - rewrite to not throw away boss cards. But if all cards to throw are boss, throw lowest boss.
     boss_cards = {}
     playable_cards = {}
-    for s in Suit.JUST_SUITS:
-      boss = max([c for c in remaining_cards+legal_plays if c.suit == s], key=lambda x: x.number)
-      boss_cards[s] = boss.number
-      playable_cards = min([x for x in legal_plays if x.suit == s], key=lambda c: c.number)
+    for s in Suit.just_suits():
+      boss_cards[s] = max((c.number for c in remaining_cards+legal_plays if c.suit == s), default=None)
+      suited = [x for x in legal_plays if x.suit == s]
+      if suited:
+        playable_cards[s] = min(suited, key=lambda c: c.number)
     # Ignoring trump, then covering it if it's our only suit.
-    suit_counts_with_boss_ct = {s: [0, 0] for s in Suit.JUST_SUITS}
+    suit_counts_with_boss_ct = {s: [0, 0] for s in playable_cards}
     for c in legal_plays:
+      if c.suit == Suit.TRUMP:
+        continue
       suit_count = suit_counts_with_boss_ct[c.suit]
       suit_count[0] += 1
       if c.number == boss_cards[c.suit]:
         suit_count[1] += 1
-    num_suits = 0
-    for s, v in suit_counts_with_boss_ct.items():
-      if v[0]:
-        num_suits += 1
 
     # If all same suit, play lowest.
-    if num_suits <= 1:
+    if not playable_cards:
       return min(legal_plays, key=lambda c: c.number)
+    if len(playable_cards) == 1:
+      return next(iter(playable_cards.values()))
 
     # If choices of suit,
     # Aim to short suit if suit has no boss
@@ -497,10 +684,8 @@ class GoodPlayer(PlayingStrategy):
 
     if playable_cards:
       # Play the lowest playable
-      suit = min(playable_cards, key=lambda x: x.number)
-      return min(playable_cards[suit])
+      return min(playable_cards.values(), key=lambda x: x.number)
     else:
       # All single protected Aces
       # Don't need to worry too much, pick randomly.
-      return random.choice(list(legal_plays.values()))
-      
+      return random.choice(legal_plays)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable
+
+import hand_batch
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder, PlayingStrategy
+from cards import Suit, Card
+from constants import DECK_SIZE, FULL_DECK, HAND_SIZE
+from game import Game, Hand
+from player import Player
+
+# Throughput of the hot paths, on fixed seeds so runs are comparable. Results are
+# operations per second, best of a few repeats. Baselines are kept per machine in
+# a JSON file, and a run fails if anything is slower than its baseline by more
+# than the threshold.
+#
+#   ./benchmark.py --save           # record this machine's baseline
+#   ./benchmark.py                  # compare against it, exit 1 on a regression
+
+BASELINE_FILE = 'benchmark_baselines.json'
+
+
+def machine_tag() -> str:
+  return f'{platform.node()}-{platform.machine()}-{platform.python_implementation()}{platform.python_version()}'
+
+
+def _random_hands(count: int, size: int) -> list[list[Card]]:
+  return [sorted(random.sample(FULL_DECK, size), reverse=True) for _ in range(count)]
+
+
+def _players() -> list[Player]:
+  return [Player(GoodBidder(), BasicPlayer(), name='A'),
+          Player(BasicBidder(), BasicPlayer(), name='b'),
+          Player(GoodBidder(), BasicPlayer(), name='C'),
+          Player(BasicBidder(), BasicPlayer(), name='d')]
+
+
+# Each benchmark sets up its inputs and returns (number of operations, a function
+# doing them).
+def bench_card_max() -> tuple[int, Callable[[], None]]:
+  tricks = _random_hands(1000, 4)
+  def run():
+    for t in tricks:
+      Card.max(t)
+  return len(tricks), run
+
+
+def bench_is_boss() -> tuple[int, Callable[[], None]]:
+  cases = [(h[0], h[1:]) for h in _random_hands(1000, 20)]
+  def run():
+    for card, remaining in cases:
+      card.is_boss(remaining)
+  return len(cases), run
+
+
+def bench_convert_to_trump() -> tuple[int, Callable[[], None]]:
+  cases = [(h, random.choice(list(Suit))) for h in _random_hands(1000, HAND_SIZE)]
+  def run():
+    for hand, trump in cases:
+      Card.convert_to_trump(hand, trump)
+  return len(cases), run
+
+
+def bench_get_legal_plays() -> tuple[int, Callable[[], None]]:
+  cases = [(h[:HAND_SIZE], h[HAND_SIZE:]) for h in _random_hands(1000, HAND_SIZE + 2)]
+  def run():
+    for hand, cards_laid in cases:
+      PlayingStrategy.get_legal_plays(hand, cards_laid)
+  return len(cases), run
+
+
+def bench_good_bidder_bid() -> tuple[int, Callable[[], None]]:
+  hands = _random_hands(500, HAND_SIZE)
+  bidder = GoodBidder()
+  def run():
+    for hand in hands:
+      bidder.bid(hand, [], 0, 0, 12)
+  return len(hands), run
+
+
+def bench_play_hand() -> tuple[int, Callable[[], None]]:
+  players = _players()
+  deals = [random.sample(range(DECK_SIZE), k=DECK_SIZE) for _ in range(50)]
+  # Reset and played again for every deal, as Game does.
+  hand = Hand(players, 0, [0, 0], 12)
+  def run():
+    random.seed(0)
+    for i, deal in enumerate(deals):
+      hand.reset(i % 4, [0, 0], 12)
+      hand.play_hand(deal)
+  return len(deals), run
+
+
+# The same players as play_hand, on hand_batch.
+def bench_play_hand_batch() -> tuple[int, Callable[[], None]]:
+  players = _players()
+  seeds = [random.random() for _ in range(2000)]
+  dealers = [i % 4 for i in range(len(seeds))]
+  def run():
+    hand_batch.play_hands(players, seeds, dealers)
+  return len(seeds), run
+
+
+def bench_play_game() -> tuple[int, Callable[[], None]]:
+  game = Game(_players())
+  def run():
+    random.seed(0)
+    for _ in range(5):
+      game.play_game(num_hands=12)
+  return 5, run
+
+
+BENCHMARKS = {
+  'card_max': bench_card_max,
+  'is_boss': bench_is_boss,
+  'convert_to_trump': bench_convert_to_trump,
+  'get_legal_plays': bench_get_legal_plays,
+  'good_bidder_bid': bench_good_bidder_bid,
+  'play_hand': bench_play_hand,
+  'play_hand_batch': bench_play_hand_batch,
+  'play_game': bench_play_game,
+}
+
+
+def run_benchmarks(names: list[str], repeats: int = 5) -> dict[str, float]:
+  results = {}
+  for name in names:
+    random.seed(name)
+    ops, run = BENCHMARKS[name]()
+    best = None
+    for _ in range(repeats):
+      start = time.perf_counter()
+      run()
+      elapsed = time.perf_counter() - start
+      if best is None or elapsed < best:
+        best = elapsed
+    results[name] = ops / best
+  return results
+
+
+def load_baselines(path: str) -> dict:
+  if not os.path.exists(path):
+    return {}
+  with open(path) as f:
+    return json.load(f)
+
+
+def save_baselines(path: str, baselines: dict):
+  with open(path + '.tmp', 'w') as f:
+    json.dump(baselines, f, indent=2, sort_keys=True)
+  os.replace(path + '.tmp', path)
+
+
+# Names of the benchmarks that lost more than threshold of their baseline throughput.
+def regressions(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+  return [name for name, ops in results.items() if name in baseline and ops < baseline[name] * (1 - threshold)]
+
+
+def main() -> int:
+  parser = argparse.ArgumentParser(description='Benchmark the hot paths and check them against a baseline.')
+  parser.add_argument('names', nargs='*', default=list(BENCHMARKS), help='benchmarks to run, all by default')
+  parser.add_argument('--baselines', default=BASELINE_FILE)
+  parser.add_argument('--save', action='store_true', help="record the results as this machine's baseline")
+  parser.add_argument('--threshold', type=float, default=0.15,
+                      help='fail if throughput drops by more than this fraction of the baseline')
+  parser.add_argument('--repeats', type=int, default=5)
+  args = parser.parse_args()
+  logging.basicConfig(level=logging.ERROR)
+
+  tag = machine_tag()
+  baselines = load_baselines(args.baselines)
+  baseline = baselines.get(tag, {})
+  results = run_benchmarks(args.names, args.repeats)
+  for name, ops in results.items():
+    line = f'{name:<18} {ops:12.1f} ops/s'
+    if name in baseline:
+      line += f'  {100 * (ops / baseline[name] - 1):+6.1f}% vs baseline'
+    print(line)
+
+  if args.save:
+    baselines[tag] = {**baseline, **results}
+    save_baselines(args.baselines, baselines)
+    print(f'Saved baseline for {tag}')
+    return 0
+  if not baseline:
+    print(f'No baseline for {tag}, run with --save to record one')
+    return 0
+  slower = regressions(results, baseline, args.threshold)
+  if slower:
+    print(f'Regressed past {100 * args.threshold:.0f}%: {", ".join(slower)}')
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,263 @@
+import collections
+from typing import Optional
+
+import numpy as np
+
+from basic_strategies import Bid, BiddingStrategy, BasicBidder, GoodBidder
+from cards import Suit, Card
+from constants import DECK_SIZE, FULL_DECK, HAND_SIZE, PLAYER_COUNT
+from instrumentation import uninstrumented_type
+
+# Bidding-only simulation. Deals are NumPy arrays of FULL_DECK indices, laid out
+# like Hand.play_hand deals them: seat i gets deal[i*HAND_SIZE:(i+1)*HAND_SIZE]
+# and the kitty is the rest.
+#
+# Hands are turned into card counts of shape (..., 4 suits, 6 ranks), suits in
+# Suit.just_suits() order and ranks from 14 down to 9, and the features that
+# BasicBidder and GoodBidder compute card by card are computed on the whole batch.
+
+SUITS = Suit.just_suits()
+# Index of Suit.left() for each suit index.
+LEFT = [SUITS.index(s.left()) for s in SUITS]
+RANKS = list(range(14, 8, -1))
+JACK = RANKS.index(11)
+NUM_KINDS = len(SUITS) * len(RANKS)
+# Card kind (suit index * 6 + rank index) of each FULL_DECK card.
+DECK_KINDS = np.array([SUITS.index(c.suit) * len(RANKS) + RANKS.index(c.number) for c in FULL_DECK])
+
+
+def deal_batch(rng: np.random.Generator, num_deals: int) -> np.ndarray:
+  return rng.permuted(np.tile(np.arange(DECK_SIZE), (num_deals, 1)), axis=1)
+
+
+def deal_to_hands(deal: np.ndarray) -> list[list[Card]]:
+  return [sorted([FULL_DECK[i] for i in deal[p*HAND_SIZE:(p+1)*HAND_SIZE]], reverse=True)
+          for p in range(PLAYER_COUNT)]
+
+
+# (num_deals, PLAYER_COUNT, 4, 6) card counts, each 0-2.
+def hand_counts(deals: np.ndarray) -> np.ndarray:
+  num_deals = deals.shape[0]
+  kinds = DECK_KINDS[deals[:, :PLAYER_COUNT * HAND_SIZE]].reshape(num_deals, PLAYER_COUNT, HAND_SIZE)
+  offsets = np.arange(num_deals * PLAYER_COUNT).reshape(num_deals, PLAYER_COUNT, 1) * NUM_KINDS
+  counts = np.bincount((kinds + offsets).ravel(), minlength=num_deals * PLAYER_COUNT * NUM_KINDS)
+  return counts.reshape(num_deals, PLAYER_COUNT, len(SUITS), len(RANKS))
+
+
+# The BasicBidder suit map, plus the position each suit was first added to it
+# when walking the sorted hand, which is how max() breaks ties on the dict.
+def basic_bid_features(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+  aces = counts[..., 0].sum(axis=-1, keepdims=True)
+  non_aces = counts[..., 1:].sum(axis=-1)
+  suit_tricks = aces + non_aces + counts[..., LEFT, JACK]
+
+  # Position of each card kind in a hand sorted high to low. Higher suits come first.
+  desc = counts[..., ::-1, :].reshape(*counts.shape[:-2], NUM_KINDS)
+  first_pos = (np.cumsum(desc, axis=-1) - desc).reshape(counts.shape)[..., ::-1, :]
+  present = counts > 0
+  never = 5 * DECK_SIZE
+  # An ace touches every suit in suit order, a card its own suit, and a jack then its left.
+  ace_touch = np.where(present[..., 0], first_pos[..., 0] * 5, never).min(axis=-1, keepdims=True)
+  ace_touch = ace_touch + np.arange(len(SUITS))
+  own_touch = np.where(present[..., 1:], first_pos[..., 1:] * 5, never).min(axis=-1)
+  left_touch = np.where(present[..., LEFT, JACK], first_pos[..., LEFT, JACK] * 5 + 1, never)
+  first_touch = np.minimum(np.minimum(ace_touch, own_touch), left_touch)
+  return suit_tricks, first_touch
+
+
+def basic_bids(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+  suit_tricks, first_touch = basic_bid_features(counts)
+  order = np.argsort(first_touch, axis=-1, kind='stable')
+  ordered_tricks = np.take_along_axis(suit_tricks, order, axis=-1)
+  best = np.take_along_axis(order, ordered_tricks.argmax(axis=-1)[..., None], axis=-1)[..., 0]
+  return np.take_along_axis(suit_tricks, best[..., None], axis=-1)[..., 0], best
+
+
+# GoodBidder.evaluate_hand on a batch, for GoodBidder.trump_weights. Sums are
+# done in the same order as the scalar code so the floats come out identical.
+def trump_scores(counts: np.ndarray, trump_weights: tuple[float, float, float, float]) -> np.ndarray:
+  left_weight, right_weight, high_weight, low_weight = trump_weights
+  # Weight per rank, 14 down to 9.
+  rank_weights = [high_weight, high_weight, low_weight, right_weight, low_weight, low_weight]
+  scores = counts[..., LEFT, JACK] * left_weight
+  for r, weight in enumerate(rank_weights):
+    for copy in range(2):
+      scores = np.where(counts[..., r] > copy, scores + weight, scores)
+  return scores
+
+
+def bauer_scores(counts: np.ndarray) -> np.ndarray:
+  return counts[..., LEFT, JACK] + 3 * counts[..., JACK]
+
+
+# Fixed tricks per suit if fixed_threshold is the given value. Cards count while
+# they go A A K K Q Q..., and once fixed_threshold of them do the whole suit does.
+def fixed_tricks(counts: np.ndarray, fixed_threshold: int) -> np.ndarray:
+  full_ranks = np.cumprod(counts == 2, axis=-1).sum(axis=-1)
+  padded = np.concatenate([counts, np.zeros_like(counts[..., :1])], axis=-1)
+  run = 2 * full_ranks + np.take_along_axis(padded, full_ranks[..., None], axis=-1)[..., 0]
+  return np.where(run >= fixed_threshold, counts.sum(axis=-1), run)
+
+
+class BidSweepResult:
+  def __init__(self):
+    self.num_deals = 0
+    # (seat, amount, suit) of the winning bid.
+    self.winning_bids = collections.Counter()
+    # Every bid made, per seat. None is a pass.
+    self.seat_bids = [collections.Counter() for _ in range(PLAYER_COUNT)]
+    self.lone_hands = [0] * PLAYER_COUNT
+
+  def add(self, bids: list[Bid], winner: int):
+    self.num_deals += 1
+    for i, b in enumerate(bids):
+      self.seat_bids[i][b] += 1
+    amount, trump = bids[winner]
+    self.winning_bids[(winner, amount, trump)] += 1
+    if amount > HAND_SIZE:
+      self.lone_hands[winner] += 1
+
+  def merge(self, other: 'BidSweepResult'):
+    self.num_deals += other.num_deals
+    self.winning_bids.update(other.winning_bids)
+    for i in range(PLAYER_COUNT):
+      self.seat_bids[i].update(other.seat_bids[i])
+      self.lone_hands[i] += other.lone_hands[i]
+
+  def lone_hand_rate(self) -> float:
+    return sum(self.lone_hands) / self.num_deals if self.num_deals else 0
+
+  def trump_distribution(self) -> dict[Suit, int]:
+    dist = collections.Counter()
+    for (seat, amount, trump), count in self.winning_bids.items():
+      dist[trump] += count
+    return dict(dist)
+
+
+# Batch of features for one set of deals. Seats bid in order, so the per seat
+# decisions run through the same GoodBidder.bid_from_evaluation as Hand does.
+# Trump scores and fixed tricks depend on the bidder's params, so they are
+# worked out the first time a bidder asks for them.
+class BatchFeatures:
+  def __init__(self, deals: np.ndarray):
+    self.counts = hand_counts(deals)
+    basic_amount, basic_suit = basic_bids(self.counts)
+    self.basic_amount = basic_amount.tolist()
+    self.basic_suit = basic_suit.tolist()
+    self.bauer_score = bauer_scores(self.counts).tolist()
+    self.trump_score_by_weights = {}
+    self.fixed_by_threshold = {}
+
+  def trump_score(self, trump_weights: tuple[float, float, float, float]) -> list:
+    if trump_weights not in self.trump_score_by_weights:
+      self.trump_score_by_weights[trump_weights] = trump_scores(self.counts, trump_weights).tolist()
+    return self.trump_score_by_weights[trump_weights]
+
+  def fixed(self, fixed_threshold: int) -> list:
+    if fixed_threshold not in self.fixed_by_threshold:
+      self.fixed_by_threshold[fixed_threshold] = fixed_tricks(self.counts, fixed_threshold).tolist()
+    return self.fixed_by_threshold[fixed_threshold]
+
+  def basic_bid(self, deal: int, seat: int, curr_max: int) -> Bid:
+    best_bid = self.basic_amount[deal][seat]
+    if best_bid > curr_max:
+      best_suit = SUITS[self.basic_suit[deal][seat]]
+      # Just a random guess of going alone
+      if best_bid >= 9:
+        return HAND_SIZE + 1, best_suit
+      return best_bid, best_suit
+    return None
+
+  def good_evaluation(self,
+                      deal: int,
+                      seat: int,
+                      fixed_thresholds: dict[Suit, int],
+                      trump_weights: tuple[float, float, float, float]):
+    per_suit_trump_score = dict(zip(SUITS, self.trump_score(trump_weights)[deal][seat]))
+    per_suit_bauer_score = dict(zip(SUITS, self.bauer_score[deal][seat]))
+    num_nt = [self.fixed(fixed_thresholds[s])[deal][seat][i] for i, s in enumerate(SUITS)]
+    no_trump_bid = sum(num_nt)
+    offsuit_fixed_tricks = collections.defaultdict(int)
+    for z, s in enumerate(SUITS):
+      offsuit_fixed_tricks[s] = no_trump_bid - num_nt[z]
+    return per_suit_trump_score, per_suit_bauer_score, offsuit_fixed_tricks, no_trump_bid
+
+
+# Bids on deal d of the features' batch, in seat order, and the seat that won
+# the bidding or None if everyone passed.
+def deal_bids(features: BatchFeatures,
+              d: int,
+              bidders: list[BiddingStrategy],
+              score_delta: int = 0,
+              hands_left: int = 12) -> tuple[list[Bid], Optional[int]]:
+  prev_bids = []
+  curr_max = 0
+  winner = None
+  for i, bidder in enumerate(bidders):
+    seat_delta = score_delta if i % 2 == 0 else -score_delta
+    bidder_type = uninstrumented_type(bidder)
+    if bidder_type is BasicBidder:
+      bid = features.basic_bid(d, i, curr_max)
+    elif bidder_type is GoodBidder:
+      partner_bid, opp_bids, trust_indication = bidder.read_prev_bids(prev_bids)
+      evaluation = features.good_evaluation(d, i, bidder.get_fixed_thresholds(opp_bids), bidder.trump_weights)
+      bid = bidder.bid_from_evaluation(evaluation, prev_bids, curr_max, seat_delta, hands_left,
+                                       partner_bid, opp_bids, trust_indication)
+    else:
+      raise ValueError(f'No batched bidding for {bidder_type.__name__}')
+    if bid is not None:
+      assert bid[0] > curr_max
+      curr_max = bid[0]
+      winner = i
+    prev_bids.append(bid)
+    if curr_max > HAND_SIZE:
+      break
+  return prev_bids, winner
+
+
+def sweep_batch(deals: np.ndarray,
+                bidders: list[BiddingStrategy],
+                score_delta: int = 0,
+                hands_left: int = 12,
+                result: Optional[BidSweepResult] = None) -> BidSweepResult:
+  if result is None:
+    result = BidSweepResult()
+  features = BatchFeatures(deals)
+  for d in range(deals.shape[0]):
+    prev_bids, winner = deal_bids(features, d, bidders, score_delta, hands_left)
+    if winner is not None:
+      result.add(prev_bids, winner)
+  return result
+
+
+def run_bid_sweep(bidders: list[BiddingStrategy],
+                  num_deals: int,
+                  seed: int = 0,
+                  batch_size: int = 100000,
+                  score_delta: int = 0,
+                  hands_left: int = 12) -> BidSweepResult:
+  assert len(bidders) == PLAYER_COUNT
+  rng = np.random.default_rng(seed)
+  result = BidSweepResult()
+  for start in range(0, num_deals, batch_size):
+    deals = deal_batch(rng, min(batch_size, num_deals - start))
+    sweep_batch(deals, bidders, score_delta, hands_left, result)
+  return result
+
+
+# Bids the scalar bidders make on one deal, for checking against the batch.
+def scalar_bids(deal: np.ndarray,
+                bidders: list[BiddingStrategy],
+                score_delta: int = 0,
+                hands_left: int = 12) -> list[Bid]:
+  prev_bids = []
+  curr_max = 0
+  for i, (bidder, hand) in enumerate(zip(bidders, deal_to_hands(deal))):
+    seat_delta = score_delta if i % 2 == 0 else -score_delta
+    bid = bidder.bid(hand, prev_bids, curr_max, seat_delta, hands_left)
+    if bid is not None:
+      curr_max = bid[0]
+    prev_bids.append(bid)
+    if curr_max > HAND_SIZE:
+      break
+  return prev_bids
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from cards import Suit, Card
+from constants import FULL_DECK
+
+
+# Compact card sets for one trump suit. Each of the 48 physical cards gets an id,
+# and a set of cards is an int with bit `id` set for each card in it.
+#
+# Ids follow the trump-converted deck sorted high to low, so duplicate cards get
+# adjacent ids, every suit is a contiguous run of bits, and the lowest set bit of
+# a suit mask is the highest card of that suit.
+class CardIndex:
+  _by_trump: dict[Suit, CardIndex] = {}
+
+  def __init__(self, trump: Suit):
+    self.trump = trump
+    # FULL_DECK is sorted high to low, and converting keeps it that way.
+    self.cards = list(Card.convert_to_trump(FULL_DECK, trump))
+    self.full_mask = (1 << len(self.cards)) - 1
+    # Both copies of each card.
+    self.card_masks: dict[Card, int] = {}
+    self.suit_masks: dict[Suit, int] = {s: 0 for s in Suit}
+    for i, c in enumerate(self.cards):
+      self.card_masks[c] = self.card_masks.get(c, 0) | (1 << i)
+      self.suit_masks[c.suit] |= 1 << i
+
+  @staticmethod
+  def for_trump(trump: Suit) -> CardIndex:
+    index = CardIndex._by_trump.get(trump)
+    if index is None:
+      index = CardIndex(trump)
+      CardIndex._by_trump[trump] = index
+    return index
+
+  # Ids in taken are skipped, so masks built one after the other for different
+  # holders of the cards never share an id.
+  def to_mask(self, cards: list[Card], taken: int = 0) -> int:
+    mask = 0
+    for c in cards:
+      free = self.card_masks[c] & ~(mask | taken)
+      mask |= free & -free
+    return mask
+
+  # Cards come out sorted high to low, same as Player.hand.
+  def to_cards(self, mask: int) -> list[Card]:
+    cards = []
+    while mask:
+      low = mask & -mask
+      cards.append(self.cards[low.bit_length() - 1])
+      mask ^= low
+    return cards
+
+  # Id of the first copy of card.
+  def card_id(self, card: Card) -> int:
+    copies = self.card_masks[card]
+    return (copies & -copies).bit_length() - 1
+
+  def card_bit(self, mask: int, card: Card) -> int:
+    copies = mask & self.card_masks[card]
+    return copies & -copies
+
+  def contains(self, mask: int, card: Card) -> bool:
+    return bool(mask & self.card_masks[card])
+
+  # Removes one copy of card. No-op if it isn't in the mask.
+  def remove(self, mask: int, card: Card) -> int:
+    return mask ^ self.card_bit(mask, card)
+
+  def add(self, mask: int, card: Card) -> int:
+    free = self.card_masks[card] & ~mask
+    return mask | (free & -free)
+
+  def of_suit(self, mask: int, suit: Suit) -> int:
+    return mask & self.suit_masks[suit]
+
+  # Highest card in the mask, or None if empty.
+  def highest(self, mask: int) -> Card:
+    if not mask:
+      return None
+    return self.cards[(mask & -mask).bit_length() - 1]
+
+  def lowest(self, mask: int) -> Card:
+    if not mask:
+      return None
+    return self.cards[mask.bit_length() - 1]
+
+  # The nth card of the mask high to low, to_cards(mask)[n] without the list.
+  def nth(self, mask: int, n: int) -> Card:
+    for _ in range(n):
+      mask &= mask - 1
+    return self.cards[(mask & -mask).bit_length() - 1]
+
+  def legal_plays(self, hand_mask: int, led_suit: Suit) -> int:
+    follow_suit = hand_mask & self.suit_masks[led_suit]
+    if follow_suit:
+      return follow_suit
+    return hand_mask
+
+  # Highest card of the suit left in the mask. Suits are contiguous runs of ids,
+  # so this is the lowest set bit, and stays current as ids are cleared.
+  def top_of_suit(self, mask: int, suit: Suit) -> Card:
+    return self.highest(mask & self.suit_masks[suit])
+
+  def trump_outstanding(self, mask: int) -> bool:
+    return bool(mask & self.suit_masks[Suit.TRUMP])
+
+  # Card.is_boss against a mask of the cards remaining: 0 if a higher card of its
+  # suit remains, 10 if nothing remaining can beat it, 1 if only trump can.
+  def is_boss(self, card: Card, remaining_mask: int) -> int:
+    top = self.top_of_suit(remaining_mask, card.suit)
+    if top is not None and top.number > card.number:
+      return 0
+    if card.suit != Suit.TRUMP and self.trump_outstanding(remaining_mask):
+      return 1
+    return 10
@@ -1,4 +1,12 @@
-from cards import Suit, Card
+from __future__ import annotations
+from typing import Optional, TYPE_CHECKING
+
+from bitboard import CardIndex
+from cards import Suit, Card, Trick
+from constants import HAND_SIZE, PLAYER_COUNT
+from deal_sampler import DealSampler, knowledge_masks
+if TYPE_CHECKING:
+  from basic_strategies import Bid
 
 class CardPredictor:
   # self.others has:
@@ -9,35 +17,37 @@ class CardPredictor:
   #  "known_cards" - 100% deduced
   #  "higher_odds_cards" - usually based on bidding, these are more likely
   #                        to show up in this player's hand than others
-  #  "lowest_card_per_suit" - deduced from throwaways
-  def __init__(self, 
+  #  "lowest_card_per_suit" - lowest number they can still hold in each suit,
+  #                           None once they've shown out of it, raised by
+  #                           their throwaways and the cards still out
+  def __init__(self,
                bids: list[Bid],
                my_index: int,
                known_missing_cards: Optional[list[Card]] = None):
-):
     self.known_missing_cards = known_missing_cards
-    lowest_bid = min(bids, key=lambda x: x[0] if x else 1234)
-    winning_suit = min(bids, key=lambda x: x[0] if x else 0)[1]
+    self.my_index = my_index
+    live = [i for i, b in enumerate(bids) if b]
+    winner = max(live, key=lambda i: bids[i][0])
+    lowest_bid = min(bids[i][0] for i in live)
+    trump = bids[winner][1]
+    # The partner sitting out a lone hand, who never plays a card.
+    self.out_of_game = (winner + 2) % PLAYER_COUNT if bids[winner][0] > HAND_SIZE else None
     self.others = [None, None, None]
-    for i, b in enumerate(bids):
-      if i == my_index:
-        continue
-      if i < my_idx:
-        others_idx = i - my_idx
-      else:
-        others_idx = i - 1 - my_idx
-
-      self.others[others_idx] = self._construct_card_knowledge(b, lowest_bid==bid, trump)
+    for others_idx in range(PLAYER_COUNT - 1):
+      i = (my_index + others_idx + 1) % PLAYER_COUNT
+      # Bidding stops at a lone hand, so later seats may not have bid.
+      bid = bids[i] if i < len(bids) else None
+      self.others[others_idx] = self._construct_card_knowledge(bid, bool(bid) and bid[0] == lowest_bid, trump)
 
   def _construct_card_knowledge(self, bid: Bid, is_lowest_bidder: bool, trump: Suit):
     card_knowledge = {'known_cards': [],
         'higher_odds_cards': [],
         'lowest_card_per_suit': {s: 9 for s in Suit if s != trump}}
     if bid:
-      if bid[0] <= 3 and is_lowest_bidder:
-        card_knowledge['known_cards'] = # TODO fill in bauers
+      if bid[0] <= 3 and is_lowest_bidder and bid[1] != Suit.TRUMP:
+        card_knowledge['known_cards'] = CardPredictor._indicated_bauers(bid, trump)
       else:
-        card_knowledge['higher_odds_cards'] = # TODO fill in this
+        card_knowledge['higher_odds_cards'] = CardPredictor._bauers(bid[1], trump)
     else:
       # TODO - could incoporate zero bid passers as having no aces or bauers, but only
       # when we know they are trying (ie. not when the game is close to out of reach).
@@ -45,47 +55,118 @@ class CardPredictor:
 
     return card_knowledge
 
-  def get_odds_of_card(self, card: Card):
-    # TODO
+  # Indicating bids (see GoodBidder.indicate): 1 is a right bauer of the suit, 2
+  # both right bauers, 3 a right and a left. Converted to the trump being played.
+  @staticmethod
+  def _indicated_bauers(bid: Bid, trump: Suit) -> list[Card]:
+    right = Card(bid[1], 11)
+    left = Card(bid[1].left(), 11)
+    cards = {1: [right], 2: [right, right], 3: [right, left]}[bid[0]]
+    return Card.convert_to_trump(cards, trump)
+
+  @staticmethod
+  def _bauers(suit: Suit, trump: Suit) -> list[Card]:
+    if suit == Suit.TRUMP:
+      return []
+    return Card.convert_to_trump([Card(suit, 11), Card(suit.left(), 11)], trump)
+
+  # Uniform deals of unseen_mask that agree with what is known about each of
+  # self.others, hand_sizes[i] cards to self.others[i] and the rest out of play.
+  # Samples come out in the same order, with the out of play cards last, and a
+  # partner sitting out a lone hand should get a hand size of 0. cards_laid is a
+  # trick still in progress, with my_index as for update, so what it shows is
+  # taken into account without being kept.
+  def deal_sampler(self,
+                   index: CardIndex,
+                   unseen_mask: int,
+                   hand_sizes: list[int],
+                   cards_laid: Optional[list[Card]] = None,
+                   my_index: int = 0) -> DealSampler:
+    others = self.others
+    if cards_laid:
+      others = [{'known_cards': list(o['known_cards']),
+                 'higher_odds_cards': o['higher_odds_cards'],
+                 'lowest_card_per_suit': dict(o['lowest_card_per_suit'])} for o in others]
+      self._apply_trick(others, cards_laid, my_index)
+    allowed = []
+    known = []
+    taken = 0
+    out_of_play_known = 0
+    for others_idx, o in enumerate(others):
+      o_allowed, o_known = knowledge_masks(index, o, unseen_mask & ~taken)
+      taken |= o_known
+      if (self.my_index + others_idx + 1) % PLAYER_COUNT == self.out_of_game:
+        # A partner sitting out keeps what it holds out of play.
+        out_of_play_known |= o_known
+        o_known = 0
+      allowed.append(o_allowed | o_known)
+      known.append(o_known)
+    out_of_play = unseen_mask.bit_count() - sum(hand_sizes)
+    return DealSampler(unseen_mask, hand_sizes + [out_of_play], allowed + [unseen_mask], known + [out_of_play_known])
+
+  # Share of the deals left that give card to each of self.others, counting
+  # known cards as certain and splitting the rest evenly between the others who
+  # could hold it.
+  def get_odds_of_card(self, card: Card) -> list[float]:
+    for i, o in enumerate(self.others):
+      if card in o['known_cards']:
+        return [1.0 if j == i else 0.0 for j in range(len(self.others))]
+    could = [CardPredictor._could_hold(o, card) for o in self.others]
+    n = sum(could)
+    return [1 / n if c else 0.0 for c in could] if n else [0.0] * len(self.others)
 
-  def update(self, cards_laid: list[Card], cards_remaining: list[Card], my_index: int):
+  @staticmethod
+  def _could_hold(other: dict, card: Card) -> bool:
+    lowest = other['lowest_card_per_suit'].get(card.suit, 9)
+    return lowest is not None and card.number >= lowest
+
+  # my_index is how many seats after the leader this player sits, counting a
+  # seat sitting out a lone hand, and cards_laid the trick in play order.
+  # cards_remaining is every card this player hasn't seen played or held.
+  def update(self, cards_laid: Trick, cards_remaining: list[Card], my_index: int):
+    self._apply_trick(self.others, cards_laid, my_index)
+
+    # Nobody holds lower than the lowest card still out in a suit.
+    for s in self.others[0]['lowest_card_per_suit']:
+      min_card_remaining = min((c.number for c in cards_remaining if c.suit == s), default=None)
+      for o in self.others:
+        lowest = o['lowest_card_per_suit'][s]
+        if min_card_remaining is None or (lowest is not None and lowest < min_card_remaining):
+          o['lowest_card_per_suit'][s] = min_card_remaining
+
+    # A card only one of the others could hold is theirs. Only the declarer knows
+    # which cards were discarded, so for everyone else any card could be out of play.
+    if self.known_missing_cards is None:
+      return
+    cards_to_be_assigned = list(cards_remaining)
+    for c in self.known_missing_cards:
+      if c in cards_to_be_assigned:
+        cards_to_be_assigned.remove(c)
+    for o in self.others:
+      for c in o['known_cards']:
+        if c in cards_to_be_assigned:
+          cards_to_be_assigned.remove(c)
+    for c in cards_to_be_assigned:
+      could = [o for o in self.others if CardPredictor._could_hold(o, c)]
+      if len(could) == 1:
+        could[0]['known_cards'].append(c)
+
+  # Applies what cards_laid shows to others, which is self.others or a copy of it.
+  def _apply_trick(self, others: list[dict], cards_laid: list[Card], my_index: int):
     suit_led = cards_laid[0].suit
-    for i, c in enumerate(cards_laid):
-      if i == my_index:
+    seats = [s for s in range(PLAYER_COUNT) if s != self.out_of_game]
+    start = seats.index((self.my_index - my_index) % PLAYER_COUNT)
+    for i, (seat, c) in enumerate(zip(seats[start:] + seats[:start], cards_laid)):
+      if seat == self.my_index:
         continue
-      if i < my_idx:
-        others_idx = i - my_idx
-      else:
-        others_idx = i - 1 - my_idx
-      other = self.others[others_idx]
+      other = others[(seat - self.my_index) % PLAYER_COUNT - 1]
       if c in other['known_cards']:
         other['known_cards'].remove(c)
       if c.suit != suit_led:
         other['lowest_card_per_suit'][suit_led] = None
-      is_throwaway = Card.max(cards_laid[:i]) != i
-      if is_throwaway:
+      # A card that doesn't take the lead is thrown away, and players throw the
+      # lowest they have in the suit.
+      is_throwaway = Card.max(cards_laid[:i + 1]) != i
+      lowest = other['lowest_card_per_suit'].get(c.suit)
+      if is_throwaway and lowest is not None and lowest < c.number:
         other['lowest_card_per_suit'][c.suit] = c.number
-
-    for s in Suit:
-      min_card_remaining = min([x.number for x in cards_remaining if x.suit == s], default=None)
-      for o in self.others:
-        if not min_card_remaining or
-           (o['lowest_card_per_suit'][s] and o['lowest_card_per_suit'][s] < min_card_remaining):
-          o['lowest_card_per_suit'][s] = min_card_remaining
-
-    cards_to_be_assigned = cards_remaining
-    for o in others:
-      for c in o['known_cards']:
-        cards_to_be_assigned.remove(c)
-    for c in cards_to_be_assigned:
-      other_who_could = None
-      two_others_could = False
-      for o in self.others:
-        if o['lowest_card_per_suit'][c.suit] and c.number >= o['lowest_card_per_suit'][c.suit]:
-          if other_who_could:
-            two_others_could = True
-            break
-          other_who_could = o
-      if not two_others_could:
-        other_who_could['known_cards'].append(c)
-    
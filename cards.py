@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
+from typing import Optional
 import logging
 
 
@@ -51,25 +52,34 @@ class Card:
 
   # Returns 0 if not boss. 1 if boss in offsuit but trump exists. 10 if unbeatable.
   def is_boss(self, cards_remaining: list[Card]) -> int:
-    if Card.max([self] + cards_remaining) == 0:
-      return 10
+    boss_value = 10
     for c in cards_remaining:
-      if c.suit == self.suit and c.number > self.number:
-        return 0
-    return 1
+      if c.suit == self.suit:
+        if c.number > self.number:
+          return 0
+      elif c.suit == Suit.TRUMP:
+        boss_value = 1
+    return boss_value
 
   # Returns the index in the list given, assuming that the first is the suit led.
   @staticmethod
   def max(cards: list[Card]) -> int:
+    ranks = _TRICK_RANKS[cards[0].suit]
     curr_max = 0
+    max_rank = ranks[cards[0]]
     for i in range(1, len(cards)):
-      if cards[curr_max].suit != cards[i].suit:
-        if cards[i].suit == Suit.TRUMP:
-          curr_max = i
-      elif cards[curr_max].number < cards[i].number:
+      rank = ranks[cards[i]]
+      if rank > max_rank:
         curr_max = i
+        max_rank = rank
     return curr_max
 
+  # True if card would take a trick away from other, with led_suit led.
+  @staticmethod
+  def beats(card: Card, other: Card, led_suit: Suit) -> bool:
+    ranks = _TRICK_RANKS[led_suit]
+    return ranks[card] > ranks[other]
+
   @staticmethod
   def stringify(cards: list[Card]) -> str:
      return ' '.join(str(x) for x in cards)
@@ -78,19 +88,43 @@ class Card:
   def convert_to_trump(cards: list[Card], trump: Suit) -> list[Card]:
     if trump == Suit.TRUMP:
       return cards
-    retval = []
+    converted = list(cards)
+    Card.convert_in_place(converted, trump)
+    return converted
+
+  # convert_to_trump into the list given, instead of a new one. Each card is
+  # put in a mask by its place in the converted deck, and the mask read back
+  # out in order, so the cards come out sorted without being compared.
+  @staticmethod
+  def convert_in_place(cards: list[Card], trump: Suit):
+    if trump == Suit.TRUMP:
+      return
+    bits = _TRUMP_BITS[trump]
+    mask = 0
     for c in cards:
-      suit = c.suit
-      number = c.number
-      if c.suit == trump:
-        suit = Suit.TRUMP
-        if c.number == 11:
-          number = 16
-      elif c.number == 11 and c.suit == trump.left(): 
-        suit = Suit.TRUMP
-        number = 15
-      retval.append(Card(suit, number))
-    return sorted(retval, reverse=True)
+      bit = bits[c]
+      # The second copy of a card goes in the next bit up.
+      mask |= bit << 1 if mask & bit else bit
+    deck = _TRUMP_DECKS[trump]
+    i = 0
+    while mask:
+      low = mask & -mask
+      cards[i] = deck[low.bit_length() - 1]
+      mask ^= low
+      i += 1
+
+  @staticmethod
+  def _convert_card(card: Card, trump: Suit) -> Card:
+    suit = card.suit
+    number = card.number
+    if card.suit == trump:
+      suit = Suit.TRUMP
+      if card.number == 11:
+        number = 16
+    elif card.number == 11 and card.suit == trump.left():
+      suit = Suit.TRUMP
+      number = 15
+    return Card(suit, number)
 
 
   def __str__(self):
@@ -121,3 +155,101 @@ class Card:
       return False
     return True
 
+
+# Tracks the winner of a trick as cards are laid, so asking whether a card would
+# win is a single lookup instead of rebuilding and rescanning the trick. Reads
+# like the list of cards laid, in play order, so it can be handed to strategies
+# as cards_laid.
+class Trick:
+  __slots__ = ('cards', 'winner', '_ranks', '_max_rank')
+
+  def __init__(self, cards: Optional[list[Card]] = None):
+    self.cards = []
+    self.reset()
+    for c in cards or []:
+      self.lay(c)
+
+  # Empties the trick for the next one.
+  def reset(self):
+    self.cards.clear()
+    # Index into cards of the card currently winning.
+    self.winner = None
+    self._ranks = None
+    self._max_rank = -1
+
+  def __len__(self) -> int:
+    return len(self.cards)
+
+  def __getitem__(self, i):
+    return self.cards[i]
+
+  def __iter__(self):
+    return iter(self.cards)
+
+  def __bool__(self) -> bool:
+    return bool(self.cards)
+
+  # Returns whether the card laid is now winning.
+  def lay(self, card: Card) -> bool:
+    if not self.cards:
+      self._ranks = _TRICK_RANKS[card.suit]
+    self.cards.append(card)
+    rank = self._ranks[card]
+    if rank > self._max_rank:
+      self._max_rank = rank
+      self.winner = len(self.cards) - 1
+      return True
+    return False
+
+  def would_win(self, card: Card) -> bool:
+    if not self.cards:
+      return True
+    return self._ranks[card] > self._max_rank
+
+  def winning_card(self) -> Optional[Card]:
+    if self.winner is None:
+      return None
+    return self.cards[self.winner]
+
+  def led_suit(self) -> Optional[Suit]:
+    if not self.cards:
+      return None
+    return self.cards[0].suit
+
+
+# Card.convert_to_trump lookup tables. For each trump, the converted deck high to
+# low with both copies of each card next to each other - the same order as
+# bitboard.CardIndex ids - and the bit of the first copy of every card in it,
+# found from the card before or after conversion.
+_TRUMP_DECKS: dict[Suit, list[Card]] = {}
+_TRUMP_BITS: dict[Suit, dict[Card, int]] = {}
+def _build_trump_tables():
+  all_cards = [Card(s, i) for s in Suit.just_suits() for i in range(9, 15)]
+  for trump in Suit.just_suits():
+    conversion = {c: Card._convert_card(c, trump) for c in all_cards}
+    deck = sorted(list(conversion.values()) * 2, reverse=True)
+    _TRUMP_DECKS[trump] = deck
+    bits = {}
+    for c, converted in conversion.items():
+      bits[c] = bits[converted] = 1 << deck.index(converted)
+    _TRUMP_BITS[trump] = bits
+_build_trump_tables()
+
+# Card.max lookup table. For each led suit, ranks every post-conversion card by
+# how strongly it takes a trick: trump over the led suit over everything else,
+# which can never win. One card beats another iff its rank is strictly higher.
+_TRICK_RANKS: dict[Suit, dict[Card, int]] = {}
+def _build_trick_ranks():
+  all_cards = [Card(s, i) for s in Suit.just_suits() for i in range(9, 15)]
+  all_cards += [Card(Suit.TRUMP, i) for i in range(9, 17)]
+  for led in Suit:
+    ranks = {}
+    for c in all_cards:
+      if c.suit == Suit.TRUMP:
+        ranks[c] = 200 + c.number
+      elif c.suit == led:
+        ranks[c] = 100 + c.number
+      else:
+        ranks[c] = 0
+    _TRICK_RANKS[led] = ranks
+_build_trick_ranks()
@@ -0,0 +1,151 @@
+import json
+import logging
+import multiprocessing
+import os
+import random
+from typing import Optional
+
+from game import Game
+from simulation import GameTotals, seeded_game_scores
+
+# Seeded runs that can be stopped at any point and resumed.
+#
+# Each game's score is appended to a results file as soon as it's known, one
+# 'index score0 score1' line per game in index order. Every checkpoint_every
+# games the totals so far are written to results_path + '.checkpoint' along
+# with the size of the results file they cover, and once before the first game
+# so a generated master seed is never lost. Games are seeded from the master
+# seed and their own index (simulation.game_seed), so the next game index is
+# the whole RNG position.
+#
+# Resuming loads the checkpoint and adds in whatever complete lines were written
+# after it, so no finished game is played again, and drops a line cut off half
+# way. Totals are sums, so the resumed run ends with the same totals as one that
+# was never stopped.
+
+
+class RunCheckpoint:
+  def __init__(self, master_seed: int, num_hands: int, duplicate: bool, teams: list[str]):
+    self.master_seed = master_seed
+    self.num_hands = num_hands
+    self.duplicate = duplicate
+    self.teams = teams
+    self.totals = GameTotals()
+    # Size of the results file holding exactly the games in totals.
+    self.results_size = 0
+
+  @property
+  def next_game(self) -> int:
+    return self.totals.num_games
+
+  def as_dict(self) -> dict:
+    return {'master_seed': self.master_seed, 'num_hands': self.num_hands, 'duplicate': self.duplicate,
+            'teams': self.teams, 'totals': self.totals.as_dict(), 'results_size': self.results_size}
+
+  @staticmethod
+  def from_dict(data: dict) -> 'RunCheckpoint':
+    checkpoint = RunCheckpoint(data['master_seed'], data['num_hands'], data['duplicate'], data['teams'])
+    checkpoint.totals = GameTotals.from_dict(data['totals'])
+    checkpoint.results_size = data['results_size']
+    return checkpoint
+
+  def save(self, path: str):
+    # Written whole and renamed over the old one, so a crash leaves one or the other.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+      json.dump(self.as_dict(), f)
+      f.flush()
+      os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+  @staticmethod
+  def load(path: str) -> 'RunCheckpoint':
+    with open(path) as f:
+      return RunCheckpoint.from_dict(json.load(f))
+
+
+def checkpoint_path(results_path: str) -> str:
+  return results_path + '.checkpoint'
+
+
+# Adds the game on line, which must be the next one, to the totals.
+def _add_result_line(checkpoint: RunCheckpoint, line: bytes):
+  index, score0, score1 = (int(x) for x in line.split())
+  assert index == checkpoint.next_game, f'Expected game {checkpoint.next_game} in results, found {index}'
+  checkpoint.totals.add([score0, score1])
+
+
+# The run's state from the checkpoint and the results written since. Lines
+# after the last complete one are cut off the results file.
+def _resume(results_path: str, checkpoint: RunCheckpoint) -> RunCheckpoint:
+  path = checkpoint_path(results_path)
+  if os.path.exists(path):
+    saved = RunCheckpoint.load(path)
+    for name in ('master_seed', 'num_hands', 'duplicate', 'teams'):
+      if getattr(saved, name) != getattr(checkpoint, name):
+        raise ValueError(f'{path} has {name} {getattr(saved, name)}, not {getattr(checkpoint, name)}')
+    checkpoint = saved
+  if not os.path.exists(results_path):
+    if checkpoint.next_game:
+      raise ValueError(f'{path} is for {checkpoint.next_game} games but {results_path} is missing')
+    return checkpoint
+  with open(results_path, 'r+b') as f:
+    f.seek(checkpoint.results_size)
+    tail = f.read()
+    complete = tail[:tail.rfind(b'\n') + 1]
+    for line in complete.splitlines():
+      _add_result_line(checkpoint, line)
+    checkpoint.results_size += len(complete)
+    f.truncate(checkpoint.results_size)
+  return checkpoint
+
+
+def _score_chunk(args: tuple[Game, int, int, int, int, bool]) -> tuple[int, list[list[int]]]:
+  game, master_seed, start, stop, num_hands, duplicate = args
+  return start, list(seeded_game_scores(game, master_seed, start, stop, num_hands, duplicate))
+
+
+# Plays games up to num_games, carrying on from whatever is already in
+# results_path. master_seed may be left out when resuming, to take the
+# checkpoint's. chunk_size games go to a worker at a time.
+def play_games_checkpointed(game: Game,
+                            num_games: int,
+                            results_path: str,
+                            master_seed: Optional[int] = None,
+                            num_workers: int = 1,
+                            num_hands: int = 12,
+                            duplicate: bool = False,
+                            checkpoint_every: int = 10000,
+                            chunk_size: int = 100) -> GameTotals:
+  path = checkpoint_path(results_path)
+  if master_seed is None:
+    master_seed = RunCheckpoint.load(path).master_seed if os.path.exists(path) else random.randrange(2**32)
+  checkpoint = _resume(results_path, RunCheckpoint(master_seed, num_hands, duplicate, [game.team0, game.team1]))
+  checkpoint.save(path)
+  logging.warning(f'Master seed {master_seed}, {num_workers} workers, results in {results_path}')
+  if checkpoint.next_game:
+    logging.warning(f'Resuming at game {checkpoint.next_game}')
+
+  chunks = [(game, master_seed, start, min(start + chunk_size, num_games), num_hands, duplicate)
+            for start in range(checkpoint.next_game, num_games, chunk_size)]
+  pool = multiprocessing.Pool(num_workers) if num_workers > 1 else None
+  try:
+    with open(results_path, 'ab') as results:
+      last_saved = checkpoint.next_game
+      # In order, so the results file and the totals always cover a prefix of the games.
+      scored = map(_score_chunk, chunks) if pool is None else pool.imap(_score_chunk, chunks)
+      for start, scores in scored:
+        results.write(b''.join(b'%d %d %d\n' % (i, score[0], score[1]) for i, score in enumerate(scores, start)))
+        for score in scores:
+          checkpoint.totals.add(score)
+        if checkpoint.next_game - last_saved >= checkpoint_every or checkpoint.next_game == num_games:
+          results.flush()
+          os.fsync(results.fileno())
+          checkpoint.results_size = results.tell()
+          checkpoint.save(path)
+          last_saved = checkpoint.next_game
+  finally:
+    if pool is not None:
+      pool.terminate()
+      pool.join()
+  return checkpoint.totals
@@ -1,32 +1,69 @@
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 import random
 import logging
 
-from cards import Suit, Card
+from bitboard import CardIndex
+from cards import Suit, Card, Trick
 from player import Player
 from constants import DECK_SIZE, FULL_DECK, HAND_SIZE, KITTY_SIZE, LONE_HAND_POINTS, PLAYER_COUNT
+from hand_record import HandRecord, RecordWriter
+if TYPE_CHECKING:
+  from win_probability import WinTable
 
 
 class Hand:
-  def __init__(self, players: list[Player], dealer: int, score: list[int], hands_left: int):
+  __slots__ = ('table', 'players', 'reverse_scores', 'score_delta', 'hands_left', 'record', 'cards', 'kitty', 'bids',
+               'trick', 'tricks')
+
+  def __init__(self, players: list[Player], dealer: int, score: list[int], hands_left: int, record: bool = False):
+    self.table = players
+    # Buffers reused every time the hand is reset and played again: the players
+    # in seat order from the dealer, the cards in deal order, the kitty, the
+    # bids, the cards laid in the current trick and the tricks taken.
+    self.players = players.copy()
+    self.cards = FULL_DECK.copy()
+    self.kitty = FULL_DECK[:KITTY_SIZE]
+    self.bids = []
+    self.trick = Trick()
+    self.tricks = [0, 0]
+    self.reset(dealer, score, hands_left, record)
+
+  # Sets up the next hand in place, so a Game can play all its hands on one Hand.
+  def reset(self, dealer: int, score: list[int], hands_left: int, record: bool = False):
+    for i in range(PLAYER_COUNT):
+      self.players[i] = self.table[(dealer + i) % PLAYER_COUNT]
     self.reverse_scores = dealer % 2
-    self.players = players[dealer:] + players[:dealer]
     self.score_delta = score[0]-score[1]
     if self.reverse_scores:
       self.score_delta = -self.score_delta
     self.hands_left = hands_left
+    self.record = HandRecord(dealer, score, hands_left) if record else None
 
-  def play_hand(self) -> tuple[int, int]:
-    logging.info(f'Dealer + first bid is {self.players[0].name}.')
+  # deal is the shuffled FULL_DECK indices, to play a known deal instead of a random one.
+  def play_hand(self, deal: Optional[list[int]] = None) -> tuple[int, int]:
+    # Log lines are only built when they'll be written.
+    log = logging.getLogger().isEnabledFor(logging.INFO)
+    if log:
+      logging.info(f'Dealer + first bid is {self.players[0].name}.')
     # Deal
-    shuffled = random.sample(FULL_DECK, k=DECK_SIZE)
-    kitty = shuffled[-KITTY_SIZE:]
-    shuffled = shuffled[:-KITTY_SIZE]
+    if deal is None:
+      deal = random.sample(range(DECK_SIZE), k=DECK_SIZE)
+    if self.record:
+      self.record.deal = bytes(deal)
+    shuffled = self.cards
+    for i, d in enumerate(deal):
+      shuffled[i] = FULL_DECK[d]
+    kitty = self.kitty
+    # Drops the cards a lone hand's partner gave last time.
+    del kitty[KITTY_SIZE:]
+    for i in range(KITTY_SIZE):
+      kitty[i] = shuffled[DECK_SIZE - KITTY_SIZE + i]
     for i in range(len(self.players)):
       self.players[i].deal_hand(shuffled[i*HAND_SIZE:(i+1)*HAND_SIZE], i%2)
 
     # Bids
-    prev_bids = []
+    prev_bids = self.bids
+    prev_bids.clear()
     curr_max = 0
     for i, p in enumerate(self.players):
       bid = p.bid(prev_bids, curr_max, self.score_delta * (-1 if i % 2 == 1 else 0), self.hands_left)
@@ -37,11 +74,21 @@ class Hand:
       prev_bids.append(bid)
       if curr_max > HAND_SIZE:
         break
+    if self.record:
+      self.record.bids = prev_bids.copy()
+    tricks = self.tricks
+    tricks[0] = tricks[1] = 0
+    if not curr_max:
+      # Everyone passed, so the hand isn't played.
+      if log:
+        logging.info('All passed')
+      return (0, 0)
     amount = prev_bids[winner][0]
     trump = prev_bids[winner][1]
-    logging.debug(f'Winning bid is {amount}{trump}')
+    if log:
+      logging.debug(f'Winning bid is {amount}{trump}')
+    card_index = CardIndex.for_trump(trump)
 
-    discarded_cards = []
     out_of_game = None
     # LONE HAND!
     if amount > HAND_SIZE:
@@ -49,49 +96,63 @@ class Hand:
       # TODO - will need a system for 6 hand to pick who to give.
       out_of_game = (winner + 2) % PLAYER_COUNT
       given_cards = self.players[out_of_game].bidding_finished(trump, None, None, partner_alone = True)
-      kitty += given_cards
-      discarded_cards += self.players[out_of_game].hand
+      kitty.extend(given_cards)
+      if self.record:
+        self.record.given = bytearray(card_index.card_id(c) for c in given_cards)
 
     for i, p in enumerate(self.players):
       c = p.bidding_finished(trump, prev_bids, i, kitty=kitty if i==winner else None)
       if c:
-        discarded_cards += c
+        if self.record:
+          self.record.discards = bytearray(card_index.card_id(d) for d in c)
 
-    cards_remaining = FULL_DECK.copy()
-    if trump != Suit.TRUMP:
-      cards_remaining = Card.convert_to_trump(cards_remaining, trump)
-    cards_remaining = sorted(cards_remaining, reverse=True)
+    remaining_mask = card_index.full_mask
+    taken = 0
+    for p in self.players:
+      taken = p.assign_card_ids(taken)
 
     # Play hands
     leader = winner
-    tricks = [0,0]
+    # Seats in the order they play the current trick.
+    order = []
     for i in range(HAND_SIZE):
-      printstr = f'{i}:'
-      cards_laid = {j: None for j in range(4)}
-      if out_of_game:
-        del(cards_laid[out_of_game])
+      if log:
+        printstr = f'{i}:'
+      trick = self.trick
+      trick.reset()
+      order.clear()
       for j in range(PLAYER_COUNT):
         idx = (j + leader) % PLAYER_COUNT
         if idx != out_of_game:
           player = self.players[idx]
-          c = player.play_card(cards_laid, cards_remaining)
-          cards_laid.append(c)
-          cards_remaining.remove(c)
-          printstr += f'  {player.name} {c}'
+          c = player.play_card(trick)
+          trick.lay(c)
+          order.append(idx)
+          remaining_mask ^= player.last_card_bit
+          if self.record:
+            self.record.add_play(idx, player.last_card_bit.bit_length() - 1)
+          for p in self.players:
+            p.card_laid(player.last_card_bit)
+          if log:
+            printstr += f'  {player.name} {c}'
       for j in range(PLAYER_COUNT):
         idx = (j + leader) % PLAYER_COUNT
         if idx != out_of_game:
-          self.players[idx].update(cards_laid, cards_remaining, j)
-      trick_win = Card.max(cards_laid)
-      if out_of_game is not None and trick_win >= out_of_game:
-        trick_win += 1
-      leader = (trick_win + leader) % PLAYER_COUNT
+          self.players[idx].update(trick, j)
+      leader = order[trick.winner]
       tricks[leader % 2] += 1
-      logging.info(printstr)
-    logging.info(f'Bidder won {tricks[winner%2]}, other {tricks[(winner+1)%2]}')
-    if cards_remaining != sorted(discarded_cards, reverse=True):
-      logging.error(f'{Card.stringify(cards_remaining)}')
-      logging.error(f'{Card.stringify(sorted(discarded_cards, reverse=True))}')
+      if log:
+        logging.info(printstr)
+    if log:
+      logging.info(f'Bidder won {tricks[winner%2]}, other {tricks[(winner+1)%2]}')
+    # Every card that wasn't played should be a discard, or in the hand of a
+    # partner sitting out a lone hand.
+    unplayed_mask = 0
+    for p in self.players:
+      unplayed_mask |= p.hand_mask | p.discard_mask
+    if remaining_mask != unplayed_mask:
+      logging.error(f'{Card.stringify(card_index.to_cards(remaining_mask))}')
+      logging.error(f'{Card.stringify(card_index.to_cards(unplayed_mask))}')
       assert False
 
     # Score
@@ -103,14 +164,22 @@ class Hand:
     else:
       tricks[winner%2] = -amount
       
-    if self.reverse_scores:
-      return [tricks[1], tricks[0]]
-    return tricks
+    result = (tricks[1], tricks[0]) if self.reverse_scores else (tricks[0], tricks[1])
+    if self.record:
+      self.record.result = list(result)
+    return result
 
 class Game:
-  def __init__(self, players: list[Player]):
+  __slots__ = ('players', 'win_table', 'end_probability', 'team0', 'team1', 'hand')
+
+  # With a win_table, games end once the trailing team's chance of winning drops
+  # under end_probability. Otherwise only once it can't catch up even with lone
+  # hands.
+  def __init__(self, players: list[Player], win_table: Optional['WinTable'] = None, end_probability: float = 0.001):
     assert len(players) == PLAYER_COUNT
     self.players = players
+    self.win_table = win_table
+    self.end_probability = end_probability
     self.team0 = ''
     self.team1 = ''
     for i in range(len(self.players)):
@@ -118,18 +187,35 @@ class Game:
         self.team0 += self.players[i].name
       else:
         self.team1 += self.players[i].name
+    # Played again for every hand of every game.
+    self.hand = Hand(players, 0, [0, 0], 0)
+
+  def is_decided(self, score_delta: int, hands_left: int) -> bool:
+    if self.win_table is None:
+      return abs(score_delta) > LONE_HAND_POINTS * hands_left
+    p = self.win_table.probability(score_delta, hands_left)
+    return min(p, 1 - p) < self.end_probability
 
-  def play_game(self, num_hands=12) -> tuple[int, int]:
-    first_deal = random.randrange(4)
+  # recorder gets a HandRecord of every hand played. Giving deal_rng draws the
+  # first dealer and every deal from it instead of the global random state, so
+  # games fed the same deal_rng seed get the same cards whatever the strategies do.
+  def play_game(self,
+                num_hands=12,
+                recorder: Optional[RecordWriter] = None,
+                deal_rng: Optional[random.Random] = None) -> tuple[int, int]:
+    first_deal = (deal_rng or random).randrange(4)
     logging.info(f'Starting game - first dealer is {self.players[first_deal].name}')
     logging.info(f'{self.team0} vs {self.team1}')
     score = [0,0]
     for i in range(num_hands):
-      if abs(score[0] - score[1]) > LONE_HAND_POINTS * (num_hands - i):
+      if self.is_decided(score[0] - score[1], num_hands - i):
         logging.info(f'Ending game early')
         break
-      h = Hand(self.players, (i+first_deal) % 4, score, num_hands-i)
-      results = h.play_hand()
+      h = self.hand
+      h.reset((i+first_deal) % 4, score, num_hands-i, record=recorder is not None)
+      results = h.play_hand(deal_rng.sample(range(DECK_SIZE), k=DECK_SIZE) if deal_rng else None)
+      if recorder:
+        recorder.write(h.record)
       score[0] += results[0]
       score[1] += results[1]
       logging.info(f'{self.team0}: {score[0]}, {self.team1}: {score[1]}')
@@ -0,0 +1,119 @@
+import multiprocessing
+import random
+import struct
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from constants import HAND_SIZE, PLAYER_COUNT
+from game import Game
+from hand_record import HandRecord
+from simulation import game_seed
+
+# Compact summary of one game, for streaming games one at a time instead of
+# only keeping totals. Seats are indices into Game.players, so seats 0 and 2
+# are team 0. A bid counts as made or set for the seat that won the bidding.
+#
+# Packed as score (hh), hands played (B), then bids made, bids set, lone hands
+# attempted and lone hands made for each seat (4B each).
+_RECORD = struct.Struct(f'<hhB{4 * PLAYER_COUNT}B')
+
+
+class GameRecord:
+  __slots__ = ('score', 'hands_played', 'bids_made', 'bids_set', 'lone_attempted', 'lone_made')
+
+  def __init__(self):
+    self.score = [0, 0]
+    self.hands_played = 0
+    self.bids_made = [0] * PLAYER_COUNT
+    self.bids_set = [0] * PLAYER_COUNT
+    self.lone_attempted = [0] * PLAYER_COUNT
+    self.lone_made = [0] * PLAYER_COUNT
+
+  @property
+  def margin(self) -> int:
+    return self.score[0] - self.score[1]
+
+  # Called with each hand's record, as a Game recorder.
+  def write(self, record: HandRecord):
+    self.hands_played += 1
+    live = [i for i, b in enumerate(record.bids) if b]
+    if not live:
+      return
+    winner = max(live, key=lambda i: record.bids[i][0])
+    seat = (record.dealer + winner) % PLAYER_COUNT
+    made = record.result[seat % 2] > 0
+    (self.bids_made if made else self.bids_set)[seat] += 1
+    if record.bids[winner][0] > HAND_SIZE:
+      self.lone_attempted[seat] += 1
+      self.lone_made[seat] += made
+
+  def to_bytes(self) -> bytes:
+    return _RECORD.pack(*self.score, self.hands_played,
+                        *self.bids_made, *self.bids_set, *self.lone_attempted, *self.lone_made)
+
+  @staticmethod
+  def from_bytes(data: bytes) -> 'GameRecord':
+    fields = _RECORD.unpack(data)
+    record = GameRecord()
+    record.score = list(fields[:2])
+    record.hands_played = fields[2]
+    counts = fields[3:]
+    record.bids_made, record.bids_set, record.lone_attempted, record.lone_made = (
+        list(counts[i * PLAYER_COUNT:(i + 1) * PLAYER_COUNT]) for i in range(4))
+    return record
+
+
+# Records of games [start, stop), in order. Without a master_seed the games
+# come from the global random state, as Game.play_game does.
+def seeded_game_records(game: Game,
+                        master_seed: Optional[int],
+                        start: int,
+                        stop: int,
+                        num_hands: int = 12) -> Iterator[GameRecord]:
+  for i in range(start, stop):
+    if master_seed is not None:
+      random.seed(game_seed(master_seed, i))
+    record = GameRecord()
+    score = game.play_game(num_hands=num_hands, recorder=record)
+    record.score = list(score)
+    yield record
+
+
+def _records_chunk(args: tuple[Game, int, int, int, int]) -> list[GameRecord]:
+  return list(seeded_game_records(*args))
+
+
+# Records of num_games games, in order. With num_workers > 1 a pool plays
+# chunk_size games at a time ahead of the consumer, and a master_seed is needed
+# for the games to be the same as played on one worker.
+def game_records(game: Game,
+                 num_games: int,
+                 master_seed: Optional[int] = None,
+                 num_workers: int = 1,
+                 num_hands: int = 12,
+                 chunk_size: int = 100) -> Iterator[GameRecord]:
+  if num_workers <= 1:
+    yield from seeded_game_records(game, master_seed, 0, num_games, num_hands)
+    return
+  if master_seed is None:
+    master_seed = random.randrange(2**32)
+  chunks = ((game, master_seed, start, min(start + chunk_size, num_games), num_hands)
+            for start in range(0, num_games, chunk_size))
+  with multiprocessing.Pool(num_workers) as pool:
+    for records in pool.imap(_records_chunk, chunks):
+      yield from records
+
+
+# Passes records through, writing each one to f on the way, so the games can be
+# reported on again later with read_game_records instead of played again.
+def write_game_records(records: Iterable[GameRecord], f: BinaryIO) -> Iterator[GameRecord]:
+  for record in records:
+    f.write(record.to_bytes())
+    yield record
+
+
+def read_game_records(f: BinaryIO) -> Iterator[GameRecord]:
+  while True:
+    data = f.read(_RECORD.size)
+    if len(data) < _RECORD.size:
+      return
+    yield GameRecord.from_bytes(data)
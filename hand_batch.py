@@ -0,0 +1,311 @@
+import random
+
+import numpy as np
+
+from basic_strategies import Bid, BasicPlayer, RandomPlayer
+from bid_sweep import BatchFeatures, deal_bids
+from bitboard import CardIndex
+from cards import Suit, Card
+from constants import DECK_SIZE, FULL_DECK, HAND_SIZE, KITTY_SIZE, LONE_HAND_POINTS, PLAYER_COUNT
+from instrumentation import uninstrumented_type
+from player import Player
+
+# Plays many hands at once for the playing strategies that are simple enough to
+# write as array arithmetic, RandomPlayer and BasicPlayer. The state of every
+# hand is kept in NumPy arrays with a row per hand, and all the hands advance
+# one card play at a time, so legal plays, boss checks and trick winners are
+# worked out for the whole batch together.
+#
+# Each hand is played exactly as Hand.play_hand plays it after random.seed(seed).
+# The deal and every random choice come from the hand's own random.Random(seed),
+# drawn in the same order the scalar strategies draw them. Those draws and the
+# bidding decisions are the only parts done hand by hand. Bidding goes through
+# bid_sweep, so the bidders are limited to the ones it batches.
+#
+# Cards are counted by kind: the distinct cards of the trump-converted deck in
+# CardIndex order. There are 24 kinds whatever the trump, so a hand is 24 counts
+# of 0-2, played as two 24 bit masks. Each suit is a run of kinds from its
+# highest card down, and walking the kinds in order walks a hand the way the
+# strategies do.
+
+RANDOM = 0
+BASIC = 1
+STRATEGY_KINDS = {RandomPlayer: RANDOM, BasicPlayer: BASIC}
+NUM_KINDS = 24
+ALL_KINDS = (1 << NUM_KINDS) - 1
+
+
+# Tables indexed by [Suit.value, kind]: the kind's suit value, its number and
+# its value to PlayingStrategy.give_two_to_partner. DECK_KIND[Suit.value, i] is
+# the kind of FULL_DECK[i]. SUIT_MASK and NUMBER_MASK are kind bitmasks by
+# [Suit.value, suit value] and [Suit.value, card number].
+def _build_kind_tables() -> tuple[np.ndarray, ...]:
+  kind_suit = np.zeros((len(Suit), NUM_KINDS), dtype=np.int64)
+  kind_number = np.zeros((len(Suit), NUM_KINDS), dtype=np.int64)
+  give_value = np.zeros((len(Suit), NUM_KINDS), dtype=np.int64)
+  deck_kind = np.zeros((len(Suit), DECK_SIZE), dtype=np.int64)
+  suit_mask = np.zeros((len(Suit), len(Suit)), dtype=np.int64)
+  number_mask = np.zeros((len(Suit), 17), dtype=np.int64)
+  for trump in Suit:
+    t = trump.value
+    kinds = list(dict.fromkeys(CardIndex.for_trump(trump).cards))
+    assert len(kinds) == NUM_KINDS
+    for k, c in enumerate(kinds):
+      kind_suit[t, k] = c.suit.value
+      kind_number[t, k] = c.number
+      suit_mask[t, c.suit.value] |= 1 << k
+      number_mask[t, c.number] |= 1 << k
+      # Same as give_two_to_partner's _eval.
+      if c.suit == Suit.TRUMP:
+        give_value[t, k] = c.number * 2
+      elif c.number == 14:
+        give_value[t, k] = 29
+      else:
+        give_value[t, k] = c.number
+    for i, c in enumerate(FULL_DECK):
+      deck_kind[t, i] = kinds.index(Card.convert_to_trump([c], trump)[0])
+  return kind_suit, kind_number, give_value, deck_kind, suit_mask, number_mask
+
+KIND_SUIT, KIND_NUMBER, GIVE_VALUE, DECK_KIND, SUIT_MASK, NUMBER_MASK = _build_kind_tables()
+# Set bits in each 12 bit number.
+_POPCOUNT = np.array([bin(i).count('1') for i in range(1 << 12)], dtype=np.int64)
+
+
+# Per hand results, by seat: team 0 is seats 0 and 2, as in Game.
+class HandBatchResult:
+  def __init__(self, num_hands: int):
+    # Bids in the order Hand makes them, the dealer's first.
+    self.bids: list[list[Bid]] = []
+    # Seat of the winning bid, -1 if everyone passed.
+    self.bidder = np.full(num_hands, -1, dtype=np.int64)
+    self.trump = np.zeros(num_hands, dtype=np.int64)
+    self.amount = np.zeros(num_hands, dtype=np.int64)
+    # Tricks taken and points scored by each team, as Hand.play_hand returns them.
+    self.tricks = np.zeros((num_hands, 2), dtype=np.int64)
+    self.results = np.zeros((num_hands, 2), dtype=np.int64)
+
+
+# Counts per kind along the last axis of kinds, which holds kind ids.
+def _kind_counts(kinds: np.ndarray) -> np.ndarray:
+  rows = kinds.reshape(-1, kinds.shape[-1])
+  offsets = np.arange(rows.shape[0])[:, None] * NUM_KINDS
+  counts = np.bincount((rows + offsets).ravel(), minlength=rows.shape[0] * NUM_KINDS)
+  return counts.reshape(*kinds.shape[:-1], NUM_KINDS)
+
+
+# (held, held twice) kind bitmasks from counts per kind along the last axis.
+def _count_masks(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+  bits = np.int64(1) << np.arange(NUM_KINDS, dtype=np.int64)
+  return ((counts >= 1) * bits).sum(axis=-1), ((counts >= 2) * bits).sum(axis=-1)
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+  return _POPCOUNT[masks & 0xfff] + _POPCOUNT[masks >> 12]
+
+
+# Index of the lowest, or highest, kind in each nonzero mask.
+def _lowest_kind(masks: np.ndarray) -> np.ndarray:
+  return _highest_kind(masks & -masks)
+
+
+def _highest_kind(masks: np.ndarray) -> np.ndarray:
+  return np.frexp(masks.astype(np.float64))[1].astype(np.int64) - 1
+
+
+# Hand i is played as Hand(players, dealers[i], [0, 0], hands_left).play_hand()
+# would after random.seed(seeds[i]). Hands where everyone passes aren't played
+# and score nothing.
+def play_hands(players: list[Player],
+               seeds: list,
+               dealers: list[int],
+               hands_left: int = 12) -> HandBatchResult:
+  num_hands = len(seeds)
+  result = HandBatchResult(num_hands)
+  rngs = [random.Random(s) for s in seeds]
+  deals = np.array([rng.sample(range(DECK_SIZE), k=DECK_SIZE) for rng in rngs], dtype=np.int64)
+  deals = deals.reshape(num_hands, DECK_SIZE)
+  dealers = np.asarray(dealers, dtype=np.int64)
+
+  # Bidding. Like Hand, everything from here is by position: position q is seat
+  # (dealer + q) % PLAYER_COUNT, and position 0 bids first.
+  features = BatchFeatures(deals)
+  winner = np.full(num_hands, -1, dtype=np.int64)
+  for d in range(num_hands):
+    dealer = int(dealers[d])
+    bidders = [players[(dealer + q) % PLAYER_COUNT].bidding_strat for q in range(PLAYER_COUNT)]
+    bids, w = deal_bids(features, d, bidders, 0, hands_left)
+    result.bids.append(bids)
+    if w is not None:
+      winner[d] = w
+      result.amount[d] = bids[w][0]
+      result.trump[d] = bids[w][1].value
+  played = np.nonzero(winner >= 0)[0]
+  result.bidder[played] = (dealers[played] + winner[played]) % PLAYER_COUNT
+  if not len(played):
+    return result
+
+  seats = (dealers[played, None] + np.arange(PLAYER_COUNT)) % PLAYER_COUNT
+  strategy_kinds = np.array([STRATEGY_KINDS[uninstrumented_type(p.playing_strat)] for p in players])[seats]
+  tricks = _play_tricks([rngs[i] for i in played], deals[played], winner[played], result.trump[played],
+                        result.amount[played], strategy_kinds)
+
+  # Score as Hand does, then turn the teams from positions into seats.
+  m = len(played)
+  ar = np.arange(m)
+  w = winner[played]
+  lone = result.amount[played] > HAND_SIZE
+  points = np.where(lone, LONE_HAND_POINTS, result.amount[played])
+  bidder_tricks = tricks[ar, w % 2]
+  made = np.where(lone, bidder_tricks == HAND_SIZE, bidder_tricks >= points)
+  scores = tricks.copy()
+  scores[ar, w % 2] = np.where(made, points, -points)
+  reverse = dealers[played] % 2 == 1
+  result.tricks[played] = np.where(reverse[:, None], tricks[:, ::-1], tricks)
+  result.results[played] = np.where(reverse[:, None], scores[:, ::-1], scores)
+  return result
+
+
+# Tricks taken by each team, by position, for hands that were bid on.
+# strategy_kinds is (hands, positions).
+def _play_tricks(rngs: list[random.Random],
+                 deals: np.ndarray,
+                 winner: np.ndarray,
+                 trump: np.ndarray,
+                 amount: np.ndarray,
+                 strategy_kinds: np.ndarray) -> np.ndarray:
+  m = deals.shape[0]
+  ar = np.arange(m)
+  kinds = DECK_KIND[trump[:, None], deals]
+  # Hands sorted high to low, as Player.deal_hand and convert_to_trump leave them.
+  hand_kinds = np.sort(kinds[:, :PLAYER_COUNT * HAND_SIZE].reshape(m, PLAYER_COUNT, HAND_SIZE), axis=2)
+  hand = _kind_counts(hand_kinds)
+
+  # A lone hand's partner gives the two best cards by give_two_to_partner's
+  # value, the first of equal ones, and they go on the end of the kitty.
+  lone = amount > HAND_SIZE
+  out = np.where(lone, (winner + 2) % PLAYER_COUNT, -1)
+  kitty = kinds[:, PLAYER_COUNT * HAND_SIZE:]
+  given = np.zeros((m, 2), dtype=np.int64)
+  lone_rows = np.nonzero(lone)[0]
+  if len(lone_rows):
+    partner = hand_kinds[lone_rows, out[lone_rows]]
+    best = np.argsort(-GIVE_VALUE[trump[lone_rows, None], partner], axis=1, kind='stable')[:, :2]
+    given[lone_rows] = np.take_along_axis(partner, best, axis=1)
+    np.subtract.at(hand, (np.repeat(lone_rows, 2), np.repeat(out[lone_rows], 2), given[lone_rows].ravel()), 1)
+
+  # The kitty taker adds the kitty to the end of their hand, converted (and so
+  # sorted) unless there's no trump, and discards from that list.
+  discards = np.zeros((m, NUM_KINDS), dtype=np.int64)
+  for rows, size in ((np.nonzero(~lone)[0], KITTY_SIZE), (lone_rows, KITTY_SIZE + 2)):
+    if not len(rows):
+      continue
+    taken = kitty[rows] if size == KITTY_SIZE else np.concatenate([kitty[rows], given[rows]], axis=1)
+    taken = np.where((trump[rows] != Suit.TRUMP.value)[:, None], np.sort(taken, axis=1), taken)
+    taker = winner[rows]
+    listed = np.concatenate([hand_kinds[rows, taker], taken], axis=1)
+    # BasicPlayer throws the lowest offsuit card away, the first of equal ones,
+    # then the lowest trump.
+    t = trump[rows, None]
+    key = ((KIND_SUIT[t, listed] == Suit.TRUMP.value) * 10000 + KIND_NUMBER[t, listed] * 100 +
+           np.arange(listed.shape[1]))
+    thrown = np.argsort(key, axis=1)[:, :size]
+    # RandomPlayer samples them.
+    for r in np.nonzero(strategy_kinds[rows, taker] == RANDOM)[0]:
+      thrown[r] = rngs[rows[r]].sample(range(listed.shape[1]), size)
+    discards[rows] = _kind_counts(np.take_along_axis(listed, thrown, axis=1))
+    hand[rows, taker] += _kind_counts(taken) - discards[rows]
+
+  # From here hands are bitmasks over kinds, kind k being bit k: one mask of
+  # the kinds held at all and one of those held twice.
+  suit_masks = SUIT_MASK[trump]
+  trump_mask = suit_masks[:, Suit.TRUMP.value]
+  offsuit_mask = ALL_KINDS & ~trump_mask
+  number_masks = NUMBER_MASK[trump]
+  held, held_twice = _count_masks(hand)
+  discarded, discarded_twice = _count_masks(discards)
+  unlaid = np.full(m, ALL_KINDS, dtype=np.int64)
+  unlaid_twice = unlaid.copy()
+  basic = strategy_kinds == BASIC
+  leader = winner.copy()
+  tricks = np.zeros((m, 2), dtype=np.int64)
+  for _ in range(HAND_SIZE):
+    num_laid = np.zeros(m, dtype=np.int64)
+    led_mask = np.zeros(m, dtype=np.int64)
+    win_kind = np.zeros(m, dtype=np.int64)
+    win_trump = np.zeros(m, dtype=bool)
+    win_pos = np.zeros(m, dtype=np.int64)
+    for j in range(PLAYER_COUNT):
+      pos = (leader + j) % PLAYER_COUNT
+      active = pos != out
+      leading = num_laid == 0
+      hand_mask = held[ar, pos]
+      hand_twice = held_twice[ar, pos]
+      follow = hand_mask & led_mask
+      legal = np.where(follow != 0, follow, hand_mask)
+
+      # CardIndex.is_boss against the cards the player hasn't seen laid or
+      # discarded: beaten if a higher card of its suit is out, 1 if only trump
+      # can beat it, 10 if nothing can. Only the kitty taker has discards.
+      unseen = np.where(pos == winner, (unlaid & ~discarded) | (unlaid_twice & ~discarded_twice), unlaid)
+      beaten = np.zeros(m, dtype=np.int64)
+      for suit in range(len(Suit)):
+        out_of_suit = unseen & suit_masks[:, suit]
+        top = out_of_suit & -out_of_suit
+        beaten |= suit_masks[:, suit] & ~((top << 1) - 1)
+      trump_out = (unseen & trump_mask) != 0
+      bosses = legal & ~beaten
+      unbeatable = bosses & np.where(trump_out, trump_mask, ALL_KINDS)
+      only_trump = bosses & np.where(trump_out, offsuit_mask, 0)
+
+      # BasicPlayer leads its first unbeatable card, or else its last card only
+      # trump can beat. It follows with its first boss card that takes the
+      # trick, or else throws away its lowest offsuit card, the first of equal
+      # ones, or else its lowest trump.
+      below = (np.int64(1) << win_kind) - 1
+      beats = np.where(win_trump, trump_mask & below, trump_mask | (led_mask & below))
+      takes = bosses & beats
+      throwaway = _highest_kind(legal & trump_mask)
+      thrown = np.zeros(m, dtype=bool)
+      for number in range(9, 15):
+        lowest = legal & offsuit_mask & number_masks[:, number]
+        throwaway = np.where(~thrown & (lowest != 0), _lowest_kind(lowest), throwaway)
+        thrown |= lowest != 0
+      choice = np.where(leading,
+                        np.where(unbeatable != 0, _lowest_kind(unbeatable), _highest_kind(only_trump)),
+                        np.where(takes != 0, _lowest_kind(takes), throwaway))
+
+      # Random choices, over the legal cards high to low. random.choice picks
+      # with _randbelow, so that is what's drawn here.
+      chance = active & (~basic[ar, pos] | (leading & (unbeatable == 0) & (only_trump == 0)))
+      rows = np.nonzero(chance)[0]
+      if len(rows):
+        options = legal[rows]
+        options_twice = hand_twice[rows] & options
+        counts = _popcount(options) + _popcount(options_twice)
+        draws = np.array([rngs[r]._randbelow(n) for r, n in zip(rows.tolist(), counts.tolist())])
+        picked = np.full(len(rows), -1, dtype=np.int64)
+        seen = np.zeros(len(rows), dtype=np.int64)
+        for k in range(NUM_KINDS):
+          seen += ((options >> k) & 1) + ((options_twice >> k) & 1)
+          picked = np.where((picked < 0) & (seen > draws), k, picked)
+        choice[rows] = picked
+
+      card = np.where(active, np.int64(1) << np.maximum(choice, 0), 0)
+      twice = (hand_twice & card) != 0
+      held_twice[ar, pos] = hand_twice & ~np.where(twice, card, 0)
+      held[ar, pos] = hand_mask & ~np.where(twice, 0, card)
+      twice = (unlaid_twice & card) != 0
+      unlaid_twice &= ~np.where(twice, card, 0)
+      unlaid &= ~np.where(twice, 0, card)
+
+      # Card.max: the first of the highest cards laid wins.
+      wins = active & (leading | ((card & beats) != 0))
+      win_kind = np.where(wins, choice, win_kind)
+      win_trump = np.where(wins, (card & trump_mask) != 0, win_trump)
+      win_pos = np.where(wins, pos, win_pos)
+      led_mask = np.where(active & leading, suit_masks[ar, KIND_SUIT[trump, np.maximum(choice, 0)]], led_mask)
+      num_laid += active
+
+    leader = win_pos
+    tricks[ar, leader % 2] += 1
+  return tricks
@@ -0,0 +1,111 @@
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+from basic_strategies import Bid
+from bitboard import CardIndex
+from cards import Suit, Card
+
+# Compact binary record of one hand. Each record is a little endian length
+# prefixed blob:
+#   dealer (B), game score before the hand (hh), hands left (B)
+#   the deal as 48 FULL_DECK indices, kitty last (48B)
+#   bids: count (B), then (amount, suit) pairs (BB) with 0xFF as the suit of a pass
+#   given to a lone partner, winner's discards, cards played: count (B) then one
+#   byte each. Played bytes are seat << 6 | CardIndex id, seats counted from the
+#   dealer, and the other two lists are CardIndex ids of the trump.
+#   result of the hand (hh)
+_LENGTH = struct.Struct('<H')
+_HEADER = struct.Struct('<BhhB')
+_RESULT = struct.Struct('<hh')
+_PASS = 0xFF
+_SEAT_SHIFT = 6
+_ID_MASK = (1 << _SEAT_SHIFT) - 1
+
+
+class HandRecord:
+  def __init__(self, dealer: int, score: list[int], hands_left: int):
+    self.dealer = dealer
+    self.score = list(score)
+    self.hands_left = hands_left
+    self.deal = b''
+    self.bids: list[Bid] = []
+    # CardIndex ids, filled in once trump is known.
+    self.given = bytearray()
+    self.discards = bytearray()
+    self.plays = bytearray()
+    self.result = [0, 0]
+
+  def trump(self) -> Optional[Suit]:
+    live_bids = [b for b in self.bids if b]
+    if not live_bids:
+      return None
+    return max(live_bids, key=lambda b: b[0])[1]
+
+  def add_play(self, seat: int, card_id: int):
+    self.plays.append(seat << _SEAT_SHIFT | card_id)
+
+  # (seat, card) for every card played, in order. Empty if everyone passed.
+  def played_cards(self) -> list[tuple[int, Card]]:
+    if not self.plays:
+      return []
+    index = CardIndex.for_trump(self.trump())
+    return [(b >> _SEAT_SHIFT, index.cards[b & _ID_MASK]) for b in self.plays]
+
+  def given_cards(self) -> list[Card]:
+    index = CardIndex.for_trump(self.trump())
+    return [index.cards[i] for i in self.given]
+
+  def discarded_cards(self) -> list[Card]:
+    index = CardIndex.for_trump(self.trump())
+    return [index.cards[i] for i in self.discards]
+
+  def to_bytes(self) -> bytes:
+    bids = bytearray([len(self.bids)])
+    for b in self.bids:
+      bids += bytes([b[0], b[1].value]) if b else bytes([0, _PASS])
+    return b''.join([
+        _HEADER.pack(self.dealer, self.score[0], self.score[1], self.hands_left),
+        self.deal,
+        bids,
+        bytes([len(self.given)]), self.given,
+        bytes([len(self.discards)]), self.discards,
+        bytes([len(self.plays)]), self.plays,
+        _RESULT.pack(*self.result)])
+
+  @staticmethod
+  def from_bytes(data: bytes) -> 'HandRecord':
+    dealer, score0, score1, hands_left = _HEADER.unpack_from(data)
+    record = HandRecord(dealer, [score0, score1], hands_left)
+    pos = _HEADER.size
+    record.deal = data[pos:pos + 48]
+    pos += 48
+    num_bids = data[pos]
+    pos += 1
+    for i in range(num_bids):
+      amount, suit = data[pos], data[pos + 1]
+      record.bids.append(None if suit == _PASS else (amount, Suit(suit)))
+      pos += 2
+    for field in ('given', 'discards', 'plays'):
+      count = data[pos]
+      setattr(record, field, bytearray(data[pos + 1:pos + 1 + count]))
+      pos += 1 + count
+    record.result = list(_RESULT.unpack_from(data, pos))
+    return record
+
+
+class RecordWriter:
+  def __init__(self, f: BinaryIO):
+    self.f = f
+
+  def write(self, record: HandRecord):
+    data = record.to_bytes()
+    self.f.write(_LENGTH.pack(len(data)))
+    self.f.write(data)
+
+
+def read_records(f: BinaryIO) -> Iterator[HandRecord]:
+  while True:
+    length = f.read(_LENGTH.size)
+    if len(length) < _LENGTH.size:
+      return
+    yield HandRecord.from_bytes(f.read(_LENGTH.unpack(length)[0]))
@@ -0,0 +1,126 @@
+import functools
+import inspect
+import time
+
+from player import Player
+
+# Optional call counts and latency histograms for Player methods and the strategy
+# methods they call. instrument() wraps the methods of the given player objects
+# only, so with it off nothing is wrapped and nothing is paid.
+
+PLAYER_METHODS = ['bid', 'bidding_finished', 'play_card', 'update']
+STRATEGY_METHODS = ['bid', 'start_hand', 'take_kitty', 'give_two_to_partner', 'lead', 'follow', 'lead_mask',
+                    'follow_mask', 'update']
+
+
+# Latencies in power of two nanosecond buckets: bucket b holds [2^(b-1), 2^b).
+class Histogram:
+  BUCKETS = 48
+
+  def __init__(self):
+    self.counts = [0] * Histogram.BUCKETS
+    self.calls = 0
+    self.total_ns = 0
+    self.max_ns = 0
+
+  def add(self, ns: int):
+    self.counts[min(ns.bit_length(), Histogram.BUCKETS - 1)] += 1
+    self.calls += 1
+    self.total_ns += ns
+    if ns > self.max_ns:
+      self.max_ns = ns
+
+  def merge(self, other: 'Histogram'):
+    for b, c in enumerate(other.counts):
+      self.counts[b] += c
+    self.calls += other.calls
+    self.total_ns += other.total_ns
+    self.max_ns = max(self.max_ns, other.max_ns)
+
+  # Upper edge of the bucket the q quantile falls in, or the max if lower.
+  def quantile_ns(self, q: float) -> int:
+    target = q * self.calls
+    seen = 0
+    for b, c in enumerate(self.counts):
+      seen += c
+      if c and seen >= target:
+        return min(1 << b, self.max_ns)
+    return self.max_ns
+
+
+# Histograms keyed by (owner, method): owner is a player name for Player methods
+# and a strategy class name for strategy methods, so the same strategy in
+# several seats adds up.
+class CallStats:
+  def __init__(self):
+    self.histograms: dict[tuple[str, str], Histogram] = {}
+
+  def histogram(self, owner: str, method: str) -> Histogram:
+    key = (owner, method)
+    h = self.histograms.get(key)
+    if h is None:
+      h = Histogram()
+      self.histograms[key] = h
+    return h
+
+  def merge(self, other: 'CallStats'):
+    for (owner, method), h in other.histograms.items():
+      self.histogram(owner, method).merge(h)
+
+  def summary(self) -> str:
+    lines = [f'{"Owner":<20} {"Method":<20} {"Calls":>9} {"Total ms":>10} {"Mean us":>9} {"p50 us":>8} {"p99 us":>8} {"Max us":>9}']
+    for (owner, method), h in sorted(self.histograms.items(), key=lambda item: -item[1].total_ns):
+      if not h.calls:
+        continue
+      lines.append(f'{owner:<20} {method:<20} {h.calls:9} {h.total_ns / 1e6:10.1f} {h.total_ns / h.calls / 1e3:9.1f} '
+                   f'{h.quantile_ns(0.5) / 1e3:8.1f} {h.quantile_ns(0.99) / 1e3:8.1f} {h.max_ns / 1e3:9.1f}')
+    return '\n'.join(lines)
+
+
+def _timed(function, histogram: Histogram):
+  perf_counter_ns = time.perf_counter_ns
+  @functools.wraps(function)
+  def wrapper(self, *args, **kwargs):
+    start = perf_counter_ns()
+    try:
+      return function(self, *args, **kwargs)
+    finally:
+      histogram.add(perf_counter_ns() - start)
+  return wrapper
+
+
+# Players and strategies have __slots__, so there's no instance dict to put the
+# wrappers in. The object's class is swapped for a subclass of it holding them
+# instead, which has the same layout, and swapped back by uninstrument. Code
+# that checks a strategy's exact type should use uninstrumented_type.
+def _wrap(obj, owner: str, methods: list[str], stats: CallStats):
+  cls = type(obj)
+  if '_uninstrumented_class' in vars(cls):
+    return
+  namespace = {'__slots__': (), '_uninstrumented_class': cls}
+  for name in methods:
+    function = inspect.getattr_static(cls, name, None)
+    if inspect.isfunction(function):
+      namespace[name] = _timed(function, stats.histogram(owner, name))
+  obj.__class__ = type(cls.__name__, (cls,), namespace)
+
+
+# The class obj had before it was instrumented.
+def uninstrumented_type(obj) -> type:
+  cls = type(obj)
+  return vars(cls).get('_uninstrumented_class', cls)
+
+
+def instrument(players: list[Player], stats: CallStats):
+  for p in players:
+    _wrap(p, p.name, PLAYER_METHODS, stats)
+    _wrap(p.bidding_strat, type(p.bidding_strat).__name__, STRATEGY_METHODS, stats)
+    _wrap(p.playing_strat, type(p.playing_strat).__name__, STRATEGY_METHODS, stats)
+
+
+def uninstrument(players: list[Player]):
+  for p in players:
+    for obj in (p, p.bidding_strat, p.playing_strat):
+      cls = vars(type(obj)).get('_uninstrumented_class')
+      if cls is not None:
+        obj.__class__ = cls
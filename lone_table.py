@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import multiprocessing
+import os
+import random
+import struct
+from array import array
+from typing import Callable
+
+from basic_strategies import PlayingStrategy, BasicPlayer
+from cards import Suit, Card
+from constants import DECK_SIZE, FULL_DECK, HAND_SIZE, PLAYER_COUNT
+from game import Hand
+from player import Player
+from replay import ReplayBidder
+from simulation import game_seed, split_games
+from trick_table import NUM_CELLS, hand_cells
+
+# Chance of making a lone hand, looked up by the same hand features as
+# trick_table, for each trump choice. Built offline by having the first bidder go
+# alone with every trump on sampled deals and playing each out two ways: with the
+# partner giving two cards (give_two_to_partner, as games are played), and solo,
+# where the partner gives nothing and the bidder only gets the kitty.
+_MAGIC = b'BLT1'
+_HEADER = struct.Struct('<4sI')
+GIVE_TWO = 0
+SOLO = 1
+MODES = (GIVE_TWO, SOLO)
+
+
+# Partner sitting out a solo lone hand.
+class _NoGift(PlayingStrategy):
+  __slots__ = ()
+
+  def give_two_to_partner(self, hand: list[Card], trump: Suit) -> list[Card]:
+    return []
+
+
+class LoneTable:
+  def __init__(self):
+    # [mode * NUM_CELLS + cell]
+    self.made = array('I', [0]) * (len(MODES) * NUM_CELLS)
+    self.counts = array('I', [0]) * (len(MODES) * NUM_CELLS)
+
+  def add(self, mode: int, cell: int, made: bool):
+    self.made[mode * NUM_CELLS + cell] += made
+    self.counts[mode * NUM_CELLS + cell] += 1
+
+  def merge(self, other: 'LoneTable'):
+    for i in range(len(self.counts)):
+      self.made[i] += other.made[i]
+      self.counts[i] += other.counts[i]
+
+  # Cells with fewer than min_count samples count as never made.
+  def success_rate(self, cell: int, mode: int = GIVE_TWO, min_count: int = 1) -> float:
+    i = mode * NUM_CELLS + cell
+    if self.counts[i] < min_count:
+      return 0
+    return self.made[i] / self.counts[i]
+
+  # The trump most likely to make a lone hand with, and the chance of making it.
+  def best_lone(self, hand: list[Card], mode: int = GIVE_TWO, min_count: int = 1) -> tuple[Suit, float]:
+    cells = hand_cells(hand)
+    rates = {s: self.success_rate(cells[s], mode, min_count) for s in Suit}
+    best = max(rates, key=rates.get)
+    return best, rates[best]
+
+  def save(self, path: str):
+    with open(path, 'wb') as f:
+      f.write(_HEADER.pack(_MAGIC, NUM_CELLS))
+      self.made.tofile(f)
+      self.counts.tofile(f)
+
+  @staticmethod
+  def load(path: str) -> 'LoneTable':
+    table = LoneTable()
+    with open(path, 'rb') as f:
+      magic, num_cells = _HEADER.unpack(f.read(_HEADER.size))
+      assert magic == _MAGIC and num_cells == NUM_CELLS, f'{path} is not a lone table for these features'
+      table.made = array('I')
+      table.made.fromfile(f, len(MODES) * num_cells)
+      table.counts = array('I')
+      table.counts.fromfile(f, len(MODES) * num_cells)
+    return table
+
+
+# Whether seat 0 makes a lone hand in trump on the deal.
+def play_lone(deal: list[int], trump: Suit, mode: int, playing_strats: list[PlayingStrategy]) -> bool:
+  if mode == SOLO:
+    playing_strats = playing_strats.copy()
+    playing_strats[2] = _NoGift()
+  players = [Player(ReplayBidder((HAND_SIZE + 1, trump) if i == 0 else None), playing_strats[i], name=str(i))
+             for i in range(PLAYER_COUNT)]
+  result = Hand(players, 0, [0, 0], 12).play_hand(deal=deal)
+  return result[0] > 0
+
+
+def build_lone_table_chunk(master_seed: int,
+                           start: int,
+                           stop: int,
+                           make_playing_strat: Callable[[], PlayingStrategy] = BasicPlayer) -> LoneTable:
+  table = LoneTable()
+  for i in range(start, stop):
+    random.seed(game_seed(master_seed, i))
+    deal = random.sample(range(DECK_SIZE), k=DECK_SIZE)
+    cells = hand_cells([FULL_DECK[d] for d in deal[:HAND_SIZE]])
+    for trump in Suit:
+      for mode in MODES:
+        playing_strats = [make_playing_strat() for _ in range(PLAYER_COUNT)]
+        table.add(mode, cells[trump], play_lone(deal, trump, mode, playing_strats))
+  return table
+
+
+def _build_chunk(args: tuple) -> LoneTable:
+  return build_lone_table_chunk(*args)
+
+
+def build_lone_table(num_deals: int,
+                     master_seed: int = 0,
+                     num_workers: int = 1,
+                     make_playing_strat: Callable[[], PlayingStrategy] = BasicPlayer) -> LoneTable:
+  table = LoneTable()
+  if num_workers <= 1:
+    table.merge(build_lone_table_chunk(master_seed, 0, num_deals, make_playing_strat))
+    return table
+  chunks = [(master_seed, start, stop, make_playing_strat) for start, stop in split_games(num_deals, num_workers)]
+  with multiprocessing.Pool(num_workers) as pool:
+    for chunk_table in pool.imap_unordered(_build_chunk, chunks):
+      table.merge(chunk_table)
+  return table
+
+
+if __name__ == '__main__':
+  table = build_lone_table(20000, num_workers=os.cpu_count())
+  table.save('lone_table.bin')
+  for mode, name in ((GIVE_TWO, 'give two'), (SOLO, 'solo')):
+    made = sum(table.made[mode * NUM_CELLS:(mode + 1) * NUM_CELLS])
+    count = sum(table.counts[mode * NUM_CELLS:(mode + 1) * NUM_CELLS])
+    print(f'{name}: made {made} of {count} lone hands')
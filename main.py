@@ -1,45 +1,102 @@
 #!/usr/bin/env python3
 import logging
+import random
 import time
+from typing import Optional
 
 from game import Game
 from player import Player
 from basic_strategies import RandomBidder, RandomPlayer, BasicBidder, BasicPlayer, GoodBidder, GoodPlayer
+from instrumentation import CallStats, instrument, uninstrument
+from checkpoint import play_games_checkpointed
+from simulation import GameTotals, look_alpha, num_looks, play_games_parallel, play_games_sequential, z_score
 
-def run_many_games(game: Game, num_games_to_run: int):
-  logging.info(f'Running {num_games_to_run} games')
+# num_workers > 1 spreads the games over a process pool. Giving a master_seed makes
+# the run reproducible - the totals are the same for any num_workers.
+#
+# Giving alpha stops early, as soon as the teams' margins (or win rates, with
+# decide_on='wins') are told apart at that error rate. num_games_to_run is then
+# the most games played.
+#
+# duplicate plays every game's cards a second time with the teams swapped, see
+# simulation.play_seeded_games. Counts, margins and intervals are then for the
+# pairs.
+#
+# instrumented adds call counts and latencies of the players and their strategies
+# to the report, see instrumentation.
+#
+# results_path streams every game's score to that file and checkpoints the
+# totals next to it, so a run that's stopped picks up where it left off when run
+# again with the same path, see checkpoint. It plays a fixed number of games, so
+# can't be combined with alpha, or with instrumented.
+def run_many_games(game: Game,
+                   num_games_to_run: int,
+                   num_workers: int = 1,
+                   master_seed: Optional[int] = None,
+                   alpha: Optional[float] = None,
+                   decide_on: str = 'margin',
+                   duplicate: bool = False,
+                   instrumented: bool = False,
+                   results_path: Optional[str] = None):
+  logging.info(f'Running {num_games_to_run} {"duplicate pairs of " if duplicate else ""}games')
 
-  victories = [0,0]
-  team_0_diff = 0
+  if results_path is not None and (alpha is not None or instrumented):
+    raise ValueError('results_path can\'t be used with alpha or instrumented')
 
   start = time.clock_gettime(time.CLOCK_MONOTONIC)
-  for i in range (num_games_to_run):
-    score = game.play_game(num_hands=12)
-    team_0_diff += score[0] - score[1]
-    if score[0] > score[1]:
-      victories[0] += 1
-    elif score[0] < score[1]:
-      victories[1] += 1
-    else:
-      # Tie, doesn't affect accumulated stats
-      continue
+  if results_path is not None:
+    totals = play_games_checkpointed(game, num_games_to_run, results_path, master_seed, num_workers,
+                                     duplicate=duplicate)
+  elif alpha is not None:
+    if master_seed is None:
+      master_seed = random.randrange(2**32)
+    logging.warning(f'Master seed {master_seed}, {num_workers} workers, stopping early at alpha {alpha}')
+    totals, decided = play_games_sequential(game, num_games_to_run, master_seed, num_workers, alpha,
+                                            decide_on=decide_on, duplicate=duplicate, instrumented=instrumented)
+    logging.warning(f'{"Decided" if decided else "Not decided"} after {totals.num_games} games')
+  elif master_seed is None and num_workers <= 1 and not duplicate:
+    totals = GameTotals()
+    if instrumented:
+      totals.call_stats = CallStats()
+      instrument(game.players, totals.call_stats)
+    for i in range (num_games_to_run):
+      totals.add(game.play_game(num_hands=12))
+    if instrumented:
+      uninstrument(game.players)
+  else:
+    if master_seed is None:
+      master_seed = random.randrange(2**32)
+    logging.warning(f'Master seed {master_seed}, {num_workers} workers')
+    totals = play_games_parallel(game, num_games_to_run, master_seed, num_workers, duplicate=duplicate,
+                                 instrumented=instrumented)
   end = time.clock_gettime(time.CLOCK_MONOTONIC)
   logging.warning(f'Took {end-start} seconds.')
 
-  logging.warning(f'{game.team0}: {victories[0]} games')
-  logging.warning(f'{game.team1}: {victories[1]} games')
-  logging.warning(f'Avg margin for {game.team0} = {team_0_diff/num_games_to_run}')
+  unit = 'pairs' if duplicate else 'games'
+  logging.warning(f'{game.team0}: {totals.victories[0]} {unit}')
+  logging.warning(f'{game.team1}: {totals.victories[1]} {unit}')
+  logging.warning(f'Avg {"paired " if duplicate else ""}margin for {game.team0} = {totals.team_0_diff/totals.num_games}')
+  # After stopping early the intervals are at the level the last look was
+  # tested at, which is the one the stopping rule's error rate holds for.
+  report_alpha = look_alpha(alpha, num_looks(totals.num_games)) if alpha is not None else 0.05
+  z = z_score(report_alpha)
+  margin_low, margin_high = totals.margin_interval(z)
+  win_low, win_high = totals.win_rate_interval(z)
+  logging.warning(f'{100 * (1 - report_alpha):.4g}% interval for margin: [{margin_low:.2f}, {margin_high:.2f}], '
+                  f'for {game.team0} win rate: [{win_low:.3f}, {win_high:.3f}]')
+  if totals.call_stats is not None:
+    logging.warning('Calls:\n' + totals.call_stats.summary())
 
 
-logging.basicConfig(level=logging.DEBUG, format='%(message)s')
-g = Game([Player(BasicBidder(), BasicPlayer(), name='A'),
-          Player(GoodBidder(), BasicPlayer(), name='b'),
-          Player(BasicBidder(), BasicPlayer(), name='C'),
-          Player(GoodBidder(), BasicPlayer(), name='d')])
-run_many_games(g, 100)
+if __name__ == '__main__':
+  logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+  g = Game([Player(BasicBidder(), BasicPlayer(), name='A'),
+            Player(GoodBidder(), BasicPlayer(), name='b'),
+            Player(BasicBidder(), BasicPlayer(), name='C'),
+            Player(GoodBidder(), BasicPlayer(), name='d')])
+  run_many_games(g, 100)
 
 # Things to figure out:
 # - Does algorithm of most constrained -> least work for biased card distribution?
-# - Multiprocessing for faster games
 # - What is the probability of getting a lone hand if forced to?
 # - Function for probability of winning at all given score diff with hands remaining  
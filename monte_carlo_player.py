@@ -0,0 +1,338 @@
+from typing import Optional
+import random
+import time
+
+from basic_strategies import BasicPlayer, PlayingStrategy, Bid
+from bitboard import CardIndex
+from cards import Suit, Card, Trick
+from constants import HAND_SIZE, PLAYER_COUNT
+from deal_sampler import DealSampler
+from solver import DoubleDummySolver
+
+# Determinized Monte Carlo play: deal the cards this player hasn't seen to the
+# other seats in ways that agree with everything seen so far (see deal_sampler),
+# play every legal card out in each of those worlds, and play the card that took
+# the most tricks on average.
+#
+# Worlds are kept between decisions of the same hand. The cards played since are
+# taken out of each, worlds that no longer agree with the play are dropped, and
+# new ones are only dealt to top back up to the budget. Once few enough tricks
+# are left the worlds are solved exactly, with a solver per trump whose
+# transposition table carries over between worlds, tricks and hands.
+
+# Solver tables are cleared past this many positions.
+MAX_SOLVER_POSITIONS = 1 << 18
+
+
+# One deal of the unseen cards: hands[seat] masks, and how many of the plays seen
+# this hand have been taken out of them.
+class _World:
+  def __init__(self, hands: list[int], applied: int):
+    self.hands = hands
+    self.applied = applied
+
+
+class MonteCarloPlayer(BasicPlayer):
+  __slots__ = ('max_samples', 'time_budget', 'solver_tricks', 'solvers', 'my_seat', 'out_of_game', 'seats', 'index',
+               'plays', 'void_masks', 'worlds')
+
+  uses_bitboard = True
+
+  # max_samples worlds are played out per decision, fewer if time_budget seconds
+  # run out first. Positions with solver_tricks tricks or fewer left are solved
+  # instead of rolled out.
+  def __init__(self, max_samples: int = 24, time_budget: Optional[float] = None, solver_tricks: int = 3):
+    self.max_samples = max_samples
+    self.time_budget = time_budget
+    self.solver_tricks = solver_tricks
+    self.solvers: dict[Suit, DoubleDummySolver] = {}
+
+  def start_hand(self,
+                 hand: list[Card],
+                 bids: list[Bid],
+                 my_index: int,
+                 known_missing_cards: Optional[list[Card]] = None):
+    super().start_hand(hand, bids, my_index, known_missing_cards)
+    self.my_seat = my_index
+    declarer = max((i for i, b in enumerate(bids) if b), key=lambda i: bids[i][0])
+    self.out_of_game = (declarer + 2) % PLAYER_COUNT if bids[declarer][0] > HAND_SIZE else None
+    self.seats = [s for s in range(PLAYER_COUNT) if s != self.out_of_game]
+    self.index = CardIndex.for_trump(bids[declarer][1])
+    # (seat, card) for every card played this hand, and a mask per seat of the
+    # suits it has shown out of.
+    self.plays: list[tuple[int, Card]] = []
+    self.void_masks = [0] * PLAYER_COUNT
+    self.worlds: list[_World] = []
+
+  # my_index is how many seats after the leader this player sits, counting a seat
+  # sitting out a lone hand.
+  def update(self, cards_laid: Trick, cards_remaining: list[Card], my_index: int):
+    leader = (self.my_seat - my_index) % PLAYER_COUNT
+    self._record_plays(self._order_from(leader), cards_laid)
+    self.card_predictor.update(cards_laid, cards_remaining, my_index)
+
+  def lead_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int) -> Card:
+    return self._choose(index, hand_mask, remaining_mask, [])
+
+  def follow_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int, cards_laid: Trick) -> Card:
+    return self._choose(index, hand_mask, remaining_mask, cards_laid)
+
+  # Seats still in the hand in play order, with this player pos'th.
+  def _order(self, pos: int) -> list[int]:
+    return self._order_from(self.seats[(self.seats.index(self.my_seat) - pos) % len(self.seats)])
+
+  def _order_from(self, leader: int) -> list[int]:
+    start = self.seats.index(leader)
+    return self.seats[start:] + self.seats[:start]
+
+  def _record_plays(self, order: list[int], trick: list[Card]):
+    led_mask = self.index.suit_masks[trick[0].suit]
+    for seat, c in zip(order, trick):
+      self.plays.append((seat, c))
+      if c.suit != trick[0].suit:
+        self.void_masks[seat] |= led_mask
+
+  def _solver(self, trump: Suit) -> DoubleDummySolver:
+    solver = self.solvers.get(trump)
+    if solver is None:
+      solver = DoubleDummySolver(trump)
+      self.solvers[trump] = solver
+    elif len(solver.tt) > MAX_SOLVER_POSITIONS:
+      solver.tt.clear()
+    return solver
+
+  def _choose(self, index: CardIndex, hand_mask: int, remaining_mask: int, trick: list[Card]) -> Card:
+    if trick:
+      moves = PlayingStrategy.get_legal_plays_mask(index, hand_mask, trick)
+    else:
+      moves = hand_mask
+    # One id per distinct card.
+    candidates = {}
+    m = moves
+    while m:
+      low = m & -m
+      m ^= low
+      candidates.setdefault(index.cards[low.bit_length() - 1], low.bit_length() - 1)
+    if len(candidates) == 1:
+      return next(iter(candidates))
+
+    start = time.perf_counter()
+    solver = self._solver(index.trump)
+    pos = len(trick)
+    order = self._order(pos)
+    unseen = remaining_mask & ~hand_mask
+    tricks_left = hand_mask.bit_count()
+    sizes = [0] * PLAYER_COUNT
+    for j, seat in enumerate(order):
+      if seat != self.my_seat:
+        sizes[seat] = tricks_left - 1 if j < pos else tricks_left
+    # Ids for the cards already in the trick, out of the way of every hand.
+    trick_ids = []
+    used = remaining_mask
+    for c in trick:
+      free = index.card_masks[c] & ~used
+      bit = free & -free
+      used |= bit
+      trick_ids.append(bit.bit_length() - 1)
+
+    plays = self.plays + list(zip(order, trick))
+    void_masks = self.void_masks.copy()
+    for seat, c in zip(order, trick):
+      if c.suit != trick[0].suit:
+        void_masks[seat] |= index.suit_masks[trick[0].suit]
+    worlds = []
+    for world in self.worlds:
+      if self._catch_up(index, world, plays, unseen, void_masks):
+        worlds.append(world)
+
+    totals = {c: 0 for c in candidates}
+    samples = 0
+    sampler = None
+    while samples < self.max_samples:
+      if self.time_budget is not None and samples and time.perf_counter() - start > self.time_budget:
+        break
+      if samples < len(worlds):
+        world = worlds[samples]
+      else:
+        if sampler is None:
+          sampler = self._deal_sampler(index, unseen, sizes, void_masks, trick, order[0])
+        dealt = sampler.sample()
+        if dealt is None:
+          break
+        hands = [0] * PLAYER_COUNT
+        for k, hand in enumerate(dealt[:PLAYER_COUNT - 1]):
+          hands[(self.my_seat + k + 1) % PLAYER_COUNT] = hand
+        world = _World(hands, len(plays))
+        worlds.append(world)
+      samples += 1
+
+      hands = world.hands.copy()
+      hands[self.my_seat] = hand_mask
+      if tricks_left <= self.solver_tricks:
+        values = solver.solve_moves(hands, order, trick_ids)
+        for c, i in candidates.items():
+          totals[c] += values[i] if self.my_seat % 2 == 0 else tricks_left - values[i]
+      else:
+        for c, i in candidates.items():
+          hands[self.my_seat] = hand_mask ^ (1 << i)
+          totals[c] += self._rollout(solver, hands.copy(), order, trick_ids + [i])
+    self.worlds = worlds
+
+    # Ties go to the cheapest card.
+    best = None
+    for c in sorted(candidates, key=MonteCarloPlayer._throwaway_key):
+      if best is None or totals[c] > totals[best]:
+        best = c
+    return best
+
+  # Takes the plays made since the world was dealt out of it. False if it doesn't
+  # agree with them any more.
+  def _catch_up(self, index: CardIndex, world: _World, plays: list[tuple[int, Card]], unseen: int,
+                void_masks: list[int]) -> bool:
+    hands = world.hands
+    for seat, c in plays[world.applied:]:
+      if seat == self.my_seat:
+        continue
+      bit = index.card_bit(hands[seat], c)
+      if not bit:
+        return False
+      hands[seat] ^= bit
+    world.applied = len(plays)
+    for seat in self.seats:
+      if seat == self.my_seat:
+        continue
+      if hands[seat] & void_masks[seat]:
+        return False
+      # Played cards may have come out of the other copy of a card than the one
+      # the world used. Move those onto the copy that is still unseen.
+      stray = hands[seat] & ~unseen
+      while stray:
+        low = stray & -stray
+        stray ^= low
+        hands[seat] ^= low | (index.card_masks[index.cards[low.bit_length() - 1]] ^ low)
+    return True
+
+  # Uniform deals of unseen to the other seats, sizes[seat] cards each and the
+  # rest to the kitty or the partner sitting out, agreeing with the card
+  # predictor: no suit a seat has shown out of, and the cards its bid showed.
+  # Bids only show what a strategy like GoodBidder would mean by them, so if no
+  # deal fits that the bids are dropped and only the voids kept.
+  def _deal_sampler(self, index: CardIndex, unseen: int, sizes: list[int], void_masks: list[int], trick: list[Card],
+                    leader: int) -> DealSampler:
+    others = [(self.my_seat + k + 1) % PLAYER_COUNT for k in range(PLAYER_COUNT - 1)]
+    sampler = self.card_predictor.deal_sampler(index, unseen, [sizes[s] for s in others], trick,
+                                               (self.my_seat - leader) % PLAYER_COUNT)
+    if sampler.count():
+      return sampler
+    allowed = [unseen & ~void_masks[s] for s in others]
+    return DealSampler(unseen, [sizes[s] for s in others] + [unseen.bit_count() - sum(sizes)], allowed + [unseen])
+
+  # Plays the hand out from a trick in progress with a quick greedy policy, all
+  # hands open. Returns the tricks this player's team takes from this trick on.
+  def _rollout(self, solver: DoubleDummySolver, hands: list[int], order: list[int], trick: list[int]) -> int:
+    suit_of = solver.suit_of
+    suit_masks = solver.suit_masks
+    my_team = self.my_seat % 2
+    won = 0
+    while True:
+      if not trick:
+        leader = order[0]
+        trick = [self._greedy_lead(solver, hands, leader)]
+        hands[leader] ^= 1 << trick[0]
+      led = suit_of[trick[0]]
+      ranks = solver.trick_ranks[led]
+      best_rank = -1
+      for seat, i in zip(order, trick):
+        if ranks[i] > best_rank:
+          best_rank = ranks[i]
+          best_seat = seat
+      for seat in order[len(trick):]:
+        hand = hands[seat]
+        moves = hand & suit_masks[led] or hand
+        i = MonteCarloPlayer._greedy_follow(solver, moves, ranks, best_rank, best_seat % 2 == seat % 2)
+        hands[seat] = hand ^ (1 << i)
+        if ranks[i] > best_rank:
+          best_rank = ranks[i]
+          best_seat = seat
+      if best_seat % 2 == my_team:
+        won += 1
+      if not hands[best_seat]:
+        return won
+      order = self._order_from(best_seat)
+      trick = []
+
+  # Like BasicPlayer: a card nothing left can beat, else a top card only trump
+  # can beat, else a random card.
+  def _greedy_lead(self, solver: DoubleDummySolver, hands: list[int], leader: int) -> int:
+    hand = hands[leader]
+    others = 0
+    for s in self.seats:
+      if s != leader:
+        others |= hands[s]
+    trumps_out = others & solver.suit_masks[0]
+    selection = None
+    for suit, suit_mask in enumerate(solver.suit_masks):
+      mine = hand & suit_mask
+      if not mine:
+        continue
+      top = (mine & -mine).bit_length() - 1
+      theirs = others & suit_mask
+      if theirs and (theirs & -theirs).bit_length() - 1 < solver.first_copy[top]:
+        continue
+      if suit == 0 or not trumps_out:
+        return top
+      if selection is None:
+        selection = top
+    if selection is not None:
+      return selection
+    m = hand
+    for _ in range(random.randrange(hand.bit_count())):
+      m &= m - 1
+    return (m & -m).bit_length() - 1
+
+  # The cheapest card that takes the trick from the other team, or the cheapest
+  # card if partner is winning or nothing wins.
+  @staticmethod
+  def _greedy_follow(solver: DoubleDummySolver, moves: int, ranks: list[int], best_rank: int,
+                     partner_winning: bool) -> int:
+    winner = None
+    throwaway = None
+    throwaway_key = None
+    cards = solver.index.cards
+    while moves:
+      low = moves & -moves
+      moves ^= low
+      i = low.bit_length() - 1
+      if not partner_winning and ranks[i] > best_rank and (winner is None or ranks[i] < ranks[winner]):
+        winner = i
+      key = MonteCarloPlayer._throwaway_key(cards[i])
+      if throwaway is None or key < throwaway_key:
+        throwaway = i
+        throwaway_key = key
+    return throwaway if winner is None else winner
+
+  # Order of BasicPlayer.basic_throwaway: low offsuit cards first, then low trump.
+  @staticmethod
+  def _throwaway_key(card: Card) -> tuple[bool, int]:
+    return (card.suit == Suit.TRUMP, card.number)
+
+
+if __name__ == '__main__':
+  import os
+  import sys
+  from basic_strategies import GoodBidder
+  from game import Game
+  from player import Player
+  from simulation import play_games_parallel
+
+  num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+  game = Game([Player(GoodBidder(), MonteCarloPlayer(), name='MC1'),
+               Player(GoodBidder(), BasicPlayer(), name='basic1'),
+               Player(GoodBidder(), MonteCarloPlayer(), name='MC2'),
+               Player(GoodBidder(), BasicPlayer(), name='basic2')])
+  start = time.perf_counter()
+  totals = play_games_parallel(game, num_games, master_seed=0, num_workers=os.cpu_count())
+  elapsed = time.perf_counter() - start
+  print(f'{game.team0} won {totals.victories[0]} of {totals.num_games} games against {game.team1}, '
+        f'{totals.victories[1]} lost, margin {totals.team_0_diff / totals.num_games:+.2f} a game, '
+        f'{elapsed / totals.num_games:.2f} s a game')
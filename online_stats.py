@@ -0,0 +1,160 @@
+import math
+from typing import Iterable, Iterator
+
+from constants import PLAYER_COUNT
+from game_record import GameRecord
+
+# Aggregators over a stream of GameRecords that take the same memory however
+# many games go through them. Each has add(record) and merge(other), so streams
+# split over workers can be combined.
+
+
+# Mean and variance of one of the records' int fields (or margin), by Welford's
+# method so a long run doesn't lose precision.
+class RunningStats:
+  def __init__(self, field: str = 'margin'):
+    self.field = field
+    self.count = 0
+    self.mean = 0.0
+    # Sum of squared differences from the mean.
+    self.m2 = 0.0
+    self.min = math.inf
+    self.max = -math.inf
+
+  def add(self, record: GameRecord):
+    x = getattr(record, self.field)
+    self.count += 1
+    delta = x - self.mean
+    self.mean += delta / self.count
+    self.m2 += delta * (x - self.mean)
+    self.min = min(self.min, x)
+    self.max = max(self.max, x)
+
+  def merge(self, other: 'RunningStats'):
+    count = self.count + other.count
+    if not count:
+      return
+    delta = other.mean - self.mean
+    self.m2 += other.m2 + delta * delta * self.count * other.count / count
+    self.mean += delta * other.count / count
+    self.count = count
+    self.min = min(self.min, other.min)
+    self.max = max(self.max, other.max)
+
+  def variance(self) -> float:
+    return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+  def stddev(self) -> float:
+    return math.sqrt(self.variance())
+
+
+# Count of games by team 0's margin, in buckets of bucket_width. Margins can't
+# be more than a game's points, which caps the number of buckets.
+class MarginHistogram:
+  def __init__(self, bucket_width: int = 1):
+    self.bucket_width = bucket_width
+    self.counts: dict[int, int] = {}
+    self.count = 0
+
+  def add(self, record: GameRecord):
+    bucket = record.margin // self.bucket_width
+    self.counts[bucket] = self.counts.get(bucket, 0) + 1
+    self.count += 1
+
+  def merge(self, other: 'MarginHistogram'):
+    assert other.bucket_width == self.bucket_width
+    for bucket, c in other.counts.items():
+      self.counts[bucket] = self.counts.get(bucket, 0) + c
+    self.count += other.count
+
+  # Lower edge of the bucket the q quantile falls in.
+  def quantile(self, q: float) -> int:
+    target = q * self.count
+    seen = 0
+    for bucket in sorted(self.counts):
+      seen += self.counts[bucket]
+      if seen >= target:
+        return bucket * self.bucket_width
+    return 0
+
+  def summary(self, bar_width: int = 50) -> str:
+    if not self.count:
+      return ''
+    most = max(self.counts.values())
+    return '\n'.join(f'{bucket * self.bucket_width:+5} {self.counts[bucket]:9} '
+                     f'{"#" * round(bar_width * self.counts[bucket] / most)}'
+                     for bucket in sorted(self.counts))
+
+
+# For each seat, how often it won the bidding and made or was set, and its lone
+# hands.
+class BidSuccess:
+  def __init__(self):
+    self.bids_made = [0] * PLAYER_COUNT
+    self.bids_set = [0] * PLAYER_COUNT
+    self.lone_attempted = [0] * PLAYER_COUNT
+    self.lone_made = [0] * PLAYER_COUNT
+
+  def add(self, record: GameRecord):
+    for seat in range(PLAYER_COUNT):
+      self.bids_made[seat] += record.bids_made[seat]
+      self.bids_set[seat] += record.bids_set[seat]
+      self.lone_attempted[seat] += record.lone_attempted[seat]
+      self.lone_made[seat] += record.lone_made[seat]
+
+  def merge(self, other: 'BidSuccess'):
+    for seat in range(PLAYER_COUNT):
+      self.bids_made[seat] += other.bids_made[seat]
+      self.bids_set[seat] += other.bids_set[seat]
+      self.lone_attempted[seat] += other.lone_attempted[seat]
+      self.lone_made[seat] += other.lone_made[seat]
+
+  def bid_rate(self, seat: int) -> float:
+    bids = self.bids_made[seat] + self.bids_set[seat]
+    return self.bids_made[seat] / bids if bids else 0.0
+
+  def lone_rate(self, seat: int) -> float:
+    return self.lone_made[seat] / self.lone_attempted[seat] if self.lone_attempted[seat] else 0.0
+
+  def summary(self, names: list[str]) -> str:
+    lines = [f'{"Seat":<10} {"Bids":>7} {"Made":>7} {"Lone":>6} {"Made":>7}']
+    for seat, name in enumerate(names):
+      lines.append(f'{name:<10} {self.bids_made[seat] + self.bids_set[seat]:7} {self.bid_rate(seat):7.1%} '
+                   f'{self.lone_attempted[seat]:6} {self.lone_rate(seat):7.1%}')
+    return '\n'.join(lines)
+
+
+# Passes records through, adding each one to every aggregator on the way, so
+# more steps can be chained after it.
+def tap(records: Iterable[GameRecord], aggregators: list) -> Iterator[GameRecord]:
+  for record in records:
+    for aggregator in aggregators:
+      aggregator.add(record)
+    yield record
+
+
+# Adds every record to the aggregators, keeping none of them.
+def feed(records: Iterable[GameRecord], aggregators: list):
+  for _ in tap(records, aggregators):
+    pass
+
+
+if __name__ == '__main__':
+  from basic_strategies import BasicBidder, BasicPlayer, GoodBidder
+  from game import Game
+  from game_record import game_records
+  from player import Player
+
+  game = Game([Player(GoodBidder(), BasicPlayer(), name='A'),
+               Player(BasicBidder(), BasicPlayer(), name='b'),
+               Player(GoodBidder(), BasicPlayer(), name='C'),
+               Player(BasicBidder(), BasicPlayer(), name='d')])
+  margins = RunningStats()
+  hands = RunningStats('hands_played')
+  histogram = MarginHistogram(bucket_width=5)
+  bids = BidSuccess()
+  feed(game_records(game, 1000, master_seed=0), [margins, hands, histogram, bids])
+  print(f'Margin for {game.team0}: {margins.mean:+.2f} +- {margins.stddev():.2f}, '
+        f'{hands.mean:.2f} hands a game')
+  print(histogram.summary())
+  print(bids.summary([p.name for p in game.players]))
@@ -1,29 +1,45 @@
 from typing import Optional
 import logging
 
-from cards import Suit, Card
+from bitboard import CardIndex
+from cards import Suit, Card, Trick
 from basic_strategies import BiddingStrategy, PlayingStrategy, Bid
 
 class Player:
+  __slots__ = ('bidding_strat', 'playing_strat', 'name', 'hand', 'discarded_cards', 'card_index', 'hand_mask',
+               'discard_mask', 'unseen_mask', 'last_card_bit', 'team')
+
   def __init__(self, bidding_strat: BiddingStrategy, playing_strat: PlayingStrategy, name='?'):
     self.bidding_strat = bidding_strat
     self.playing_strat = playing_strat
     self.name = name
     self.hand = []
     self.discarded_cards = None
+    # Bitmask mirrors of hand and discarded_cards, see bitboard.CardIndex.
+    self.card_index = None
+    self.hand_mask = 0
+    self.discard_mask = 0
+    # Cards not in hand, not discarded and not laid yet. Kept up to date by card_laid.
+    self.unseen_mask = 0
+    self.last_card_bit = 0
+    self.team = False
 
   def deal_hand(self, hand: list[Card], team: bool):
-    self.hand = sorted(hand, reverse=True)
+    # Into the last hand's list rather than a new one.
+    self.hand.clear()
+    self.hand.extend(hand)
+    self.hand.sort(reverse=True)
     self.discarded_cards = None
     self.team = team
 
   def bid(self, prev_bids: list[Bid], curr_bid: int, score_delta: int, hands_left: int) -> Bid:
     b = self.bidding_strat.bid(self.hand, prev_bids, curr_bid, score_delta, hands_left)
-    if b:
-      logging.info(f'{self.name} bidding {b[0]}{b[1]}')
-    else:
-      logging.info(f'{self.name} passing')
-    logging.debug('   with hand ' + Card.stringify(self.hand))
+    if logging.getLogger().isEnabledFor(logging.INFO):
+      if b:
+        logging.info(f'{self.name} bidding {b[0]}{b[1]}')
+      else:
+        logging.info(f'{self.name} passing')
+      logging.debug('   with hand ' + Card.stringify(self.hand))
     return b
 
   def bidding_finished(self,
@@ -32,8 +48,8 @@ class Player:
                        my_index: int,
                        kitty: Optional[list[Card]] = None,
                        partner_alone: Optional[bool] = None) -> Optional[list[Card]]:
-    if trump != Suit.TRUMP:
-      self.hand = Card.convert_to_trump(self.hand, trump)
+    Card.convert_in_place(self.hand, trump)
+    self.card_index = CardIndex.for_trump(trump)
     if partner_alone:
       give_two = self.playing_strat.give_two_to_partner(self.hand, trump)
       for c in give_two:
@@ -41,42 +57,61 @@ class Player:
       return give_two
 
     if kitty:
-      logging.debug(f'{self.name} wins kitty {Card.stringify(kitty)}')
-      kitty = Card.convert_to_trump(kitty, trump)
+      log = logging.getLogger().isEnabledFor(logging.DEBUG)
+      if log:
+        logging.debug(f'{self.name} wins kitty {Card.stringify(kitty)}')
+      Card.convert_in_place(kitty, trump)
       self.hand.extend(kitty)
       self.discarded_cards = self.playing_strat.take_kitty(self.hand, len(kitty))
       for d in self.discarded_cards:
         self.hand.remove(d)
-      logging.debug(f'{self.name} discards {Card.stringify(self.discarded_cards)}')
+      if log:
+        logging.debug(f'{self.name} discards {Card.stringify(self.discarded_cards)}')
 
-    self.playing_strat.start_hand(hand, prev_bids, my_index, self.discarded_cards)
+    self.playing_strat.start_hand(self.hand, prev_bids, my_index, self.discarded_cards)
     if kitty:
       return self.discarded_cards
 
 
-  def update(self, cards_laid: dict[int, Card], cards_remaining: list[Card], my_index: int):
-    cr = cards_remaining.copy()
-    for c in self.hand:
-      cr.remove(c)
-    self.playing_strat.update(cards_laid, cr, my_index)
+  # Gives the cards in hand and the discards ids that aren't in taken, so that
+  # every player's masks use the same id for the same physical card. Returns the
+  # ids taken after this player's.
+  def assign_card_ids(self, taken: int) -> int:
+    self.hand_mask = self.card_index.to_mask(self.hand, taken)
+    taken |= self.hand_mask
+    self.discard_mask = self.card_index.to_mask(self.discarded_cards or [], taken)
+    taken |= self.discard_mask
+    self.unseen_mask = self.card_index.full_mask & ~self.hand_mask & ~self.discard_mask
+    return taken
+
+  def card_laid(self, card_bit: int):
+    self.unseen_mask &= ~card_bit
 
-  def play_card(self, cards_laid: dict[int, Card], cards_remaining: list[Card]) -> Card:
-    cards_laid
-    if self.discarded_cards:
-      cards_remaining = cards_remaining.copy()
-      for x in self.discarded_cards:
-        cards_remaining.remove(x)
+  def update(self, cards_laid: Trick, my_index: int):
+    cards_remaining = self.card_index.to_cards(self.unseen_mask | self.discard_mask)
+    self.playing_strat.update(cards_laid, cards_remaining, my_index)
 
-    if cards_laid:
-      card = self.playing_strat.follow(self.hand, cards_remaining, cards_laid)
+  def play_card(self, cards_laid: Trick) -> Card:
+    remaining_mask = self.unseen_mask | self.hand_mask
+    cards_remaining = None
+    if self.playing_strat.uses_bitboard:
+      if cards_laid:
+        card = self.playing_strat.follow_mask(self.card_index, self.hand_mask, remaining_mask, cards_laid)
+      else:
+        card = self.playing_strat.lead_mask(self.card_index, self.hand_mask, remaining_mask)
     else:
-      card = self.playing_strat.lead(self.hand, cards_remaining)
+      cards_remaining = self.card_index.to_cards(remaining_mask)
+      if cards_laid:
+        card = self.playing_strat.follow(self.hand, cards_remaining, cards_laid)
+      else:
+        card = self.playing_strat.lead(self.hand, cards_remaining)
     if not card:
       logging.error(f'{self.name} failed to play with:')
       logging.error(f'Hand failed to play with: {Card.stringify(self.hand)}')
       logging.error(f'Laid: {Card.stringify(cards_laid)}')
-      logging.error(f'Remaining: {Card.stringify(cards_remaining)}')
+      logging.error(f'Remaining: {Card.stringify(self.card_index.to_cards(remaining_mask))}')
 
     self.hand.remove(card)
+    self.last_card_bit = self.card_index.card_bit(self.hand_mask, card)
+    self.hand_mask ^= self.last_card_bit
     return card
-    
@@ -0,0 +1,86 @@
+import collections
+from typing import Callable, Iterable, Iterator, Optional
+
+from basic_strategies import Bid, BiddingStrategy, PlayingStrategy
+from cards import Suit, Card, Trick
+from constants import PLAYER_COUNT
+from game import Hand
+from hand_record import HandRecord
+from player import Player
+
+# Replays HandRecords through Hand. Seats can be given the recorded decisions back
+# with ReplayBidder/ReplayPlayer to reproduce a hand exactly, or any other
+# strategies to see how they do on the same deal.
+
+
+class ReplayBidder(BiddingStrategy):
+  __slots__ = ('recorded_bid',)
+
+  def __init__(self, bid: Bid):
+    self.recorded_bid = bid
+
+  def bid(self, hand: list[Card], prev_bids: list[Bid], curr_max: int, score_delta: int, hands_left: int) -> Bid:
+    return self.recorded_bid
+
+
+class ReplayPlayer(PlayingStrategy):
+  __slots__ = ('plays', 'discards', 'given')
+
+  def __init__(self, plays: list[Card], discards: list[Card], given: list[Card]):
+    self.plays = collections.deque(plays)
+    self.discards = discards
+    self.given = given
+
+  def start_hand(self,
+                 hand: list[Card],
+                 bids: list[Bid],
+                 my_index: int,
+                 known_missing_cards: Optional[list[Card]] = None):
+    pass
+
+  def update(self, cards_laid: Trick, cards_remaining: list[Card], my_index: int):
+    pass
+
+  def give_two_to_partner(self, hand: list[Card], trump: Suit) -> list[Card]:
+    return self.given
+
+  def lead(self, hand: list[Card], cards_remaining: list[Card]) -> Card:
+    return self.plays.popleft()
+
+  def follow(self, hand: list[Card], cards_remaining: list[Card], cards_laid: Trick) -> Card:
+    return self.plays.popleft()
+
+  def take_kitty(self, hand: list[Card], kitty_size: int) -> list[Card]:
+    return self.discards
+
+
+# Players, in game order, that make exactly the recorded decisions.
+def recorded_players(record: HandRecord, names: Optional[list[str]] = None) -> list[Player]:
+  plays = [[] for _ in range(PLAYER_COUNT)]
+  for seat, card in record.played_cards():
+    plays[seat].append(card)
+  # None if everyone passed, and the hand wasn't played.
+  winner = max((i for i, b in enumerate(record.bids) if b), key=lambda i: record.bids[i][0], default=None)
+  players = [None] * PLAYER_COUNT
+  for seat in range(PLAYER_COUNT):
+    bid = record.bids[seat] if seat < len(record.bids) else None
+    discards = record.discarded_cards() if winner is not None and seat == winner else []
+    given = record.given_cards() if winner is not None and seat == (winner + 2) % PLAYER_COUNT else []
+    game_index = (record.dealer + seat) % PLAYER_COUNT
+    name = names[game_index] if names else str(game_index)
+    players[game_index] = Player(ReplayBidder(bid), ReplayPlayer(plays[seat], discards, given), name=name)
+  return players
+
+
+# Plays the recorded deal with the given players, in game order.
+def replay_hand(record: HandRecord, players: list[Player]) -> tuple[int, int]:
+  h = Hand(players, record.dealer, record.score, record.hands_left)
+  return h.play_hand(deal=list(record.deal))
+
+
+# For each record, the recorded result and the result of the same deal played by
+# make_players(record)'s players.
+def compare_on_records(records: Iterable[HandRecord],
+                       make_players: Callable[[HandRecord], list[Player]]) -> Iterator[tuple[list[int], list[int]]]:
+  for record in records:
+    yield record.result, list(replay_hand(record, make_players(record)))
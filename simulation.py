@@ -0,0 +1,245 @@
+from typing import Iterator, Optional
+import logging
+import math
+import multiprocessing
+import multiprocessing.pool
+import random
+import statistics
+
+from game import Game
+from instrumentation import CallStats, instrument, uninstrument
+
+
+# Aggregate counters for a batch of games. Totals from separate batches can be
+# merged in any order and give the same result.
+class GameTotals:
+  def __init__(self):
+    self.victories = [0, 0]
+    self.team_0_diff = 0
+    # Sum of squared margins, for the variance of the margin.
+    self.team_0_diff_sq = 0
+    self.num_games = 0
+    # Set when the games were instrumented.
+    self.call_stats: Optional[CallStats] = None
+
+  def add(self, score: list[int]):
+    self.num_games += 1
+    diff = score[0] - score[1]
+    self.team_0_diff += diff
+    self.team_0_diff_sq += diff * diff
+    if score[0] > score[1]:
+      self.victories[0] += 1
+    elif score[0] < score[1]:
+      self.victories[1] += 1
+    # Tie, doesn't affect accumulated stats
+
+  def merge(self, other: 'GameTotals'):
+    self.num_games += other.num_games
+    self.team_0_diff += other.team_0_diff
+    self.team_0_diff_sq += other.team_0_diff_sq
+    self.victories[0] += other.victories[0]
+    self.victories[1] += other.victories[1]
+    if other.call_stats is not None:
+      if self.call_stats is None:
+        self.call_stats = CallStats()
+      self.call_stats.merge(other.call_stats)
+
+  def as_dict(self) -> dict:
+    return {'victories': self.victories, 'team_0_diff': self.team_0_diff,
+            'team_0_diff_sq': self.team_0_diff_sq, 'num_games': self.num_games}
+
+  @staticmethod
+  def from_dict(data: dict) -> 'GameTotals':
+    totals = GameTotals()
+    totals.victories = list(data['victories'])
+    totals.team_0_diff = data['team_0_diff']
+    totals.team_0_diff_sq = data['team_0_diff_sq']
+    totals.num_games = data['num_games']
+    return totals
+
+  # Interval for team 0's average margin, z standard errors either side.
+  def margin_interval(self, z: float) -> tuple[float, float]:
+    n = self.num_games
+    if n < 2:
+      return (-math.inf, math.inf)
+    mean = self.team_0_diff / n
+    variance = max(0, self.team_0_diff_sq - n * mean * mean) / (n - 1)
+    half = z * math.sqrt(variance / n)
+    return (mean - half, mean + half)
+
+  # Wilson interval for the share of the games that weren't tied that team 0 won.
+  def win_rate_interval(self, z: float) -> tuple[float, float]:
+    n = self.victories[0] + self.victories[1]
+    if not n:
+      return (0.0, 1.0)
+    p = self.victories[0] / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return (centre - half, centre + half)
+
+  # Whether the interval for decide_on ('margin' or 'wins') excludes the teams
+  # being even.
+  def decided(self, z: float, decide_on: str = 'margin') -> bool:
+    if decide_on == 'margin':
+      low, high = self.margin_interval(z)
+      return low > 0 or high < 0
+    if decide_on == 'wins':
+      low, high = self.win_rate_interval(z)
+      return low > 0.5 or high < 0.5
+    raise ValueError(f'Unknown decide_on {decide_on}')
+
+
+# z for a two sided interval with error rate alpha.
+def z_score(alpha: float) -> float:
+  return statistics.NormalDist().inv_cdf(1 - alpha / 2)
+
+
+# Games between looks in play_games_sequential.
+LOOK_EVERY = 50
+
+
+# Error rate play_games_sequential tests look (counted from 1) at.
+def look_alpha(alpha: float, look: int) -> float:
+  return alpha / (look * (look + 1))
+
+
+# Looks play_games_sequential has taken once num_games games are played.
+def num_looks(num_games: int, look_every: int = LOOK_EVERY) -> int:
+  return math.ceil(num_games / look_every)
+
+
+# Every game is seeded from the master seed and its own index, not from the
+# worker that plays it. That way the totals don't depend on the worker count.
+def game_seed(master_seed: int, game_index: int) -> str:
+  return f'{master_seed}:{game_index}'
+
+
+# With duplicate, each game's deals are played a second time with the two teams
+# swapped into each other's seats, and the pair is added as one game. Team 0's
+# margin is then summed over both sides of the same cards, which takes most of
+# the card luck out of it.
+#
+# With instrumented, the totals come back with the players' call stats.
+def play_seeded_games(game: Game,
+                      master_seed: int,
+                      start: int,
+                      stop: int,
+                      num_hands: int = 12,
+                      duplicate: bool = False,
+                      instrumented: bool = False) -> GameTotals:
+  totals = GameTotals()
+  if instrumented:
+    totals.call_stats = CallStats()
+    instrument(game.players, totals.call_stats)
+  try:
+    for score in seeded_game_scores(game, master_seed, start, stop, num_hands, duplicate):
+      totals.add(score)
+  finally:
+    if instrumented:
+      uninstrument(game.players)
+  return totals
+
+
+# Each game's score in index order, for games [start, stop).
+def seeded_game_scores(game: Game,
+                       master_seed: int,
+                       start: int,
+                       stop: int,
+                       num_hands: int = 12,
+                       duplicate: bool = False) -> Iterator[list[int]]:
+  swapped = Game(game.players[1:] + game.players[:1], game.win_table, game.end_probability) if duplicate else None
+  for i in range(start, stop):
+    seed = game_seed(master_seed, i)
+    random.seed(seed)
+    if not duplicate:
+      yield game.play_game(num_hands=num_hands)
+      continue
+    score = game.play_game(num_hands=num_hands, deal_rng=random.Random(seed))
+    random.seed(seed)
+    swapped_score = swapped.play_game(num_hands=num_hands, deal_rng=random.Random(seed))
+    yield [score[0] + swapped_score[1], score[1] + swapped_score[0]]
+
+
+def _play_chunk(args: tuple[Game, int, int, int, int, bool, bool]) -> GameTotals:
+  return play_seeded_games(*args)
+
+
+# Splits [0, num_games) into contiguous chunks. A few chunks per worker keeps
+# the pool busy when some games take longer than others.
+def split_games(num_games: int, num_workers: int, chunks_per_worker: int = 4) -> list[tuple[int, int]]:
+  chunk_size = max(1, math.ceil(num_games / (num_workers * chunks_per_worker)))
+  return [(i, min(i + chunk_size, num_games)) for i in range(0, num_games, chunk_size)]
+
+
+def play_games_parallel(game: Game,
+                        num_games: int,
+                        master_seed: int,
+                        num_workers: int,
+                        num_hands: int = 12,
+                        duplicate: bool = False,
+                        instrumented: bool = False) -> GameTotals:
+  totals = GameTotals()
+  if num_workers <= 1:
+    totals.merge(play_seeded_games(game, master_seed, 0, num_games, num_hands, duplicate, instrumented))
+    return totals
+
+  with multiprocessing.Pool(num_workers) as pool:
+    totals.merge(_play_range(pool, game, master_seed, 0, num_games, num_workers, num_hands, duplicate,
+                             instrumented))
+  return totals
+
+
+def _play_range(pool: Optional[multiprocessing.pool.Pool],
+                game: Game,
+                master_seed: int,
+                start: int,
+                stop: int,
+                num_workers: int,
+                num_hands: int,
+                duplicate: bool,
+                instrumented: bool) -> GameTotals:
+  if pool is None:
+    return play_seeded_games(game, master_seed, start, stop, num_hands, duplicate, instrumented)
+  totals = GameTotals()
+  chunks = [(game, master_seed, start + chunk_start, start + chunk_stop, num_hands, duplicate, instrumented)
+            for chunk_start, chunk_stop in split_games(stop - start, num_workers)]
+  for chunk_totals in pool.imap_unordered(_play_chunk, chunks):
+    totals.merge(chunk_totals)
+  return totals
+
+
+# Plays up to max_games, looking at the results every look_every games and
+# stopping as soon as the teams are told apart at error rate alpha. Look k uses
+# alpha / (k * (k + 1)), which adds up to alpha over any number of looks, so
+# looking often doesn't inflate the error rate. The looks fall on the same game
+# counts whatever num_workers is, so a seeded run stops at the same place.
+# Returns the totals and whether the result was decided.
+def play_games_sequential(game: Game,
+                          max_games: int,
+                          master_seed: int,
+                          num_workers: int,
+                          alpha: float = 0.05,
+                          look_every: int = LOOK_EVERY,
+                          decide_on: str = 'margin',
+                          num_hands: int = 12,
+                          duplicate: bool = False,
+                          instrumented: bool = False) -> tuple[GameTotals, bool]:
+  totals = GameTotals()
+  pool = multiprocessing.Pool(num_workers) if num_workers > 1 else None
+  try:
+    look = 0
+    while totals.num_games < max_games:
+      start = totals.num_games
+      stop = min(start + look_every, max_games)
+      totals.merge(_play_range(pool, game, master_seed, start, stop, num_workers, num_hands, duplicate,
+                               instrumented))
+      look += 1
+      if totals.decided(z_score(look_alpha(alpha, look)), decide_on):
+        logging.info(f'Decided after {totals.num_games} games')
+        return totals, True
+  finally:
+    if pool is not None:
+      pool.close()
+      pool.join()
+  return totals, False
@@ -0,0 +1,399 @@
+from typing import Optional
+
+from bitboard import CardIndex
+from cards import Suit, Card, Trick
+from constants import FULL_DECK, HAND_SIZE, PLAYER_COUNT
+from hand_record import HandRecord
+
+# Exact double dummy solver for the trick play of a hand: every hand is known,
+# and it finds how many tricks each team takes with best play from both sides.
+#
+# Hands are CardIndex masks for the trump, one per seat, with None (or 0 and
+# out_of_game) for the partner sitting out a lone hand. Teams are seat % 2.
+#
+# The search is alpha-beta over single card plays, with a transposition table of
+# bounds at the start of each trick keyed on the leader and the cards left in
+# each hand. Cards in a hand that no remaining card of another hand separates are
+# equivalent, so only one of them is searched.
+
+
+class DoubleDummySolver:
+  def __init__(self, trump: Suit):
+    self.index = CardIndex.for_trump(trump)
+    cards = self.index.cards
+    suits = list(Suit)
+    self.suit_masks = [self.index.suit_masks[s] for s in suits]
+    self.suit_of = [suits.index(c.suit) for c in cards]
+    # trick_ranks[led suit][id], see cards._TRICK_RANKS.
+    self.trick_ranks = [[0] * len(cards) for _ in suits]
+    for led, s in enumerate(suits):
+      for i, c in enumerate(cards):
+        if c.suit == Suit.TRUMP:
+          self.trick_ranks[led][i] = 200 + c.number
+        elif c.suit == s:
+          self.trick_ranks[led][i] = 100 + c.number
+    # Mask of every id from the first copy of a card to the last copy of the
+    # card at each id, used to check that no other hand holds a card in between.
+    self.first_copy = []
+    self.last_copy = []
+    for i, c in enumerate(cards):
+      copies = self.index.card_masks[c]
+      self.first_copy.append((copies & -copies).bit_length() - 1)
+      self.last_copy.append(copies.bit_length() - 1)
+    # Whether the card at each id ties the card at the id before it.
+    self.ties_previous = [i > 0 and self.first_copy[i] < i for i in range(len(cards))]
+    # Position key -> (lower, upper) bound on team 0's remaining tricks, and the
+    # position in the leader's hand of the best lead found.
+    self.tt: dict[bytes, tuple[int, int, int]] = {}
+    self.nodes = 0
+
+  # Tricks team 0 takes from here with best play. The whole trick must be to come.
+  def solve(self, hands: list[Optional[int]], leader: int) -> int:
+    hands = [h or 0 for h in hands]
+    # MTD(f): narrow the bounds with null window searches, which cut off far more
+    # than one wide search.
+    lower = 0
+    upper = hands[leader].bit_count()
+    guess = (lower + upper) // 2
+    while lower < upper:
+      beta = guess + 1 if guess == lower else guess
+      guess = self._search(hands, leader, beta - 1, beta)
+      if guess < beta:
+        upper = guess
+      else:
+        lower = guess
+    return lower
+
+  def solve_cards(self, hands: list[Optional[list[Card]]], leader: int) -> int:
+    taken = 0
+    masks = []
+    for h in hands:
+      mask = self.index.to_mask(h or [], taken)
+      taken |= mask
+      masks.append(mask)
+    return self.solve(masks, leader)
+
+  # Best play for every card the leader can lead: card -> team 0's tricks.
+  def solve_leads(self, hands: list[Optional[int]], leader: int) -> dict[Card, int]:
+    hands = [h or 0 for h in hands]
+    values = self.solve_moves(hands, self._seats(hands, leader), [])
+    return {self.index.cards[i]: v for i, v in values.items()}
+
+  # Best play for every card the next seat can play to a trick in progress:
+  # id -> team 0's tricks from the start of the trick. seats is the seats still in
+  # the hand in play order from the trick's leader, and trick the ids played so far.
+  def solve_moves(self, hands: list[Optional[int]], seats: list[int], trick: list[int]) -> dict[int, int]:
+    hands = [h or 0 for h in hands]
+    pos = len(trick)
+    seat = seats[pos]
+    hand = hands[seat]
+    tricks = hand.bit_count()
+    trick_mask = 0
+    if trick:
+      led = self.suit_of[trick[0]]
+      ranks = self.trick_ranks[led]
+      best_rank = -1
+      for s, i in zip(seats, trick):
+        trick_mask |= 1 << i
+        if ranks[i] > best_rank:
+          best_rank = ranks[i]
+          best_seat = s
+      moves = hand & self.suit_masks[led] or hand
+    else:
+      moves = hand
+    others = trick_mask
+    for s in seats:
+      if s != seat:
+        others |= hands[s]
+
+    results = {}
+    value = None
+    reps = set(self._groups(moves, hand, others))
+    while moves:
+      low = moves & -moves
+      i = low.bit_length() - 1
+      moves ^= low
+      # Cards after a representative in id order are in its group until the next one.
+      if i in reps:
+        hands[seat] = hand ^ low
+        if trick:
+          rank = ranks[i]
+          if rank > best_rank:
+            value = self._play(hands, seats, pos + 1, led, rank, seat, trick_mask | low, -1, tricks + 1)
+          else:
+            value = self._play(hands, seats, pos + 1, led, best_rank, best_seat, trick_mask | low, -1,
+                               tricks + 1)
+        else:
+          lead_suit = self.suit_of[i]
+          value = self._play(hands, seats, 1, lead_suit, self.trick_ranks[lead_suit][i], seat, low, -1,
+                             tricks + 1)
+        hands[seat] = hand
+      results[i] = value
+    return results
+
+  def _seats(self, hands: list[int], leader: int) -> list[int]:
+    return [s for s in ((leader + j) % PLAYER_COUNT for j in range(PLAYER_COUNT)) if hands[s]]
+
+  # Representative ids of each group of equivalent cards in moves, strongest first.
+  def _groups(self, moves: int, hand: int, others: int) -> list[int]:
+    reps = []
+    group_start = None
+    prev = None
+    while moves:
+      low = moves & -moves
+      i = low.bit_length() - 1
+      moves ^= low
+      if group_start is not None and self.suit_of[i] == self.suit_of[prev]:
+        span_low = self.first_copy[group_start]
+        span = ((1 << (self.last_copy[i] + 1)) - 1) & ~((1 << span_low) - 1)
+        if not span & others:
+          prev = i
+          continue
+      reps.append(i)
+      group_start = i
+      prev = i
+    return reps
+
+  # Positions only depend on the order of the cards left, not which cards were
+  # played, so the key is the holder of each remaining card in id order, with
+  # where each suit starts and which cards tie the one before.
+  def _key(self, hands: list[int], leader: int) -> bytes:
+    h0, h1, h2, h3 = hands
+    remaining = h0 | h1 | h2 | h3
+    key = bytearray([leader])
+    ties_previous = self.ties_previous
+    prev = None
+    while remaining:
+      low = remaining & -remaining
+      i = low.bit_length() - 1
+      remaining ^= low
+      if h0 & low:
+        code = 0
+      elif h1 & low:
+        code = 1
+      elif h2 & low:
+        code = 2
+      else:
+        code = 3
+      if prev is None or self.suit_of[prev] != self.suit_of[i]:
+        code |= (self.suit_of[i] + 1) << 3
+      elif ties_previous[i] and prev == i - 1:
+        code |= 4
+      key.append(code)
+      prev = i
+    return bytes(key)
+
+  # Tricks a team is sure to take whatever happens. A trump strictly higher than
+  # every trump the other team holds wins whichever trick it is played to, and
+  # each player's cards are played to different tricks.
+  def _sure_tricks(self, hands: list[int], team: int) -> int:
+    trumps = self.suit_masks[0]
+    theirs = (hands[1 - team] | hands[3 - team]) & trumps
+    if theirs:
+      # Ids before the first copy of their highest trump.
+      top = (theirs & -theirs).bit_length() - 1
+      above = (1 << self.first_copy[top]) - 1
+    else:
+      above = trumps
+    return max((hands[team] & above).bit_count(), (hands[team + 2] & above).bit_count())
+
+  # Tricks the leader can cash straight off: cards at least as high as anything
+  # the other seats hold in the suit, as long as nobody can ruff them. That
+  # includes the partner, who would take the lead away if made to overtake or
+  # ruff, and then need not lead back.
+  def _quick_tricks(self, hands: list[int], leader: int) -> int:
+    hand = hands[leader]
+    partner = hands[(leader + 2) % PLAYER_COUNT]
+    opponents = [hands[(leader + 1) % PLAYER_COUNT], hands[(leader + 3) % PLAYER_COUNT]]
+    trumps = self.suit_masks[0]
+    ruffers = [o for o in opponents + [partner] if o & trumps]
+    quick = 0
+    for suit, suit_mask in enumerate(self.suit_masks):
+      mine = hand & suit_mask
+      if not mine:
+        continue
+      theirs = (opponents[0] | opponents[1] | partner) & suit_mask
+      if theirs:
+        top = (theirs & -theirs).bit_length() - 1
+        cashable = (mine & ((1 << (self.last_copy[top] + 1)) - 1)).bit_count()
+      else:
+        cashable = mine.bit_count()
+      if suit:
+        for o in ruffers:
+          cashable = min(cashable, (o & suit_mask).bit_count())
+      quick += cashable
+    return quick
+
+  def _search(self, hands: list[int], leader: int, alpha: int, beta: int) -> int:
+    hand = hands[leader]
+    if not hand:
+      return 0
+    self.nodes += 1
+    key = self._key(hands, leader)
+    entry = self.tt.get(key)
+    if entry is None:
+      tricks = hand.bit_count()
+      lower = self._sure_tricks(hands, 0)
+      upper = tricks - self._sure_tricks(hands, 1)
+      if leader % 2 == 0:
+        lower = max(lower, self._quick_tricks(hands, leader))
+      else:
+        upper = min(upper, tricks - self._quick_tricks(hands, leader))
+      best_lead = -1
+    else:
+      lower, upper, best_lead = entry
+    if lower >= beta:
+      return lower
+    if upper <= alpha:
+      return upper
+    if lower == upper:
+      return lower
+    a = max(alpha, lower)
+    b = min(beta, upper)
+
+    seats = self._seats(hands, leader)
+    others = 0
+    for s in seats[1:]:
+      others |= hands[s]
+    reps = self._groups(hand, hand, others)
+    # Try the lead that was best last time first. It is stored as its position
+    # in the hand, which means the same card in any equivalent position.
+    if best_lead >= 0:
+      m = hand
+      for _ in range(best_lead):
+        m &= m - 1
+      first = (m & -m).bit_length() - 1
+      if first in reps:
+        reps.remove(first)
+        reps.insert(0, first)
+
+    maximizing = leader % 2 == 0
+    value = -1 if maximizing else 99
+    window_a = a
+    window_b = b
+    for i in reps:
+      bit = 1 << i
+      hands[leader] = hand ^ bit
+      led = self.suit_of[i]
+      child = self._play(hands, seats, 1, led, self.trick_ranks[led][i], leader, bit, window_a, window_b)
+      hands[leader] = hand
+      if maximizing:
+        if child > value:
+          value = child
+          best_lead = i
+          if value > window_a:
+            window_a = value
+      else:
+        if child < value:
+          value = child
+          best_lead = i
+          if value < window_b:
+            window_b = value
+      if window_a >= window_b:
+        break
+
+    if value <= a:
+      upper = value
+    elif value >= b:
+      lower = value
+    else:
+      lower = upper = value
+    self.tt[key] = (lower, upper, (hand & ((1 << best_lead) - 1)).bit_count())
+    return value
+
+  # Plays seats[pos]'s card into the trick, pos > 0. Returns team 0's tricks from
+  # the start of this trick on.
+  def _play(self, hands: list[int], seats: list[int], pos: int, led: int, best_rank: int, best_seat: int,
+            trick_mask: int, alpha: int, beta: int) -> int:
+    if pos == len(seats):
+      won = 1 if best_seat % 2 == 0 else 0
+      return won + self._search(hands, best_seat, alpha - won, beta - won)
+
+    seat = seats[pos]
+    hand = hands[seat]
+    moves = hand & self.suit_masks[led] or hand
+    others = trick_mask
+    for s in seats:
+      if s != seat:
+        others |= hands[s]
+    reps = self._groups(moves, hand, others)
+
+    ranks = self.trick_ranks[led]
+    winners = [i for i in reps if ranks[i] > best_rank]
+    losers = [i for i in reps if ranks[i] <= best_rank]
+    # Cheapest winner first, or keep it low if partner is already winning.
+    winners.reverse()
+    losers.reverse()
+    if best_seat % 2 == seat % 2:
+      reps = losers + winners
+    else:
+      reps = winners + losers
+
+    maximizing = seat % 2 == 0
+    best = -1 if maximizing else 99
+    for i in reps:
+      bit = 1 << i
+      hands[seat] = hand ^ bit
+      rank = ranks[i]
+      if rank > best_rank:
+        value = self._play(hands, seats, pos + 1, led, rank, seat, trick_mask | bit, alpha, beta)
+      else:
+        value = self._play(hands, seats, pos + 1, led, best_rank, best_seat, trick_mask | bit, alpha, beta)
+      hands[seat] = hand
+      if maximizing:
+        if value > best:
+          best = value
+          if best > alpha:
+            alpha = best
+      else:
+        if value < best:
+          best = value
+          if best < beta:
+            beta = best
+      if alpha >= beta:
+        break
+    return best
+
+
+# Most tricks left at which solve_endgame_record starts solving. The search takes well
+# under a second up to about here, but tens of seconds on a whole deal, so whole
+# deals are left to callers that ask for them and can wait.
+ENDGAME_TRICKS = 7
+
+
+# Tricks for the bidding team of a recorded hand: the tricks it took in the
+# recorded play until endgame_tricks were left, then double dummy from there. None
+# if everyone passed. This measures how well the endgame was played, not what the
+# deal is worth: the early tricks are whatever was recorded, mistakes and all, so
+# it's only the deal's double dummy value with endgame_tricks=HAND_SIZE.
+def solve_endgame_record(record: HandRecord, endgame_tricks: int = ENDGAME_TRICKS) -> Optional[int]:
+  trump = record.trump()
+  if trump is None:
+    return None
+  winner = max((i for i, b in enumerate(record.bids) if b), key=lambda i: record.bids[i][0])
+  deal = [FULL_DECK[i] for i in record.deal]
+  hands = [Card.convert_to_trump(deal[i*HAND_SIZE:(i+1)*HAND_SIZE], trump) for i in range(PLAYER_COUNT)]
+  kitty = Card.convert_to_trump(deal[PLAYER_COUNT*HAND_SIZE:], trump)
+  if record.given:
+    partner = (winner + 2) % PLAYER_COUNT
+    kitty += record.given_cards()
+    hands[partner] = None
+  hands[winner] = hands[winner] + kitty
+  for c in record.discarded_cards():
+    hands[winner].remove(c)
+
+  # The recorded play, a trick at a time, up to the endgame.
+  team = winner % 2
+  taken = 0
+  seats = PLAYER_COUNT - 1 if record.given else PLAYER_COUNT
+  plays = record.played_cards()
+  leader = plays[0][0] if plays else winner
+  for start in range(0, (HAND_SIZE - endgame_tricks) * seats, seats):
+    trick = Trick()
+    for seat, c in plays[start:start + seats]:
+      hands[seat].remove(c)
+      trick.lay(c)
+    leader = plays[start + trick.winner][0]
+    taken += leader % 2 == team
+  tricks = DoubleDummySolver(trump).solve_cards(hands, leader)
+  return taken + (tricks if team == 0 else min(endgame_tricks, HAND_SIZE) - tricks)
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from basic_strategies import BasicPlayer, PlayingStrategy, RandomPlayer
+from bitboard import CardIndex
+from cards import Card, Suit, Trick
+from constants import HAND_SIZE
+
+
+# Random positions: the index, a hand, the cards still out and a trick so far.
+def positions(n: int):
+  rng = random.Random(0)
+  for _ in range(n):
+    index = CardIndex.for_trump(rng.choice(list(Suit)))
+    deck = rng.sample(index.cards, len(index.cards))
+    hand_size = rng.randint(1, HAND_SIZE)
+    hand_mask = index.to_mask(deck[:hand_size])
+    laid = deck[hand_size:hand_size + rng.randint(0, 3)]
+    remaining_mask = hand_mask | index.to_mask(deck[hand_size + len(laid):hand_size + len(laid) + rng.randint(0, 30)],
+                                               hand_mask)
+    yield index, hand_mask, remaining_mask, Trick(laid)
+
+
+# The list versions, the way lead_mask and follow_mask used to call them.
+def list_choice(strategy, index: CardIndex, hand_mask: int, remaining_mask: int, trick: Trick) -> Card:
+  hand = index.to_cards(hand_mask)
+  if isinstance(strategy, RandomPlayer):
+    if not trick:
+      return random.choice(hand)
+    return random.choice(index.to_cards(PlayingStrategy.get_legal_plays_mask(index, hand_mask, trick)))
+  if not trick:
+    return strategy._lead(hand, lambda c: index.is_boss(c, remaining_mask))
+  legal_plays = index.to_cards(PlayingStrategy.get_legal_plays_mask(index, hand_mask, trick))
+  return strategy._follow(legal_plays, trick, lambda c: index.is_boss(c, remaining_mask))
+
+
+@pytest.mark.parametrize('strategy', [BasicPlayer(), RandomPlayer()])
+def test_mask_choices_match_list_choices(strategy):
+  for i, (index, hand_mask, remaining_mask, trick) in enumerate(positions(2000)):
+    random.seed(i)
+    expected = list_choice(strategy, index, hand_mask, remaining_mask, trick)
+    random.seed(i)
+    if trick:
+      chosen = strategy.follow_mask(index, hand_mask, remaining_mask, trick)
+    else:
+      chosen = strategy.lead_mask(index, hand_mask, remaining_mask)
+    assert chosen == expected
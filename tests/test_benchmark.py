@@ -0,0 +1,22 @@
+import json
+import sys
+
+import benchmark
+
+
+def test_benchmark_runs_and_checks_its_baseline(tmp_path, monkeypatch, capsys):
+  baselines = str(tmp_path / 'baselines.json')
+  monkeypatch.setattr(sys, 'argv', ['benchmark.py', '--repeats', '1', '--baselines', baselines, '--save'])
+  assert benchmark.main() == 0
+  saved = json.load(open(baselines))[benchmark.machine_tag()]
+  assert set(saved) == set(benchmark.BENCHMARKS)
+  assert all(ops > 0 for ops in saved.values())
+
+  monkeypatch.setattr(sys, 'argv', ['benchmark.py', '--repeats', '1', '--baselines', baselines, 'card_max'])
+  benchmark.main()
+  assert 'vs baseline' in capsys.readouterr().out
+
+
+def test_regressions_past_the_threshold():
+  baseline = {'a': 100.0, 'b': 100.0}
+  assert benchmark.regressions({'a': 90.0, 'b': 80.0, 'c': 1.0}, baseline, 0.15) == ['b']
@@ -0,0 +1,16 @@
+import numpy as np
+
+import bid_sweep
+from basic_strategies import BasicBidder, GoodBidder
+
+
+def test_batch_bids_match_the_scalar_bidders():
+  deals = bid_sweep.deal_batch(np.random.default_rng(1), 500)
+  features = bid_sweep.BatchFeatures(deals)
+  tuned = GoodBidder({'lone_score': 7.5, 'fixed_threshold': 2, 'left_weight': 1.5})
+  for bidders in ([BasicBidder()] * 4, [GoodBidder()] * 4, [BasicBidder(), GoodBidder()] * 2, [tuned, GoodBidder()] * 2):
+    for score_delta in (-20, 0, 20):
+      for d in range(len(deals)):
+        bids, winner = bid_sweep.deal_bids(features, d, bidders, score_delta, 12)
+        assert bids == bid_sweep.scalar_bids(deals[d], bidders, score_delta, 12)
+        assert winner == max((i for i, b in enumerate(bids) if b), default=None)
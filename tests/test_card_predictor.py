@@ -0,0 +1,78 @@
+import random
+
+from bitboard import CardIndex
+from card_predictor import CardPredictor
+from cards import Card, Suit
+from constants import HAND_SIZE
+
+
+# Seat 0's view after seat 1 indicated a right bauer and seat 2 won the bid.
+def setup():
+  bids = [None, (1, Suit.SUIT_1), (6, Suit.SUIT_1), None]
+  predictor = CardPredictor(bids, 0)
+  index = CardIndex.for_trump(Suit.SUIT_1)
+  right = Card.convert_to_trump([Card(Suit.SUIT_1, 11)], Suit.SUIT_1)[0]
+  # Seat 0 holds the lowest cards, so every other card is unseen.
+  hand = index.full_mask ^ (index.full_mask >> HAND_SIZE)
+  return predictor, index, right, index.full_mask & ~hand
+
+
+def test_deals_give_indicated_cards_to_their_bidder():
+  predictor, index, right, unseen = setup()
+  sampler = predictor.deal_sampler(index, unseen, [HAND_SIZE] * 3)
+  assert 0 < sampler.count()
+  random.seed(0)
+  for _ in range(200):
+    dealt = sampler.sample()
+    assert dealt[0] & index.card_masks[right]
+    assert sum(h.bit_count() for h in dealt) == unseen.bit_count()
+
+
+def test_trick_in_progress_is_taken_into_account_without_being_kept():
+  predictor, index, right, unseen = setup()
+  # Seat 1 leads its right bauer, and seat 2 shows out of trump.
+  trick = [right, index.cards[-HAND_SIZE - 1]]
+  assert trick[1].suit != Suit.TRUMP
+  unseen &= ~index.to_mask(trick)
+  sampler = predictor.deal_sampler(index, unseen, [HAND_SIZE - 1, HAND_SIZE - 1, HAND_SIZE], trick, 3)
+  random.seed(0)
+  dealt = [sampler.sample() for _ in range(200)]
+  assert not any(d[1] & index.suit_masks[Suit.TRUMP] for d in dealt)
+  # Nothing says seat 1 has the other copy any more.
+  assert not all(d[0] & index.card_masks[right] for d in dealt)
+  assert predictor.others[0]['known_cards'] == [right]
+  assert predictor.others[1]['lowest_card_per_suit'].get(Suit.TRUMP) is not None
+
+
+def test_throwaways_raise_the_lowest_card_they_can_hold():
+  predictor = CardPredictor([None, None, (6, Suit.TRUMP), None], 0)
+  index = CardIndex.for_trump(Suit.TRUMP)
+  # Seat 1 leads the king, seat 2 throws the queen under it and seat 3 takes it with the ace.
+  trick = [Card(Suit.SUIT_1, 13), Card(Suit.SUIT_1, 12), Card(Suit.SUIT_1, 14), Card(Suit.SUIT_1, 9)]
+  remaining = list(index.cards)
+  for c in trick:
+    remaining.remove(c)
+  predictor.update(trick, remaining, 3)
+  left, partner, right = predictor.others
+  assert partner['lowest_card_per_suit'][Suit.SUIT_1] == 12
+  assert left['lowest_card_per_suit'][Suit.SUIT_1] == 9
+  assert right['lowest_card_per_suit'][Suit.SUIT_1] == 9
+  assert predictor.get_odds_of_card(Card(Suit.SUIT_1, 10)) == [0.5, 0.0, 0.5]
+  assert not any(o['known_cards'] for o in predictor.others)
+
+
+def test_declarer_knows_who_holds_a_suit_only_one_seat_can():
+  discards = [Card(Suit.SUIT_1, 9), Card(Suit.SUIT_2, 9)]
+  index = CardIndex.for_trump(Suit.TRUMP)
+  # Seat 1 leads a heart and the others all show out of hearts.
+  trick = [Card(Suit.SUIT_1, 13), Card(Suit.SUIT_2, 12), Card(Suit.SUIT_3, 14), Card(Suit.SUIT_2, 10)]
+  remaining = list(index.cards)
+  for c in trick + discards:
+    remaining.remove(c)
+  hearts = [c for c in remaining if c.suit == Suit.SUIT_1]
+  remaining += discards
+  for known_missing_cards, expected in [(discards, hearts), (None, [])]:
+    predictor = CardPredictor([(6, Suit.TRUMP), None, None, None], 0, known_missing_cards)
+    predictor.update(trick, remaining, 3)
+    assert sorted(predictor.others[0]['known_cards']) == sorted(expected)
+    assert predictor.others[1]['lowest_card_per_suit'][Suit.SUIT_1] is None
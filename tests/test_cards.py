@@ -0,0 +1,29 @@
+import random
+
+from cards import Card, Suit, Trick
+from constants import FULL_DECK
+
+
+def test_convert_to_trump_sorts_high_to_low():
+  rng = random.Random(1)
+  for _ in range(1000):
+    trump = rng.choice(Suit.just_suits())
+    cards = rng.sample(FULL_DECK, rng.randint(0, 15))
+    expected = sorted((Card._convert_card(c, trump) for c in cards), reverse=True)
+    assert Card.convert_to_trump(cards, trump) == expected
+    # Converting converted cards changes nothing.
+    assert Card.convert_to_trump(expected, trump) == expected
+
+
+def test_trick_winner_matches_card_max():
+  rng = random.Random(0)
+  trick = Trick()
+  for _ in range(1000):
+    trump = rng.choice(Suit.just_suits() + [Suit.TRUMP])
+    cards = Card.convert_to_trump(rng.sample(FULL_DECK, rng.randint(1, 4)), trump)
+    trick.reset()
+    for i, c in enumerate(cards):
+      assert trick.would_win(c) == (Card.max(cards[:i + 1]) == i)
+      trick.lay(c)
+    assert trick.winner == Card.max(cards)
+    assert list(trick) == cards and len(trick) == len(cards) and trick[0] == cards[0]
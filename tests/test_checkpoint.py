@@ -0,0 +1,45 @@
+import pytest
+
+import checkpoint
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder
+from checkpoint import RunCheckpoint, checkpoint_path, play_games_checkpointed
+from game import Game
+from player import Player
+
+
+def basic_game() -> Game:
+  return Game([Player(BasicBidder(), BasicPlayer(), name='A'),
+               Player(GoodBidder(), BasicPlayer(), name='b'),
+               Player(BasicBidder(), BasicPlayer(), name='C'),
+               Player(GoodBidder(), BasicPlayer(), name='d')])
+
+
+def test_interrupted_run_resumes_to_the_same_totals(tmp_path, monkeypatch):
+  results_path = str(tmp_path / 'results.txt')
+  score_chunk = checkpoint._score_chunk
+  chunks = []
+  def interrupted(args):
+    if chunks:
+      raise KeyboardInterrupt
+    chunks.append(args)
+    return score_chunk(args)
+  monkeypatch.setattr(checkpoint, '_score_chunk', interrupted)
+  # No seed and stopped before any checkpoint but the first, so the generated
+  # seed has to have been saved before the games.
+  with pytest.raises(KeyboardInterrupt):
+    play_games_checkpointed(basic_game(), 8, results_path, chunk_size=3, checkpoint_every=100)
+  monkeypatch.setattr(checkpoint, '_score_chunk', score_chunk)
+  master_seed = RunCheckpoint.load(checkpoint_path(results_path)).master_seed
+  with open(results_path) as f:
+    assert len(f.readlines()) == 3
+  # A game cut off half way through writing its line.
+  with open(results_path, 'a') as f:
+    f.write('3 1')
+
+  resumed = play_games_checkpointed(basic_game(), 8, results_path, chunk_size=3, checkpoint_every=100)
+  whole_path = str(tmp_path / 'whole.txt')
+  whole = play_games_checkpointed(basic_game(), 8, whole_path, master_seed, chunk_size=3, checkpoint_every=100)
+  assert resumed.num_games == 8
+  assert resumed.as_dict() == whole.as_dict()
+  with open(results_path) as f, open(whole_path) as g:
+    assert f.read() == g.read()
@@ -0,0 +1,44 @@
+import collections
+import itertools
+
+import numpy as np
+
+from deal_sampler import DealSampler
+
+
+# Every deal of unseen to holders that fits sizes, allowed and known.
+def all_deals(unseen: int, sizes: list[int], allowed: list[int], known: list[int]) -> set[tuple[int, ...]]:
+  cards = [1 << i for i in range(unseen.bit_length()) if unseen >> i & 1]
+  deals = set()
+  for order in itertools.permutations(cards):
+    hands = []
+    start = 0
+    for size in sizes:
+      hands.append(sum(order[start:start + size]))
+      start += size
+    if all(h & ~a == 0 and h & k == k for h, a, k in zip(hands, allowed, known)):
+      deals.add(tuple(hands))
+  return deals
+
+
+def test_batch_deals_are_uniform_over_the_deals_that_fit():
+  unseen = 0b11111111
+  sizes = [2, 3, 3]
+  # Holder 0 can't have the top two cards, holder 1 must have card 0 and only
+  # holder 2 can have card 7.
+  allowed = [0b00111111, 0b01111111, 0b11111110]
+  known = [0, 0b1, 0]
+  expected = all_deals(unseen, sizes, allowed, known)
+  sampler = DealSampler(unseen, sizes, allowed, known)
+  assert sampler.count() == len(expected)
+  n = 40 * len(expected) * 25
+  counts = collections.Counter(tuple(int(h) for h in deal) for deal in sampler.sample_batch(n, np.random.default_rng(0)))
+  assert set(counts) == expected
+  mean = n / len(expected)
+  assert all(abs(c - mean) < 0.25 * mean for c in counts.values())
+
+
+def test_batch_of_an_impossible_deal_is_none():
+  sampler = DealSampler(0b111, [2, 1], [0b001, 0b111])
+  assert sampler.count() == 0
+  assert sampler.sample_batch(10, np.random.default_rng(0)) is None
@@ -0,0 +1,43 @@
+import random
+
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder, RandomPlayer
+from game import Game, Hand
+from player import Player
+from replay import recorded_players, replay_hand
+
+
+def mixed_players() -> list[Player]:
+  return [Player(BasicBidder(), BasicPlayer(), name='A'),
+          Player(GoodBidder(), RandomPlayer(), name='b'),
+          Player(BasicBidder(), BasicPlayer(), name='C'),
+          Player(GoodBidder(), BasicPlayer(), name='d')]
+
+
+def test_results_of_a_reused_hand_stay_put():
+  hand = Hand(mixed_players(), 0, [0, 0], 12)
+  random.seed(0)
+  first = hand.play_hand()
+  kept = tuple(first)
+  for dealer in range(1, 8):
+    hand.reset(dealer % 4, [0, 0], 12)
+    hand.play_hand()
+  assert first == kept
+
+
+class _Recorder:
+  def __init__(self):
+    self.records = []
+
+  def write(self, record):
+    self.records.append(record)
+
+
+def test_recorded_hands_replay_the_same():
+  game = Game(mixed_players())
+  recorder = _Recorder()
+  random.seed(1)
+  for _ in range(5):
+    game.play_game(recorder=recorder)
+  assert recorder.records
+  for record in recorder.records:
+    assert list(replay_hand(record, recorded_players(record))) == record.result
@@ -0,0 +1,55 @@
+import io
+
+from basic_strategies import BasicPlayer, GoodBidder
+from constants import HAND_SIZE, PLAYER_COUNT
+from game import Game
+from game_record import GameRecord, game_records, read_game_records, write_game_records
+from player import Player
+
+
+# Records every bid it makes under its player's name.
+class _WatchingBidder(GoodBidder):
+  __slots__ = ('name', 'seen')
+
+  def __init__(self, name: str, seen: list):
+    super().__init__()
+    self.name = name
+    self.seen = seen
+
+  def bid(self, hand, prev_bids, curr_max, score_delta, hands_left):
+    bid = super().bid(hand, prev_bids, curr_max, score_delta, hands_left)
+    self.seen.append((self.name, len(prev_bids), bid))
+    return bid
+
+
+def test_bids_are_counted_for_the_seat_that_made_them():
+  seen = []
+  game = Game([Player(_WatchingBidder(name, seen), BasicPlayer(), name=name) for name in 'AbCd'])
+  records = list(game_records(game, 10, master_seed=0))
+  # Each hand's bidding starts with no bids before it.
+  hands = []
+  for name, num_prev, bid in seen:
+    if not num_prev:
+      hands.append([])
+    hands[-1].append((name, bid))
+  winners = [max((b for b in hand if b[1]), key=lambda b: b[1][0]) for hand in hands if any(b for _, b in hand)]
+  assert sum(r.hands_played for r in records) == len(hands)
+  for seat, player in enumerate(game.players):
+    won = [bid for name, bid in winners if name == player.name]
+    assert sum(r.bids_made[seat] + r.bids_set[seat] for r in records) == len(won)
+    assert sum(r.lone_attempted[seat] for r in records) == sum(b[0] > HAND_SIZE for b in won)
+  assert sum(sum(r.bids_set) for r in records) > 0
+
+
+def test_records_read_back_as_written():
+  game = Game([Player(GoodBidder(), BasicPlayer(), name=name) for name in 'AbCd'])
+  f = io.BytesIO()
+  written = list(write_game_records(game_records(game, 5, master_seed=0), f))
+  # A record cut off part way through is left out.
+  f.write(written[0].to_bytes()[:-1])
+  f.seek(0)
+  read = list(read_game_records(f))
+  assert len(read) == len(written) == 5
+  for r, w in zip(read, written):
+    assert [getattr(r, name) for name in GameRecord.__slots__] == [getattr(w, name) for name in GameRecord.__slots__]
+    assert len(r.bids_made) == PLAYER_COUNT
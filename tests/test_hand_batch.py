@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder, RandomPlayer
+from cards import Suit
+from constants import HAND_SIZE
+from game import Hand
+import hand_batch
+from player import Player
+from simulation import game_seed
+
+NUM_HANDS = 300
+
+
+def make_players(playing: list, bidding: list) -> list[Player]:
+  return [Player(bidding[i % len(bidding)](), playing[i](), name=str(i)) for i in range(4)]
+
+
+@pytest.mark.parametrize('playing, bidding', [
+    ([BasicPlayer] * 4, [GoodBidder, BasicBidder]),
+    ([RandomPlayer] * 4, [GoodBidder, BasicBidder]),
+    ([BasicPlayer, RandomPlayer, RandomPlayer, BasicPlayer], [BasicBidder]),
+    ([RandomPlayer, BasicPlayer, BasicPlayer, RandomPlayer], [GoodBidder]),
+])
+def test_same_results_as_hand(playing, bidding):
+  players = make_players(playing, bidding)
+  seeds = [game_seed(7, i) for i in range(NUM_HANDS)]
+  dealers = [i % 4 for i in range(NUM_HANDS)]
+  batch = hand_batch.play_hands(players, seeds, dealers)
+  for i, seed in enumerate(seeds):
+    random.seed(seed)
+    result = Hand(players, dealers[i], [0, 0], 12).play_hand()
+    assert list(result) == batch.results[i].tolist(), f'hand {i}, bids {batch.bids[i]}'
+
+
+def test_deals_cover_lone_and_no_trump_hands():
+  players = make_players([BasicPlayer] * 4, [GoodBidder, BasicBidder])
+  batch = hand_batch.play_hands(players, [game_seed(7, i) for i in range(NUM_HANDS)],
+                                [i % 4 for i in range(NUM_HANDS)])
+  bid_on = batch.bidder >= 0
+  assert (batch.amount[bid_on] > HAND_SIZE).any()
+  assert (batch.trump[bid_on] == Suit.TRUMP.value).any()
@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+
+import bid_sweep
+import hand_batch
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder, RandomPlayer
+from game import Game
+from instrumentation import CallStats, instrument, uninstrument, uninstrumented_type
+from player import Player
+from simulation import game_seed
+
+
+def make_players() -> list[Player]:
+  return [Player(GoodBidder(), BasicPlayer(), name='A'),
+          Player(BasicBidder(), RandomPlayer(), name='b'),
+          Player(GoodBidder(), RandomPlayer(), name='C'),
+          Player(BasicBidder(), BasicPlayer(), name='d')]
+
+
+def test_instrumented_games_count_calls_and_play_the_same():
+  stats = CallStats()
+  players = make_players()
+  random.seed(0)
+  expected = Game(players).play_game()
+  instrument(players, stats)
+  # Instrumenting twice doesn't time calls twice.
+  instrument(players, stats)
+  random.seed(0)
+  assert Game(players).play_game() == expected
+  assert stats.histogram('A', 'play_card').calls > 0
+  assert stats.histogram('BasicPlayer', 'follow_mask').calls > 0
+  good_bids = stats.histogram('A', 'bid').calls + stats.histogram('C', 'bid').calls
+  assert good_bids == stats.histogram('GoodBidder', 'bid').calls > 0
+  assert uninstrumented_type(players[0].bidding_strat) is GoodBidder
+  assert type(players[0].bidding_strat) is not GoodBidder
+  uninstrument(players)
+  assert [type(p.playing_strat) for p in players] == [BasicPlayer, RandomPlayer, RandomPlayer, BasicPlayer]
+  assert uninstrumented_type(players[0]) is Player
+
+
+# The batched engines pick their code by the strategies' exact types.
+def test_batched_engines_see_through_instrumentation():
+  players = make_players()
+  seeds = [game_seed(3, i) for i in range(50)]
+  dealers = [i % 4 for i in range(50)]
+  deals = bid_sweep.deal_batch(np.random.default_rng(0), 50)
+  bidders = [p.bidding_strat for p in players]
+  expected_bids = bid_sweep.sweep_batch(deals, bidders)
+  expected_hands = hand_batch.play_hands(players, seeds, dealers)
+  instrument(players, CallStats())
+  assert vars(bid_sweep.sweep_batch(deals, bidders)) == vars(expected_bids)
+  assert (hand_batch.play_hands(players, seeds, dealers).results == expected_hands.results).all()
+  uninstrument(players)
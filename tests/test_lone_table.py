@@ -0,0 +1,36 @@
+import random
+
+from cards import Suit
+from constants import FULL_DECK, HAND_SIZE
+from lone_table import GIVE_TWO, MODES, SOLO, LoneTable, build_lone_table
+from trick_table import TableBidder, TrickTable, hand_cells
+
+
+def test_best_lone_looks_up_the_hand_in_the_mode_asked():
+  hand = random.Random(2).sample(FULL_DECK, HAND_SIZE)
+  cells = hand_cells(hand)
+  table = LoneTable()
+  for made in (True, True, True, False):
+    table.add(GIVE_TWO, cells[Suit.SUIT_3], made)
+    table.add(SOLO, cells[Suit.SUIT_4], made)
+  table.add(GIVE_TWO, cells[Suit.TRUMP], True)
+  assert table.best_lone(hand) == (Suit.TRUMP, 1.0)
+  assert table.best_lone(hand, min_count=2) == (Suit.SUIT_3, 0.75)
+  assert table.best_lone(hand, SOLO) == (Suit.SUIT_4, 0.75)
+  assert table.success_rate(cells[Suit.SUIT_3], SOLO) == 0
+
+  # TableBidder goes alone on the lone table rather than its trick table.
+  tricks = TrickTable()
+  assert TableBidder(tricks, min_count=2, lone_table=table).bid(hand, [], 0, 0, 12) == (HAND_SIZE + 1, Suit.SUIT_3)
+  assert TableBidder(tricks, min_count=2, lone_table=table, lone_probability=0.8).bid(hand, [], 0, 0, 12) is None
+
+
+def test_built_table_counts_every_trump_and_mode_of_every_deal(tmp_path):
+  table = build_lone_table(5, master_seed=0)
+  assert sum(table.counts) == 5 * len(Suit) * len(MODES)
+  assert sum(table.made) <= sum(table.counts)
+  path = str(tmp_path / 'lone.bin')
+  table.save(path)
+  loaded = LoneTable.load(path)
+  assert list(loaded.made) == list(table.made)
+  assert list(loaded.counts) == list(table.counts)
@@ -0,0 +1,50 @@
+import random
+
+from basic_strategies import BasicPlayer, GoodBidder, PlayingStrategy
+from bitboard import CardIndex
+from cards import Card, Trick
+from game import Game
+from monte_carlo_player import MonteCarloPlayer
+from player import Player
+
+
+class _CheckedMonteCarloPlayer(MonteCarloPlayer):
+  def lead_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int) -> Card:
+    card = super().lead_mask(index, hand_mask, remaining_mask)
+    assert index.contains(hand_mask, card)
+    return card
+
+  def follow_mask(self, index: CardIndex, hand_mask: int, remaining_mask: int, cards_laid: Trick) -> Card:
+    card = super().follow_mask(index, hand_mask, remaining_mask, cards_laid)
+    assert index.contains(PlayingStrategy.get_legal_plays_mask(index, hand_mask, cards_laid), card)
+    return card
+
+
+def mc_game() -> Game:
+  return Game([Player(GoodBidder(), _CheckedMonteCarloPlayer(max_samples=4), name='A'),
+               Player(GoodBidder(), BasicPlayer(), name='b'),
+               Player(GoodBidder(), _CheckedMonteCarloPlayer(max_samples=4), name='C'),
+               Player(GoodBidder(), BasicPlayer(), name='d')])
+
+
+class _Recorder:
+  def __init__(self):
+    self.records = []
+
+  def write(self, record):
+    self.records.append(record)
+
+
+def test_monte_carlo_player_plays_legal_cards_through_a_game():
+  recorder = _Recorder()
+  random.seed(0)
+  score = mc_game().play_game(num_hands=3, recorder=recorder)
+  assert recorder.records
+  assert [sum(r.result[team] for r in recorder.records) for team in range(2)] == list(score)
+
+
+def test_monte_carlo_games_are_reproducible():
+  random.seed(1)
+  first = mc_game().play_game(num_hands=2)
+  random.seed(1)
+  assert mc_game().play_game(num_hands=2) == first
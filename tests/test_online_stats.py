@@ -0,0 +1,41 @@
+import math
+import random
+
+from game_record import GameRecord
+from online_stats import BidSuccess, MarginHistogram, RunningStats, feed
+
+
+def random_records(n: int) -> list[GameRecord]:
+  rng = random.Random(0)
+  records = []
+  for _ in range(n):
+    record = GameRecord()
+    record.score = [rng.randint(-30, 60), rng.randint(-30, 60)]
+    record.hands_played = rng.randint(1, 12)
+    record.bids_made = [rng.randint(0, 6) for _ in range(4)]
+    records.append(record)
+  return records
+
+
+def test_merged_stats_match_a_single_pass():
+  records = random_records(1000)
+  whole = [RunningStats(), RunningStats('hands_played'), MarginHistogram(5), BidSuccess()]
+  feed(records, whole)
+  merged = [RunningStats(), RunningStats('hands_played'), MarginHistogram(5), BidSuccess()]
+  # Uneven splits, one of them empty.
+  for start, stop in [(0, 0), (0, 1), (1, 400), (400, 1000)]:
+    part = [RunningStats(), RunningStats('hands_played'), MarginHistogram(5), BidSuccess()]
+    feed(records[start:stop], part)
+    for m, p in zip(merged, part):
+      m.merge(p)
+
+  for field, w, m in zip(('margin', 'hands_played'), whole[:2], merged[:2]):
+    values = [getattr(r, field) for r in records]
+    mean = sum(values) / len(values)
+    assert w.count == m.count == len(values)
+    assert math.isclose(w.mean, mean) and math.isclose(m.mean, mean)
+    variance = sum((x - mean) ** 2 for x in values) / (len(values) - 1)
+    assert math.isclose(w.variance(), variance) and math.isclose(m.variance(), variance)
+    assert w.min == m.min == min(values) and w.max == m.max == max(values)
+  assert whole[2].counts == merged[2].counts and whole[2].count == merged[2].count == len(records)
+  assert vars(whole[3]) == vars(merged[3])
@@ -0,0 +1,72 @@
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder, RandomBidder, RandomPlayer
+from game import Game
+from main import run_many_games
+from player import Player
+from simulation import look_alpha, num_looks, play_games_parallel, play_games_sequential, seeded_game_scores, z_score
+
+
+def basic_game() -> Game:
+  return Game([Player(BasicBidder(), BasicPlayer(), name='A'),
+               Player(GoodBidder(), BasicPlayer(), name='b'),
+               Player(BasicBidder(), RandomPlayer(), name='C'),
+               Player(GoodBidder(), BasicPlayer(), name='d')])
+
+
+def test_run_many_games_on_a_pool():
+  run_many_games(basic_game(), 4, num_workers=2, master_seed=0)
+
+
+def test_totals_dont_depend_on_worker_count():
+  one = play_games_parallel(basic_game(), 6, master_seed=0, num_workers=1)
+  two = play_games_parallel(basic_game(), 6, master_seed=0, num_workers=2)
+  assert one.num_games == two.num_games == 6
+  assert one.as_dict() == two.as_dict()
+
+
+def test_sequential_run_is_decided_at_its_last_look():
+  game = Game([Player(GoodBidder(), BasicPlayer(), name='A'),
+               Player(RandomBidder(), RandomPlayer(), name='b'),
+               Player(GoodBidder(), BasicPlayer(), name='C'),
+               Player(RandomBidder(), RandomPlayer(), name='d')])
+  totals, decided = play_games_sequential(game, 500, master_seed=0, num_workers=1, alpha=0.05, look_every=20)
+  assert decided
+  looks = num_looks(totals.num_games, 20)
+  assert totals.decided(z_score(look_alpha(0.05, looks)))
+
+
+def test_duplicate_margin_is_zero_between_the_same_strategies():
+  for bidder, player in [(GoodBidder, BasicPlayer), (RandomBidder, RandomPlayer)]:
+    game = Game([Player(bidder(), player(), name=name) for name in 'AbCd'])
+    totals = play_games_parallel(game, 20, master_seed=0, num_workers=1, duplicate=True)
+    assert totals.num_games == 20
+    assert totals.team_0_diff == totals.team_0_diff_sq == 0
+
+
+def test_duplicate_totals_dont_depend_on_worker_count():
+  one = play_games_parallel(basic_game(), 6, master_seed=0, num_workers=1, duplicate=True)
+  two = play_games_parallel(basic_game(), 6, master_seed=0, num_workers=2, duplicate=True)
+  assert one.as_dict() == two.as_dict()
+
+
+# Records the hand it's dealt under its player's name.
+class _WatchingBidder(BasicBidder):
+  __slots__ = ('name', 'seen')
+
+  def __init__(self, name: str, seen: list):
+    self.name = name
+    self.seen = seen
+
+  def bid(self, hand, prev_bids, curr_max, score_delta, hands_left):
+    self.seen.append((self.name, sorted(hand)))
+    return super().bid(hand, prev_bids, curr_max, score_delta, hands_left)
+
+
+def test_duplicate_deals_each_teams_cards_to_the_other():
+  seen = []
+  game = Game([Player(_WatchingBidder(name, seen), BasicPlayer(), name=name) for name in 'AbCd'])
+  list(seeded_game_scores(game, 0, 0, 1, num_hands=1, duplicate=True))
+  first, swapped = seen[:len(seen) // 2], seen[len(seen) // 2:]
+  assert len(first) == len(swapped) == 4
+  # Everyone moves a seat to the right, so each seat's cards go to the other team.
+  moved = {'A': 'b', 'b': 'C', 'C': 'd', 'd': 'A'}
+  assert dict(swapped) == {moved[name]: hand for name, hand in first}
@@ -0,0 +1,132 @@
+import random
+from typing import Optional
+
+from basic_strategies import BasicPlayer, GoodBidder
+from bitboard import CardIndex
+from cards import Card, Suit
+from constants import HAND_SIZE, PLAYER_COUNT
+from game import Game
+from hand_record import HandRecord
+from player import Player
+from solver import DoubleDummySolver, solve_endgame_record
+
+
+class _Recorder:
+  def __init__(self):
+    self.records = []
+
+  def write(self, record):
+    self.records.append(record)
+
+
+def test_solve_endgame_record_solves_the_endgame_of_recorded_hands():
+  recorder = _Recorder()
+  game = Game([Player(GoodBidder(), BasicPlayer(), name=name) for name in 'AbCd'])
+  random.seed(0)
+  game.play_game(recorder=recorder)
+  game.play_game(recorder=recorder)
+  assert any(r.given for r in recorder.records)
+  for record in recorder.records:
+    # The last trick has no choices left, so solving it changes nothing.
+    played = solve_endgame_record(record, 0)
+    assert solve_endgame_record(record, 1) == played
+    assert 0 <= played <= HAND_SIZE
+    assert 0 <= solve_endgame_record(record) <= HAND_SIZE
+
+
+def test_solve_endgame_record_of_a_passed_hand_is_none():
+  record = HandRecord(0, [0, 0], 12)
+  record.bids = [None] * 4
+  assert solve_endgame_record(record) is None
+
+
+# Team 0's tricks with best play, by trying every legal card at every turn.
+# Hands are lists of the ids of the first copy of each card in index, and
+# positions at the start of a trick are kept in memo.
+def brute_force(index: CardIndex, hands: list[list[int]], leader: int, memo: Optional[dict] = None) -> int:
+  if memo is None:
+    memo = {}
+  key = (leader, tuple(tuple(sorted(h)) for h in hands))
+  if key not in memo:
+    seats = [s for s in ((leader + j) % PLAYER_COUNT for j in range(PLAYER_COUNT)) if hands[s]]
+    memo[key] = _brute_force_trick(index, hands, seats, [], memo) if seats else 0
+  return memo[key]
+
+
+def _brute_force_trick(index: CardIndex, hands: list[list[int]], seats: list[int], laid: list[int], memo: dict) -> int:
+  if len(laid) == len(seats):
+    winner = seats[Card.max([index.cards[i] for i in laid])]
+    return brute_force(index, hands, winner, memo) + (winner % 2 == 0)
+  seat = seats[len(laid)]
+  hand = hands[seat]
+  legal = [i for i in hand if index.cards[i].suit == index.cards[laid[0]].suit] if laid else []
+  moves = legal or list(hand)
+  values = []
+  for n, i in enumerate(moves):
+    if i in moves[:n]:
+      continue
+    hand.remove(i)
+    values.append(_brute_force_trick(index, hands, seats, laid + [i], memo))
+    hand.append(i)
+  return max(values) if seat % 2 == 0 else min(values)
+
+
+# Random positions of a few tricks: the trump, the hands (a lone hand's partner
+# None) and the leader. Most deal from two or three suits, so there are more
+# fights over the same suit.
+def small_positions(n: int, trick_counts: list[int]):
+  rng = random.Random(0)
+  for _ in range(n):
+    trump = rng.choice(list(Suit))
+    tricks = rng.choice(trick_counts)
+    cards = CardIndex.for_trump(trump).cards
+    present = list(dict.fromkeys(c.suit for c in cards))
+    while rng.random() < 0.75:
+      suits = rng.sample(present, rng.randint(2, 3))
+      in_suits = [c for c in cards if c.suit in suits]
+      if len(in_suits) >= tricks * PLAYER_COUNT:
+        cards = in_suits
+        break
+    deck = rng.sample(cards, tricks * PLAYER_COUNT)
+    hands = [deck[i * tricks:(i + 1) * tricks] for i in range(PLAYER_COUNT)]
+    if rng.random() < 0.25:
+      hands[rng.randrange(PLAYER_COUNT)] = None
+    leader = rng.choice([s for s in range(PLAYER_COUNT) if hands[s]])
+    yield trump, hands, leader
+
+
+def brute_force_cards(trump: Suit, hands: list[Optional[list[Card]]], leader: int) -> int:
+  index = CardIndex.for_trump(trump)
+  return brute_force(index, [[index.card_id(c) for c in h or []] for h in hands], leader)
+
+
+def test_solver_matches_brute_force_on_small_positions():
+  for trump, hands, leader in small_positions(60, [3, 3, 4, 4, 5]):
+    assert DoubleDummySolver(trump).solve_cards(hands, leader) == brute_force_cards(trump, hands, leader)
+
+
+# The bounds only cut the search short, so a wrong one can hide behind the rest
+# of the search. Check it against the leader's team's best directly.
+def test_quick_tricks_never_exceed_best_play():
+  for trump, hands, leader in small_positions(400, [2, 3]):
+    solver = DoubleDummySolver(trump)
+    taken = 0
+    masks = []
+    for h in hands:
+      masks.append(solver.index.to_mask(h or [], taken))
+      taken |= masks[-1]
+    best = brute_force_cards(trump, hands, leader)
+    if leader % 2:
+      best = len(hands[leader]) - best
+    assert solver._quick_tricks(masks, leader) <= best
+
+
+# The leader's two diamonds are higher than anything the opponents hold, but the
+# partner has to overtake the first with the king and lead away from the queen.
+def test_partner_forced_to_overtake():
+  hands = [[Card(Suit.SUIT_2, 9), Card(Suit.SUIT_2, 12), Card(Suit.SUIT_1, 9)],
+           [Card(Suit.SUIT_4, 12), Card(Suit.SUIT_2, 9), Card(Suit.SUIT_4, 10)],
+           [Card(Suit.SUIT_2, 13), Card(Suit.SUIT_1, 12), Card(Suit.SUIT_4, 11)],
+           [Card(Suit.SUIT_3, 12), Card(Suit.SUIT_3, 11), Card(Suit.SUIT_3, 11)]]
+  assert brute_force_cards(Suit.TRUMP, hands, 0) == 2
+  assert DoubleDummySolver(Suit.TRUMP).solve_cards(hands, 0) == 2
@@ -0,0 +1,41 @@
+import tournament
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder, RandomPlayer
+from tournament import Entrant, ranking, run_tournament
+
+
+def test_cached_matchups_are_not_played_again(tmp_path, monkeypatch):
+  cache_dir = str(tmp_path / 'cache')
+  played = []
+  play_chunk = tournament._play_matchup_chunk
+  def counting(args):
+    played.append(args[0])
+    return play_chunk(args)
+  monkeypatch.setattr(tournament, '_play_matchup_chunk', counting)
+
+  entrants = [Entrant('BB', BasicBidder, BasicPlayer), Entrant('GB', GoodBidder, BasicPlayer)]
+  first = run_tournament(entrants, 3, master_seed=0, cache_dir=cache_dir)
+  assert sorted(set(played)) == [0, 1]
+  assert all(t.num_games == 3 for t in first.values())
+
+  played.clear()
+  again = run_tournament(entrants, 3, master_seed=0, cache_dir=cache_dir)
+  assert not played
+  assert [t.as_dict() for t in again.values()] == [t.as_dict() for t in first.values()]
+
+  # Only the matchups with the new entrant are played, and changing the run
+  # settings or an entrant's arguments misses the cache.
+  entrants.append(Entrant('GR', GoodBidder, RandomPlayer))
+  with_new = run_tournament(entrants, 3, master_seed=0, cache_dir=cache_dir)
+  matchups = list(with_new)
+  assert {m.team0.name + m.team1.name for m in (matchups[i] for i in set(played))} == {'BBGR', 'GBGR', 'GRBB', 'GRGB'}
+  played.clear()
+  run_tournament(entrants[:2], 3, master_seed=1, cache_dir=cache_dir)
+  assert sorted(set(played)) == [0, 1]
+  played.clear()
+  tuned = [entrants[0], Entrant('GB', GoodBidder, BasicPlayer, {'params': {'lone_score': 8.0}})]
+  run_tournament(tuned, 3, master_seed=0, cache_dir=cache_dir)
+  assert sorted(set(played)) == [0, 1]
+
+  rows = ranking(entrants, with_new)
+  assert sorted(r[0] for r in rows) == ['BB', 'GB', 'GR']
+  assert all(r[1] == 2 * 2 * 3 for r in rows)
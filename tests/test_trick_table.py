@@ -0,0 +1,55 @@
+import random
+
+from cards import Card, Suit
+from constants import FULL_DECK, HAND_SIZE
+from trick_table import NUM_CELLS, TableBidder, TrickTable, build_trick_table, hand_cells
+
+
+# The suit trump features hand_cells packs, read off the hand in that trump.
+def trump_features(hand: list[Card], trump: Suit) -> tuple[int, int, int, int]:
+  converted = Card.convert_to_trump(hand, trump)
+  trumps = [c for c in converted if c.suit == Suit.TRUMP]
+  return (len(trumps), sum(c.number == 16 for c in trumps), sum(c.number == 15 for c in trumps),
+          sum(c.number == 14 for c in converted if c.suit != Suit.TRUMP))
+
+
+def test_hands_with_the_same_features_share_a_cell():
+  rng = random.Random(0)
+  seen = {}
+  for _ in range(2000):
+    hand = rng.sample(FULL_DECK, HAND_SIZE)
+    cells = hand_cells(hand)
+    for s in Suit.just_suits():
+      features = trump_features(hand, s)
+      capped = (min(features[0], 8), features[1], features[2], min(features[3], 4))
+      assert seen.setdefault(cells[s], capped) == capped
+    assert 0 <= cells[Suit.TRUMP] < NUM_CELLS
+  assert len(set(seen.values())) == len(seen)
+
+
+def test_bidder_bids_the_best_expected_tricks_in_the_table():
+  hand = random.Random(1).sample(FULL_DECK, HAND_SIZE)
+  cells = hand_cells(hand)
+  table = TrickTable()
+  for _ in range(20):
+    table.add(cells[Suit.SUIT_1], 5)
+    table.add(cells[Suit.SUIT_2], 7)
+  # Too few samples to count.
+  table.add(cells[Suit.TRUMP], 11)
+  assert table.expected_tricks(cells[Suit.SUIT_2], 20) == 7
+  assert table.expected_tricks(cells[Suit.TRUMP], 20) == 0
+  bidder = TableBidder(table)
+  assert bidder.bid(hand, [], 0, 0, 12) == (7, Suit.SUIT_2)
+  assert bidder.bid(hand, [], 7, 0, 12) is None
+  assert TableBidder(table, min_count=1).bid(hand, [], 0, 0, 12) == (HAND_SIZE + 1, Suit.TRUMP)
+
+
+def test_built_table_counts_every_trump_of_every_deal(tmp_path):
+  table = build_trick_table(10, master_seed=0)
+  assert sum(table.counts) == 10 * len(Suit)
+  assert 0 < sum(table.sums) <= HAND_SIZE * sum(table.counts)
+  path = str(tmp_path / 'tricks.bin')
+  table.save(path)
+  loaded = TrickTable.load(path)
+  assert list(loaded.sums) == list(table.sums)
+  assert list(loaded.counts) == list(table.counts)
@@ -0,0 +1,38 @@
+import multiprocessing
+
+from basic_strategies import GoodBidder
+import tuner
+
+
+def test_tunable_params_are_goodbidder_params_in_bounds():
+  assert set(tuner.TUNABLE) == set(GoodBidder.DEFAULT_PARAMS)
+  for name, (step, min_step, lowest, highest) in tuner.TUNABLE.items():
+    assert lowest <= GoodBidder.DEFAULT_PARAMS[name] <= highest
+    assert 0 < min_step <= step
+
+
+def test_defaults_score_zero_against_themselves():
+  totals = tuner.score_candidates([dict(GoodBidder.DEFAULT_PARAMS)], 6, master_seed=0)[0]
+  assert totals.num_games == 6
+  assert totals.team_0_diff == 0
+
+
+def test_params_change_play():
+  changed = {**GoodBidder.DEFAULT_PARAMS, 'lone_score': 4, 'indicate_below': 0}
+  defaults, other = tuner.score_candidates([dict(GoodBidder.DEFAULT_PARAMS), changed], 6, master_seed=0)
+  assert other.team_0_diff != defaults.team_0_diff
+
+
+def test_scores_dont_depend_on_worker_count():
+  candidates = [dict(GoodBidder.DEFAULT_PARAMS), {**GoodBidder.DEFAULT_PARAMS, 'lone_score': 7}]
+  alone = tuner.score_candidates(candidates, 6, master_seed=3)
+  with multiprocessing.Pool(2) as pool:
+    pooled = tuner.score_candidates(candidates, 6, master_seed=3, pool=pool, num_workers=2)
+  assert [t.as_dict() for t in alone] == [t.as_dict() for t in pooled]
+
+
+def test_smallest_steps_still_move_every_param():
+  params = dict(GoodBidder.DEFAULT_PARAMS)
+  steps = {name: min_step for name, (_, min_step, _, _) in tuner.TUNABLE.items()}
+  moved = {name for n in tuner.neighbours(params, steps) for name in n if n[name] != params[name]}
+  assert moved == set(tuner.TUNABLE)
@@ -0,0 +1,39 @@
+import random
+
+from game import Game
+from simulation import game_seed
+from win_probability import MAX_HAND_DELTA, MAX_HANDS, WinTable, count_hand_deltas, default_players
+
+
+class _HandCounter:
+  def __init__(self):
+    self.hands = 0
+
+  def write(self, record):
+    self.hands += 1
+
+
+def test_table_is_built_from_played_hands(tmp_path):
+  counts = count_hand_deltas(10, master_seed=0)
+  counter = _HandCounter()
+  game = Game(default_players())
+  for i in range(10):
+    random.seed(game_seed(0, i))
+    game.play_game(num_hands=MAX_HANDS, recorder=counter)
+  # Every hand played is counted once from each team's side.
+  assert sum(counts) == 2 * counter.hands > 0
+  assert list(counts) == list(reversed(counts))
+  assert counts[MAX_HAND_DELTA] < sum(counts)
+
+  table = WinTable.from_hand_deltas(counts)
+  assert table.probability(0, 0) == 0.5
+  assert abs(table.probability(0, 6) - 0.5) < 1e-9
+  for hands_left in (1, 6, MAX_HANDS):
+    row = [table.probability(d, hands_left) for d in range(-40, 41)]
+    assert all(p <= q + 1e-12 for p, q in zip(row, row[1:]))
+    assert all(abs(p + q - 1) < 1e-9 for p, q in zip(row, reversed(row)))
+  assert 0 < table.probability(-5, 3) < 0.5 < table.probability(5, 3) < 1
+
+  path = str(tmp_path / 'win_table.bin')
+  table.save(path)
+  assert WinTable.load(path).probabilities == table.probabilities
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from typing import Optional
+
+from basic_strategies import BiddingStrategy, PlayingStrategy, BasicBidder, BasicPlayer, GoodBidder, RandomPlayer
+from game import Game
+from player import Player
+from simulation import GameTotals, play_seeded_games, split_games
+
+# Round robin between (bidding, playing) strategy pairs. Every entrant plays every
+# other one from both sides of the table, a partnership of two copies of each.
+#
+# Finished matchups are cached on disk as JSON, keyed by both entrants, the seat
+# arrangement and the run settings. An entrant's key is its strategy classes,
+# their version attributes and constructor arguments, so adding an entrant only
+# plays its matchups, and bumping a strategy's version reruns everything it is in.
+
+
+class Entrant:
+  # Strategies are given as classes and constructor arguments, so each seat gets
+  # its own copy and worker processes can build them.
+  def __init__(self,
+               name: str,
+               bidder: type[BiddingStrategy],
+               player: type[PlayingStrategy],
+               bidder_args: Optional[dict] = None,
+               player_args: Optional[dict] = None):
+    self.name = name
+    self.bidder = bidder
+    self.player = player
+    self.bidder_args = bidder_args or {}
+    self.player_args = player_args or {}
+
+  def key(self) -> str:
+    parts = []
+    for cls, args in ((self.bidder, self.bidder_args), (self.player, self.player_args)):
+      # Arguments that aren't plain data go in by repr, which is only stable if
+      # the class gives them one.
+      parts.append(f'{cls.__module__}.{cls.__qualname__}@{cls.version}:{json.dumps(args, sort_keys=True, default=repr)}')
+    return '|'.join(parts)
+
+  def make_player(self, seat: int) -> Player:
+    return Player(self.bidder(**self.bidder_args), self.player(**self.player_args), name=f'{self.name}{seat}')
+
+
+# team0 in seats 0 and 2 against team1 in seats 1 and 3.
+class Matchup:
+  def __init__(self, team0: Entrant, team1: Entrant):
+    self.team0 = team0
+    self.team1 = team1
+
+  def key(self) -> str:
+    return f'{self.team0.key()} vs {self.team1.key()}'
+
+  def game(self) -> Game:
+    return Game([(self.team0 if seat % 2 == 0 else self.team1).make_player(seat) for seat in range(4)])
+
+
+def schedule(entrants: list[Entrant]) -> list[Matchup]:
+  return [Matchup(a, b) for a in entrants for b in entrants if a is not b]
+
+
+def _cache_path(cache_dir: str, key: str) -> str:
+  return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+
+def load_cached(cache_dir: str, key: str) -> Optional[GameTotals]:
+  path = _cache_path(cache_dir, key)
+  if not os.path.exists(path):
+    return None
+  with open(path) as f:
+    data = json.load(f)
+  if data['key'] != key:
+    return None
+  return GameTotals.from_dict(data['totals'])
+
+
+def save_cached(cache_dir: str, key: str, totals: GameTotals):
+  os.makedirs(cache_dir, exist_ok=True)
+  path = _cache_path(cache_dir, key)
+  with open(path + '.tmp', 'w') as f:
+    json.dump({'key': key, 'totals': totals.as_dict()}, f)
+  os.replace(path + '.tmp', path)
+
+
+def _play_matchup_chunk(args: tuple[int, Game, str, int, int, int]) -> tuple[int, GameTotals]:
+  matchup_index, game, seed, start, stop, num_hands = args
+  return matchup_index, play_seeded_games(game, seed, start, stop, num_hands)
+
+
+# Totals for each matchup, team 0's view. Cached matchups aren't replayed, and the
+# rest are saved as they finish.
+def run_tournament(entrants: list[Entrant],
+                   games_per_matchup: int,
+                   master_seed: int,
+                   num_workers: int = 1,
+                   cache_dir: str = 'tournament_cache',
+                   num_hands: int = 12) -> dict[Matchup, GameTotals]:
+  matchups = schedule(entrants)
+  results = {}
+  chunks = []
+  keys = []
+  # Chunks still to come back for each matchup being played.
+  chunks_left = {}
+  for i, m in enumerate(matchups):
+    # The seed depends on the matchup, not its place in the schedule.
+    key = f'{m.key()} seed={master_seed} games={games_per_matchup} hands={num_hands}'
+    keys.append(key)
+    cached = load_cached(cache_dir, key)
+    if cached is not None:
+      results[m] = cached
+      continue
+    seed = hashlib.sha1(key.encode()).hexdigest()
+    game = m.game()
+    splits = split_games(games_per_matchup, max(1, num_workers))
+    chunks_left[i] = len(splits)
+    results[m] = GameTotals()
+    chunks += [(i, game, seed, start, stop, num_hands) for start, stop in splits]
+  logging.warning(f'{len(matchups) - len(chunks_left)} of {len(matchups)} matchups cached')
+
+  def _finish(matchup_index: int, totals: GameTotals):
+    m = matchups[matchup_index]
+    results[m].merge(totals)
+    chunks_left[matchup_index] -= 1
+    if not chunks_left[matchup_index]:
+      save_cached(cache_dir, keys[matchup_index], results[m])
+      logging.info(f'{m.team0.name} vs {m.team1.name} done')
+
+  if num_workers <= 1:
+    for c in chunks:
+      _finish(*_play_matchup_chunk(c))
+  else:
+    with multiprocessing.Pool(num_workers) as pool:
+      for matchup_index, totals in pool.imap_unordered(_play_matchup_chunk, chunks):
+        _finish(matchup_index, totals)
+  return results
+
+
+# Rows of (name, games, wins, losses, average margin), best win rate first.
+def ranking(entrants: list[Entrant], results: dict[Matchup, GameTotals]) -> list[tuple[str, int, int, int, float]]:
+  stats = {e.name: [0, 0, 0, 0] for e in entrants}
+  for m, totals in results.items():
+    for entrant, side, sign in ((m.team0, 0, 1), (m.team1, 1, -1)):
+      s = stats[entrant.name]
+      s[0] += totals.num_games
+      s[1] += totals.victories[side]
+      s[2] += totals.victories[1 - side]
+      s[3] += sign * totals.team_0_diff
+  rows = [(name, s[0], s[1], s[2], s[3] / s[0] if s[0] else 0.0) for name, s in stats.items()]
+  rows.sort(key=lambda r: (-(r[2] / r[1] if r[1] else 0), -r[4]))
+  return rows
+
+
+def format_ranking(rows: list[tuple[str, int, int, int, float]]) -> str:
+  width = max([len('Entrant')] + [len(r[0]) for r in rows])
+  lines = [f'{"Entrant":<{width}}  Games   Wins  Losses  Win %  Avg margin']
+  for name, games, wins, losses, margin in rows:
+    win_rate = 100 * wins / games if games else 0
+    lines.append(f'{name:<{width}}  {games:5}  {wins:5}  {losses:6}  {win_rate:5.1f}  {margin:10.2f}')
+  return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+  logging.basicConfig(level=logging.WARNING, format='%(message)s')
+  entrants = [Entrant('BB', BasicBidder, BasicPlayer),
+              Entrant('GB', GoodBidder, BasicPlayer),
+              Entrant('GR', GoodBidder, RandomPlayer)]
+  results = run_tournament(entrants, 200, master_seed=0, num_workers=os.cpu_count())
+  print(format_ranking(ranking(entrants, results)))
@@ -0,0 +1,177 @@
+import math
+import multiprocessing
+import random
+import struct
+from array import array
+from typing import Callable, Optional
+
+from basic_strategies import Bid, BiddingStrategy, PlayingStrategy, BasicPlayer
+from cards import Suit, Card
+from constants import DECK_SIZE, FULL_DECK, HAND_SIZE, PLAYER_COUNT
+from game import Hand
+from player import Player
+from replay import ReplayBidder
+from simulation import game_seed, split_games
+
+# Expected tricks for a bidding team, looked up by a few features of the bidder's
+# hand for each trump choice. Built offline by playing deals out with every
+# trump and recording what the bidder's team actually took.
+#
+# Suit trump features: cards that would be trump (capped at 8), right bauers,
+# left bauers, offsuit aces (capped at 4).
+# No trump features: aces (capped at 6), kings (capped at 6), longest suit (capped at 8).
+_TRUMP_DIMS = (9, 3, 3, 5)
+_NO_TRUMP_DIMS = (7, 7, 9)
+_NO_TRUMP_OFFSET = math.prod(_TRUMP_DIMS)
+NUM_CELLS = _NO_TRUMP_OFFSET + math.prod(_NO_TRUMP_DIMS)
+_MAGIC = b'BTT1'
+_HEADER = struct.Struct('<4sI')
+
+
+def _cell(values: tuple[int, ...], dims: tuple[int, ...]) -> int:
+  cell = 0
+  for v, d in zip(values, dims):
+    cell = cell * d + min(v, d - 1)
+  return cell
+
+
+# Table cell of the hand for every trump choice, from one pass over the hand.
+def hand_cells(hand: list[Card]) -> dict[Suit, int]:
+  counts = {s: 0 for s in Suit.just_suits()}
+  jacks = {s: 0 for s in Suit.just_suits()}
+  aces = {s: 0 for s in Suit.just_suits()}
+  kings = 0
+  for c in hand:
+    counts[c.suit] += 1
+    if c.number == 11:
+      jacks[c.suit] += 1
+    elif c.number == 14:
+      aces[c.suit] += 1
+    elif c.number == 13:
+      kings += 1
+  total_aces = sum(aces.values())
+  cells = {}
+  for s in Suit.just_suits():
+    left_bauers = jacks[s.left()]
+    cells[s] = _cell((counts[s] + left_bauers, jacks[s], left_bauers, total_aces - aces[s]), _TRUMP_DIMS)
+  cells[Suit.TRUMP] = _NO_TRUMP_OFFSET + _cell((total_aces, kings, max(counts.values())), _NO_TRUMP_DIMS)
+  return cells
+
+
+class TrickTable:
+  def __init__(self):
+    self.sums = array('d', [0.0]) * NUM_CELLS
+    self.counts = array('I', [0]) * NUM_CELLS
+
+  def add(self, cell: int, tricks: int):
+    self.sums[cell] += tricks
+    self.counts[cell] += 1
+
+  def merge(self, other: 'TrickTable'):
+    for i in range(NUM_CELLS):
+      self.sums[i] += other.sums[i]
+      self.counts[i] += other.counts[i]
+
+  # Cells with fewer than min_count samples count as 0 tricks.
+  def expected_tricks(self, cell: int, min_count: int = 1) -> float:
+    if self.counts[cell] < min_count:
+      return 0
+    return self.sums[cell] / self.counts[cell]
+
+  def save(self, path: str):
+    with open(path, 'wb') as f:
+      f.write(_HEADER.pack(_MAGIC, NUM_CELLS))
+      self.sums.tofile(f)
+      self.counts.tofile(f)
+
+  @staticmethod
+  def load(path: str) -> 'TrickTable':
+    table = TrickTable()
+    with open(path, 'rb') as f:
+      magic, num_cells = _HEADER.unpack(f.read(_HEADER.size))
+      assert magic == _MAGIC and num_cells == NUM_CELLS, f'{path} is not a trick table for these features'
+      table.sums = array('d')
+      table.sums.fromfile(f, num_cells)
+      table.counts = array('I')
+      table.counts.fromfile(f, num_cells)
+    return table
+
+
+# Tricks taken by seat 0's team when seat 0 names trump and everyone else passes.
+def play_out(deal: list[int], trump: Suit, playing_strats: list[PlayingStrategy]) -> int:
+  players = [Player(ReplayBidder((1, trump) if i == 0 else None), playing_strats[i], name=str(i))
+             for i in range(PLAYER_COUNT)]
+  result = Hand(players, 0, [0, 0], 12).play_hand(deal=deal)
+  # The other team's score is just their tricks.
+  return HAND_SIZE - result[1]
+
+
+def build_trick_table_chunk(master_seed: int,
+                            start: int,
+                            stop: int,
+                            make_playing_strat: Callable[[], PlayingStrategy] = BasicPlayer) -> TrickTable:
+  table = TrickTable()
+  for i in range(start, stop):
+    random.seed(game_seed(master_seed, i))
+    deal = random.sample(range(DECK_SIZE), k=DECK_SIZE)
+    hand = [FULL_DECK[d] for d in deal[:HAND_SIZE]]
+    cells = hand_cells(hand)
+    for trump in Suit:
+      playing_strats = [make_playing_strat() for _ in range(PLAYER_COUNT)]
+      table.add(cells[trump], play_out(deal, trump, playing_strats))
+  return table
+
+
+def _build_chunk(args: tuple) -> TrickTable:
+  return build_trick_table_chunk(*args)
+
+
+def build_trick_table(num_deals: int,
+                      master_seed: int = 0,
+                      num_workers: int = 1,
+                      make_playing_strat: Callable[[], PlayingStrategy] = BasicPlayer) -> TrickTable:
+  table = TrickTable()
+  if num_workers <= 1:
+    table.merge(build_trick_table_chunk(master_seed, 0, num_deals, make_playing_strat))
+    return table
+  chunks = [(master_seed, start, stop, make_playing_strat) for start, stop in split_games(num_deals, num_workers)]
+  with multiprocessing.Pool(num_workers) as pool:
+    for chunk_table in pool.imap_unordered(_build_chunk, chunks):
+      table.merge(chunk_table)
+  return table
+
+
+# Bids the table's expected tricks for the best trump. Does not consider partners.
+# Given a lone_table.LoneTable, goes alone when it gives at least lone_probability
+# of making it, instead of on expected tricks.
+class TableBidder(BiddingStrategy):
+  __slots__ = ('table', 'min_bid', 'lone_threshold', 'min_count', 'lone_table', 'lone_probability')
+
+  def __init__(self,
+               table: TrickTable,
+               min_bid: int = 3,
+               lone_threshold: float = 10.5,
+               min_count: int = 20,
+               lone_table=None,
+               lone_probability: float = 0.6):
+    self.table = table
+    self.min_bid = min_bid
+    self.lone_threshold = lone_threshold
+    self.min_count = min_count
+    self.lone_table = lone_table
+    self.lone_probability = lone_probability
+
+  def bid(self, hand: list[Card], prev_bids: list[Bid], curr_max: int, score_delta: int, hands_left: int) -> Bid:
+    if self.lone_table is not None:
+      lone_suit, p = self.lone_table.best_lone(hand, min_count=self.min_count)
+      if p >= self.lone_probability:
+        return len(hand) + 1, lone_suit
+    cells = hand_cells(hand)
+    expected = {s: self.table.expected_tricks(cells[s], self.min_count) for s in Suit}
+    best_suit = max(expected, key=expected.get)
+    if self.lone_table is None and expected[best_suit] >= self.lone_threshold:
+      return len(hand) + 1, best_suit
+    amount = math.floor(expected[best_suit])
+    if amount > curr_max and amount >= self.min_bid:
+      return amount, best_suit
+    return None
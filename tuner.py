@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import multiprocessing
+import multiprocessing.pool
+import os
+from typing import Optional
+
+from basic_strategies import BasicPlayer, GoodBidder
+from game import Game
+from player import Player
+from simulation import GameTotals, play_seeded_games, split_games
+
+# Searches GoodBidder.DEFAULT_PARAMS for params that beat the defaults.
+#
+# A candidate's score is its average margin per game as a partnership against
+# a reference bidder, both teams playing BasicPlayer. Every candidate plays the
+# same seeded games in duplicate (each deal again with the teams swapped), so
+# they see exactly the same cards and the difference between two candidates is
+# mostly down to their params, not the deals (common random numbers).
+#
+# The search is a compass search: each round scores one step up and one step
+# down in every param, in parallel, and moves to the best of them if it beats
+# where it is. If none does, the steps are halved, down to a minimum. Scores
+# are for the shared deals only, so the result is scored again on unseen
+# deals at the end to see how much of the gain was fitting those.
+
+# Params searched, with (first step, smallest step, lowest, highest). Params
+# whose default is an int stay ints.
+TUNABLE = {
+  'left_weight': (0.25, 0.05, 0, 3),
+  'right_weight': (0.25, 0.05, 0, 3),
+  'high_weight': (0.2, 0.05, 0, 2),
+  'low_weight': (0.2, 0.05, 0, 2),
+  'fixed_threshold': (1, 1, 1, 6),
+  'contested_fixed_threshold': (1, 1, 1, 6),
+  'full_offsuit_score': (1, 0.25, 0, 12),
+  'half_offsuit_score': (1, 0.25, 0, 12),
+  'lone_score': (1, 0.25, 4, 14),
+  'forced_lone_score': (1, 0.25, 0, 12),
+  'lone_desperation_divisor': (2, 0.5, 1, 20),
+  'bid_desperation_divisor': (2, 0.5, 1, 20),
+  'forced_lone_pct': (0.1, 0.025, 0.1, 2),
+  'assumed_bid_points': (1, 1, 0, 11),
+  'indicate_below': (1, 0.25, 0, 11),
+  'weak_lone_trump_score': (1, 0.25, 0, 12),
+  'strong_lone_trump_score': (1, 0.25, 0, 12),
+  'lone_full_offsuit_score': (1, 0.25, 0, 20),
+  'lone_half_offsuit_score': (1, 0.25, 0, 20),
+}
+
+
+def to_vector(params: dict[str, float]) -> list[float]:
+  return [params[name] for name in TUNABLE]
+
+
+def from_vector(vector: list[float]) -> dict[str, float]:
+  return dict(zip(TUNABLE, vector))
+
+
+def _key(params: dict[str, float]) -> tuple:
+  return tuple(to_vector(params))
+
+
+# Candidate's bidders in seats 0 and 2 against the reference's.
+def make_game(params: dict[str, float], reference_params: Optional[dict[str, float]] = None) -> Game:
+  return Game([Player(GoodBidder(params if seat % 2 == 0 else reference_params), BasicPlayer(), name=str(seat))
+               for seat in range(4)])
+
+
+def _score_chunk(args: tuple[int, dict, Optional[dict], int, int, int, int]) -> tuple[int, GameTotals]:
+  candidate_index, params, reference_params, master_seed, start, stop, num_hands = args
+  game = make_game(params, reference_params)
+  return candidate_index, play_seeded_games(game, master_seed, start, stop, num_hands, duplicate=True)
+
+
+# Totals for each candidate over the same num_games duplicate pairs.
+def score_candidates(candidates: list[dict[str, float]],
+                     num_games: int,
+                     master_seed: int,
+                     pool: Optional[multiprocessing.pool.Pool] = None,
+                     num_workers: int = 1,
+                     reference_params: Optional[dict[str, float]] = None,
+                     num_hands: int = 12) -> list[GameTotals]:
+  results = [GameTotals() for _ in candidates]
+  splits = split_games(num_games, num_workers) if pool is not None else [(0, num_games)]
+  chunks = [(i, params, reference_params, master_seed, start, stop, num_hands)
+            for i, params in enumerate(candidates) for start, stop in splits]
+  scored = map(_score_chunk, chunks) if pool is None else pool.imap_unordered(_score_chunk, chunks)
+  for i, totals in scored:
+    results[i].merge(totals)
+  return results
+
+
+def average_margin(totals: GameTotals) -> float:
+  return totals.team_0_diff / totals.num_games if totals.num_games else 0
+
+
+# Params one step either side of params in each tunable param, within bounds.
+def neighbours(params: dict[str, float], steps: dict[str, float]) -> list[dict[str, float]]:
+  result = []
+  for name, (_, _, lowest, highest) in TUNABLE.items():
+    for sign in (1, -1):
+      value = params[name] + sign * steps[name]
+      if isinstance(GoodBidder.DEFAULT_PARAMS[name], int):
+        value = int(round(value))
+      else:
+        value = round(value, 6)
+      if lowest <= value <= highest and value != params[name]:
+        result.append({**params, name: value})
+  return result
+
+
+# The best params found and their score on the shared deals.
+def tune(num_games: int,
+         master_seed: int = 0,
+         num_workers: int = 1,
+         max_rounds: int = 30,
+         start: Optional[dict[str, float]] = None,
+         reference_params: Optional[dict[str, float]] = None,
+         num_hands: int = 12) -> tuple[dict[str, float], float]:
+  current = {**GoodBidder.DEFAULT_PARAMS, **(start or {})}
+  steps = {name: step for name, (step, _, _, _) in TUNABLE.items()}
+  # Scores by param vector, so nothing is played twice.
+  scores = {}
+  pool = multiprocessing.Pool(num_workers) if num_workers > 1 else None
+  try:
+    def score(candidates: list[dict[str, float]]) -> list[float]:
+      new = [c for c in candidates if _key(c) not in scores]
+      for c, totals in zip(new, score_candidates(new, num_games, master_seed, pool, num_workers,
+                                                 reference_params, num_hands)):
+        scores[_key(c)] = average_margin(totals)
+      return [scores[_key(c)] for c in candidates]
+
+    current_score = score([current])[0]
+    logging.warning(f'Start: {current_score:+.3f}')
+    for round_number in range(max_rounds):
+      candidates = neighbours(current, steps)
+      candidate_scores = score(candidates)
+      best = max(range(len(candidates)), key=candidate_scores.__getitem__, default=None)
+      if best is not None and candidate_scores[best] > current_score:
+        changed = [name for name in TUNABLE if candidates[best][name] != current[name]]
+        current, current_score = candidates[best], candidate_scores[best]
+        logging.warning(f'Round {round_number + 1}: {current_score:+.3f} moving {changed[0]} to {current[changed[0]]}')
+        continue
+      if all(steps[name] <= smallest for name, (_, smallest, _, _) in TUNABLE.items()):
+        break
+      steps = {name: max(steps[name] / 2, smallest) for name, (_, smallest, _, _) in TUNABLE.items()}
+      logging.warning(f'Round {round_number + 1}: no improvement, halving steps')
+  finally:
+    if pool is not None:
+      pool.close()
+      pool.join()
+  return current, current_score
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Tune the GoodBidder params against the defaults.')
+  parser.add_argument('--games', type=int, default=200, help='duplicate pairs each candidate plays')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--validation-seed', type=int, default=1, help='seed of the unseen deals the result is checked on')
+  parser.add_argument('--workers', type=int, default=os.cpu_count())
+  parser.add_argument('--rounds', type=int, default=30)
+  parser.add_argument('--out', help='write the params found here as JSON')
+  args = parser.parse_args()
+  logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+  params, fitted = tune(args.games, args.seed, args.workers, args.rounds)
+  if args.workers > 1:
+    with multiprocessing.Pool(args.workers) as pool:
+      validation = score_candidates([params], args.games, args.validation_seed, pool, args.workers)
+  else:
+    validation = score_candidates([params], args.games, args.validation_seed)
+  validated = average_margin(validation[0])
+  for name, value in params.items():
+    default = GoodBidder.DEFAULT_PARAMS[name]
+    print(f'{name:<26} {value:8g}' + (f'  (default {default:g})' if value != default else ''))
+  print(f'Margin per duplicate pair against the defaults: {fitted:+.3f} on the tuning deals, {validated:+.3f} on unseen deals')
+  if args.out:
+    with open(args.out, 'w') as f:
+      json.dump(params, f, indent=2)
+
+
+if __name__ == '__main__':
+  main()
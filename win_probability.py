@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+import multiprocessing
+import os
+import random
+import struct
+from array import array
+from typing import Callable
+
+from basic_strategies import BasicBidder, BasicPlayer, GoodBidder
+from constants import HAND_SIZE, LONE_HAND_POINTS
+from game import Game
+from hand_record import HandRecord
+from player import Player
+from simulation import game_seed, split_games
+
+# Chance of winning the game from a score difference with some hands left to
+# play, P(win | score_delta, hands_left), ties counting half.
+#
+# Hand results are taken to be independent draws from the distribution of one
+# hand's score change, measured by playing games. The table then follows from
+# the last hand backwards:
+#   P(0, d) = 1 if d > 0, 1/2 if d == 0, 0 otherwise
+#   P(h, d) = sum over x of P(x) * P(h - 1, d + x)
+# That ignores how strategies bid differently when ahead or behind, which only
+# matters at the margins.
+
+# Biggest change in the score difference from one hand: a lone hand made, or a
+# lone hand set with the other team taking every trick.
+MAX_HAND_DELTA = LONE_HAND_POINTS + HAND_SIZE
+MAX_HANDS = 12
+# Differences past this are clamped. Beyond it the game is decided anyway.
+MAX_DELTA = MAX_HANDS * MAX_HAND_DELTA
+_MAGIC = b'BWP1'
+_HEADER = struct.Struct('<4sII')
+
+
+def default_players() -> list[Player]:
+  return [Player(GoodBidder(), BasicPlayer(), name='A'),
+          Player(BasicBidder(), BasicPlayer(), name='b'),
+          Player(GoodBidder(), BasicPlayer(), name='C'),
+          Player(BasicBidder(), BasicPlayer(), name='d')]
+
+
+# Counts of each score difference change over a hand, index delta + MAX_HAND_DELTA.
+class _DeltaCounter:
+  def __init__(self):
+    self.counts = array('Q', [0]) * (2 * MAX_HAND_DELTA + 1)
+
+  # Called with each hand's record, as a Game recorder.
+  def write(self, record: HandRecord):
+    delta = record.result[0] - record.result[1]
+    # Both teams' view, so the distribution is symmetric.
+    self.counts[MAX_HAND_DELTA + delta] += 1
+    self.counts[MAX_HAND_DELTA - delta] += 1
+
+
+def count_hand_deltas_chunk(master_seed: int,
+                            start: int,
+                            stop: int,
+                            make_players: Callable[[], list[Player]] = default_players) -> array:
+  counter = _DeltaCounter()
+  game = Game(make_players())
+  for i in range(start, stop):
+    random.seed(game_seed(master_seed, i))
+    game.play_game(num_hands=MAX_HANDS, recorder=counter)
+  return counter.counts
+
+
+def _count_chunk(args: tuple) -> array:
+  return count_hand_deltas_chunk(*args)
+
+
+def count_hand_deltas(num_games: int,
+                      master_seed: int = 0,
+                      num_workers: int = 1,
+                      make_players: Callable[[], list[Player]] = default_players) -> array:
+  if num_workers <= 1:
+    return count_hand_deltas_chunk(master_seed, 0, num_games, make_players)
+  counts = array('Q', [0]) * (2 * MAX_HAND_DELTA + 1)
+  chunks = [(master_seed, start, stop, make_players) for start, stop in split_games(num_games, num_workers)]
+  with multiprocessing.Pool(num_workers) as pool:
+    for chunk_counts in pool.imap_unordered(_count_chunk, chunks):
+      for i, c in enumerate(chunk_counts):
+        counts[i] += c
+  return counts
+
+
+class WinTable:
+  def __init__(self):
+    # probabilities[hands_left * width + score_delta + MAX_DELTA]
+    self.width = 2 * MAX_DELTA + 1
+    self.probabilities = array('d', [0.0]) * ((MAX_HANDS + 1) * self.width)
+
+  @staticmethod
+  def from_hand_deltas(counts: array) -> 'WinTable':
+    table = WinTable()
+    total = sum(counts)
+    steps = [(i - MAX_HAND_DELTA, c / total) for i, c in enumerate(counts) if c]
+    width = table.width
+    p = table.probabilities
+    for d in range(-MAX_DELTA, MAX_DELTA + 1):
+      p[d + MAX_DELTA] = 1.0 if d > 0 else 0.5 if d == 0 else 0.0
+    for h in range(1, MAX_HANDS + 1):
+      prev = (h - 1) * width
+      row = h * width
+      for d in range(-MAX_DELTA, MAX_DELTA + 1):
+        win = 0.0
+        for x, px in steps:
+          win += px * p[prev + min(max(d + x, -MAX_DELTA), MAX_DELTA) + MAX_DELTA]
+        p[row + d + MAX_DELTA] = win
+    return table
+
+  def probability(self, score_delta: int, hands_left: int) -> float:
+    score_delta = min(max(score_delta, -MAX_DELTA), MAX_DELTA)
+    return self.probabilities[min(hands_left, MAX_HANDS) * self.width + score_delta + MAX_DELTA]
+
+  def save(self, path: str):
+    with open(path, 'wb') as f:
+      f.write(_HEADER.pack(_MAGIC, MAX_HANDS, MAX_DELTA))
+      self.probabilities.tofile(f)
+
+  @staticmethod
+  def load(path: str) -> 'WinTable':
+    table = WinTable()
+    with open(path, 'rb') as f:
+      magic, max_hands, max_delta = _HEADER.unpack(f.read(_HEADER.size))
+      assert magic == _MAGIC and max_hands == MAX_HANDS and max_delta == MAX_DELTA, f'{path} is not a win table'
+      table.probabilities = array('d')
+      table.probabilities.fromfile(f, (MAX_HANDS + 1) * table.width)
+    return table
+
+
+# The table at path, built from num_games simulated games and saved there first
+# if it doesn't exist yet.
+def load_or_build(path: str = 'win_table.bin',
+                  num_games: int = 2000,
+                  master_seed: int = 0,
+                  num_workers: int = 1,
+                  make_players: Callable[[], list[Player]] = default_players) -> WinTable:
+  if os.path.exists(path):
+    return WinTable.load(path)
+  table = WinTable.from_hand_deltas(count_hand_deltas(num_games, master_seed, num_workers, make_players))
+  table.save(path)
+  return table
+
+
+if __name__ == '__main__':
+  table = load_or_build(num_workers=os.cpu_count())
+  for hands_left in (1, 3, 6, 12):
+    print(f'{hands_left:2} hands left: ' +
+          '  '.join(f'{d:+d}: {table.probability(d, hands_left):.3f}' for d in (-30, -15, -5, 0, 5, 15, 30)))